@@ -0,0 +1,202 @@
+"""
+Real-time Stock Market Sentiment Analyzer
+Headless JSON/HTTP API and static host for web_interface.html
+"""
+import argparse
+import json
+import os
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+from modules.data_hub import DataHub
+from modules.analytics_service import AnalyticsService
+from modules.update_stream import UpdateStream
+from utils.metrics import render_prometheus
+from utils.profiling import ProfileCapture, profiling_requested
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Only the web interface and its assets are served as static files
+STATIC_FILES = ('web_interface.html',)
+STATIC_DIRS = ('scripts', 'styles')
+
+# Clients may only ask for a ?profile=1 capture (files written to disk) when this is set
+ALLOW_PROFILE_REQUESTS = os.environ.get('SENTIMENT_API_PROFILE', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Seconds between keep-alive comments on an idle event stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+class AnalyticsRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Routes /api/<endpoint> to the shared AnalyticsService and serves the web UI
+    """
+    service = None
+    stream = None
+    protocol_version = 'HTTP/1.1'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=ROOT_DIR, **kwargs)
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') == '/api/stream':
+            self._handle_stream(url)
+        elif url.path.startswith('/api/'):
+            self._handle_api(url)
+        elif url.path == '/metrics':
+            self._send_metrics()
+        elif url.path == '/':
+            self.send_response(302)
+            self.send_header('Location', '/web_interface.html')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self._is_static(self.translate_path(self.path)):
+            super().do_GET()
+        else:
+            self.send_error(404)
+    
+    def _is_static(self, path):
+        """
+        Whether a translated path resolves to the web interface or a file under its asset directories
+        Checked after normalisation, so '..' and percent-encoded segments cannot escape them
+        """
+        root = os.path.realpath(ROOT_DIR)
+        path = os.path.realpath(path)
+        if path in (os.path.join(root, name) for name in STATIC_FILES):
+            return True
+        return any(path.startswith(os.path.join(root, directory) + os.sep) for directory in STATIC_DIRS)
+    
+    def _handle_api(self, url):
+        endpoint = url.path[len('/api/'):].strip('/')
+        params = dict(parse_qsl(url.query))
+        if endpoint not in self.service.endpoints:
+            return self._send_json_error(404, f"Unknown endpoint: {endpoint}")
+        flag = params.pop('profile', None)
+        capture = ProfileCapture(f'api_{endpoint}') if profiling_requested(flag if ALLOW_PROFILE_REQUESTS else None) else None
+        try:
+            if capture is not None:
+                with capture:
+                    response = self.service.respond(endpoint, params)
+            else:
+                response = self.service.respond(endpoint, params)
+        except ValueError as e:
+            return self._send_json_error(400, str(e))
+        except Exception as e:
+            print(f"Error serving {self.path}: {e}")
+            return self._send_json_error(500, "Internal error")
+        
+        # Conditional request: same data version and parameters give the same ETag
+        if response.etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', response.etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        
+        body = response.body
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) > 1024
+        if use_gzip:
+            body = response.gzipped
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if capture is not None:
+            self.send_header('X-Profile', ', '.join(os.path.relpath(path, ROOT_DIR) for path in capture.paths))
+        self.send_header('ETag', response.etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _handle_stream(self, url):
+        """
+        Server-sent events: a 'delta' per changed ticker, 'reset' when the hub was rebuilt
+        """
+        params = dict(parse_qsl(url.query))
+        try:
+            tickers = self.service._parse_tickers(params.get('tickers'))
+            days = self.service._parse_days(params.get('days', 7))
+        except ValueError as e:
+            return self._send_json_error(400, str(e))
+        
+        # Make sure the hub holds what the client will be sent deltas for
+        self.service.hub.ensure(tickers, days)
+        client = self.stream.subscribe(tickers, days)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        # The response has no length, so the connection ends with the stream
+        self.close_connection = True
+        try:
+            self.wfile.write(b'retry: 5000\n\n')
+            self.wfile.flush()
+            while True:
+                event = client.next_event(timeout=STREAM_KEEPALIVE_SECONDS)
+                self.wfile.write(b': keep-alive\n\n' if event is None else self.stream.format_event(event))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.stream.unsubscribe(client)
+    
+    def _send_metrics(self):
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json_error(self, status, message):
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Keep the console quiet except for errors
+        pass
+
+
+def create_server(host='127.0.0.1', port=8000, hub=None, refresh_seconds=300):
+    """
+    Build the HTTP server around one process-wide hub and service
+    """
+    hub = hub or DataHub(refresh_seconds=refresh_seconds)
+    AnalyticsRequestHandler.service = AnalyticsService(hub=hub)
+    AnalyticsRequestHandler.stream = UpdateStream(AnalyticsRequestHandler.service)
+    server = ThreadingHTTPServer((host, port), AnalyticsRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment analytics HTTP API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--refresh-seconds', type=int, default=300)
+    args = parser.parse_args()
+    
+    server = create_server(args.host, args.port, refresh_seconds=args.refresh_seconds)
+    server.RequestHandlerClass.service.hub.start()
+    print(f"Serving analytics API on http://{args.host}:{args.port}/api/ "
+          f"and the web interface on http://{args.host}:{args.port}/web_interface.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.RequestHandlerClass.service.hub.stop()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -5,19 +5,50 @@ Main Streamlit Application
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
+import functools
+import os
 import time
+import uuid
 
 # Import custom modules
 from modules.data_collector import DataCollector
 from modules.sentiment_analyzer import SentimentAnalyzer
 from modules.data_processor import DataProcessor
 from modules.visualizations import Visualizations
+from modules.backtester import SentimentBacktester
+from modules.data_hub import DataHub
+from modules.delta_feed import DeltaFeed
+from modules.panel_registry import PanelRegistry
+from modules.memory_budget import MemoryBudget, SessionMemory
+from modules.pipeline import SentimentPipeline
 from utils.helpers import (
     get_sentiment_color, 
     get_sentiment_label, 
     format_large_number,
     calculate_price_change
 )
+from utils import metrics
+from utils.profiling import ProfileCapture, profiling_requested
+
+run_started = time.perf_counter()
+
+# ?profile=1 (or SENTIMENT_PROFILE=1) captures this script run with the profiler
+if st.session_state.get('profile_capture') is not None:
+    # A run that raised never reached finish_profile; close its capture first
+    st.session_state.pop('profile_capture').stop()
+if profiling_requested(st.query_params.get('profile')):
+    st.session_state['profile_capture'] = ProfileCapture('app_run').start()
+
+def finish_profile():
+    """Stop this run's capture and report where it was written"""
+    capture = st.session_state.pop('profile_capture', None)
+    if capture is None:
+        return
+    paths = capture.stop()
+    st.sidebar.caption(f"🔬 Profiled this run ({capture.elapsed * 1000:.0f} ms): {', '.join(paths)}")
+    if 'profile' in st.query_params:
+        # One capture per request; reload with ?profile=1 to capture another run
+        del st.query_params['profile']
 
 # Page configuration
 st.set_page_config(
@@ -67,6 +98,19 @@ if 'sentiment_data' not in st.session_state:
     st.session_state['sentiment_data'] = None
 if 'last_update' not in st.session_state:
     st.session_state['last_update'] = None
+if 'sentiment_cube' not in st.session_state:
+    st.session_state['sentiment_cube'] = None
+if 'mention_index' not in st.session_state:
+    st.session_state['mention_index'] = None
+if 'momentum_tracker' not in st.session_state:
+    st.session_state['momentum_tracker'] = None
+if 'panel_registry' not in st.session_state:
+    st.session_state['panel_registry'] = PanelRegistry()
+panel_registry = st.session_state['panel_registry']
+panel_registry.begin_run()
+if 'memory_ledger' not in st.session_state:
+    st.session_state['memory_ledger'] = SessionMemory(uuid.uuid4().hex)
+memory_ledger = st.session_state['memory_ledger']
 
 # Initialize components
 @st.cache_resource
@@ -76,19 +120,86 @@ def initialize_components():
     analyzer = SentimentAnalyzer()
     processor = DataProcessor()
     visualizer = Visualizations()
-    return collector, analyzer, processor, visualizer
+    backtester = SentimentBacktester()
+    return collector, analyzer, processor, visualizer, backtester
+
+collector, analyzer, processor, visualizer, backtester = initialize_components()
+
+@st.cache_resource
+def get_data_hub():
+    """Process-wide data hub shared by every session (cached)"""
+    return DataHub(collector, refresh_seconds=300).start()
+
+data_hub = get_data_hub()
+# Large histories stream from the hub's post store (SENTIMENT_POST_STORE, SENTIMENT_CHUNKED_ROWS)
+processor.attach_hub(data_hub)
+
+@st.cache_resource
+def get_delta_feed():
+    """Change log over the data hub, shared by every session (cached)"""
+    return DeltaFeed(get_data_hub())
+
+delta_feed = get_delta_feed()
+
+@st.cache_resource
+def get_sentiment_pipeline(workers, rate):
+    """Collector, scorer and aggregator processes feeding live posts to the hub (cached)"""
+    return SentimentPipeline(get_data_hub(), scorers=workers, rate=rate).start()
+
+# SENTIMENT_PIPELINE_WORKERS scorer processes score live posts off the UI process
+sentiment_pipeline = None
+if os.environ.get('SENTIMENT_PIPELINE_WORKERS'):
+    sentiment_pipeline = get_sentiment_pipeline(
+        int(os.environ['SENTIMENT_PIPELINE_WORKERS']), float(os.environ.get('SENTIMENT_PIPELINE_RATE', 1.0))
+    )
+
+@st.cache_resource
+def get_memory_budget():
+    """Process-wide memory accounting over every session's data (cached)"""
+    # Limit from SENTIMENT_MEMORY_BUDGET_MB
+    return MemoryBudget(hub=get_data_hub())
+
+memory_budget = get_memory_budget()
+memory_budget.attach(memory_ledger)
 
-collector, analyzer, processor, visualizer = initialize_components()
+def session_frames():
+    """Per-session data the memory budget accounts for"""
+    keys = ['stock_data', 'sentiment_data', 'sentiment_cube', 'mention_index', 'momentum_tracker']
+    return {key: st.session_state.get(key) for key in keys}
+
+@st.cache_resource
+def get_metrics_server(port):
+    """Prometheus /metrics endpoint for this process, started once (cached)"""
+    try:
+        return metrics.start_metrics_server(port)
+    except OSError as e:
+        print(f"Warning: Could not start metrics server on port {port}: {e}")
+        return None
+
+if os.environ.get('SENTIMENT_METRICS_PORT'):
+    get_metrics_server(int(os.environ['SENTIMENT_METRICS_PORT']))
+
+def panel_fragment(run_every=None):
+    """Run a panel as a fragment that reruns on its own timer"""
+    fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if fragment is None:
+        print("Warning: Streamlit fragments unavailable, panels refresh with the full page")
+        return lambda func: func
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def guarded(*args, **kwargs):
+            # Fragment reruns skip the main script body, so they mark the session busy for the memory budget themselves
+            with memory_ledger.running():
+                return func(*args, **kwargs)
+        return fragment(run_every=run_every)(guarded)
+    return decorator
 
 # Load data function
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def load_data(tickers, num_days=7):
-    """Load stock and sentiment data"""
-    with st.spinner('Fetching stock data...'):
-        stock_data = collector.fetch_multiple_stocks(tickers, period=f'{num_days}d', interval='1h')
-    
-    with st.spinner('Generating sentiment data...'):
-        sentiment_data = collector.generate_sentiment_for_multiple_stocks(tickers, num_days=num_days)
+    """Load stock and sentiment data as a slice of the shared hub"""
+    with st.spinner('Loading stock and sentiment data...'):
+        stock_data, sentiment_data = data_hub.subscribe(tickers, num_days)
     
     return stock_data, sentiment_data
 
@@ -114,7 +225,7 @@ num_days = st.sidebar.slider("Historical data (days):", min_value=1, max_value=3
 
 # Refresh button - FIXED: Use experimental_rerun for older Streamlit versions
 if st.sidebar.button("🔄 Refresh Data", type="primary"):
-    st.cache_data.clear()
+    data_hub.refresh()
     st.session_state['data_loaded'] = False
     # Use experimental_rerun for compatibility with older Streamlit versions
     if hasattr(st, 'rerun'):
@@ -122,8 +233,15 @@ if st.sidebar.button("🔄 Refresh Data", type="primary"):
     else:
         st.experimental_rerun()
 
-# Auto-refresh toggle
-auto_refresh = st.sidebar.checkbox("Auto-refresh (5 min)", value=False)
+# Auto-refresh toggle - panels refresh on their own timers without blocking the script
+auto_refresh = st.sidebar.checkbox("Auto-refresh", value=False)
+refresh_intervals = {'ingest': None, 'overview': None, 'movers': None, 'mentions': None}
+if auto_refresh:
+    with st.sidebar.expander("Refresh intervals (seconds)"):
+        refresh_intervals['ingest'] = st.number_input("New bars & posts", min_value=10, value=300, step=10)
+        refresh_intervals['overview'] = st.number_input("Market overview", min_value=10, value=300, step=10)
+        refresh_intervals['movers'] = st.number_input("Sentiment movers", min_value=10, value=300, step=10)
+        refresh_intervals['mentions'] = st.number_input("Top mentions", min_value=10, value=600, step=10)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### About")
@@ -139,93 +257,236 @@ st.sidebar.info(
 # Load data
 if not selected_tickers:
     st.warning("⚠️ Please select at least one stock ticker from the sidebar.")
+    finish_profile()
     st.stop()
 
 # Load or refresh data - FIXED: Use get() method for safe access
 data_loaded = st.session_state.get('data_loaded', False)
 last_update = st.session_state.get('last_update', None)
 
-if not data_loaded or last_update is None:
+# A new selection or history length is sliced from the hub, which only fetches what it lacks
+load_key = (tuple(sorted(selected_tickers)), num_days)
+
+if not data_loaded or last_update is None or st.session_state.get('load_key') != load_key:
     stock_data, sentiment_data = load_data(selected_tickers, num_days)
     st.session_state['stock_data'] = stock_data
     st.session_state['sentiment_data'] = sentiment_data
+    st.session_state['sentiment_cube'] = analyzer.build_sentiment_cube(sentiment_data)
+    st.session_state['mention_index'] = analyzer.build_mention_index(sentiment_data)
+    st.session_state['momentum_tracker'] = analyzer.build_momentum_tracker(sentiment_data)
+    st.session_state['post_cursor'] = sentiment_data['timestamp'].max() if not sentiment_data.empty else datetime.now()
+    st.session_state['hub_version'] = data_hub.version
+    st.session_state['load_key'] = load_key
     st.session_state['data_loaded'] = True
     st.session_state['last_update'] = datetime.now()
 else:
     stock_data = st.session_state.get('stock_data')
     sentiment_data = st.session_state.get('sentiment_data')
 
-# Display last update time
-if st.session_state.get('last_update'):
-    st.sidebar.markdown(f"**Last updated:** {st.session_state['last_update'].strftime('%Y-%m-%d %H:%M:%S')}")
+# Ticker x source x time cube shared by the aggregate views
+sentiment_cube = st.session_state.get('sentiment_cube')
+if sentiment_cube is None and sentiment_data is not None and not sentiment_data.empty:
+    sentiment_cube = analyzer.build_sentiment_cube(sentiment_data)
+    st.session_state['sentiment_cube'] = sentiment_cube
+
+# Top-K mentions index so the mentions tab does not sort the full history
+mention_index = st.session_state.get('mention_index')
+if mention_index is None and sentiment_data is not None and not sentiment_data.empty:
+    mention_index = analyzer.build_mention_index(sentiment_data)
+    st.session_state['mention_index'] = mention_index
+
+# Running-sum momentum tracker for O(1) momentum and movers ranking
+momentum_tracker = st.session_state.get('momentum_tracker')
+if momentum_tracker is None and sentiment_data is not None and not sentiment_data.empty:
+    momentum_tracker = analyzer.build_momentum_tracker(sentiment_data)
+    st.session_state['momentum_tracker'] = momentum_tracker
+
+# Incremental ingest - take only bars and posts newer than the stored cursors from the hub
+@panel_fragment(run_every=refresh_intervals['ingest'])
+def ingest_new_data():
+    """Append new data to the session and fold it into the incremental indexes"""
+    if auto_refresh and st.session_state.get('stock_data') is not None and st.session_state.get('hub_version') != data_hub.version:
+        current_stock = st.session_state['stock_data']
+        # Only the rows published since the session's cursor are read from the change log
+        rows = delta_feed.rows_since(st.session_state.get('hub_version'), selected_tickers)
+        if rows is not None:
+            st.session_state['hub_version'], new_bars, new_posts = rows
+            # Older history fetched for another session's longer window falls outside this one
+            new_bars, new_posts = data_hub.window(new_bars, new_posts, selected_tickers, num_days)
+        else:
+            # The cursor fell out of the log or the hub was rebuilt: rescan the hub view
+            st.session_state['hub_version'] = data_hub.version
+            hub_stock, hub_sentiment = data_hub.view(selected_tickers, num_days)
+            date_column = 'Datetime' if 'Datetime' in current_stock.columns else 'Date'
+            cursors = current_stock.groupby('Ticker')[date_column].max()
+            new_bars = hub_stock[hub_stock[date_column] > hub_stock['Ticker'].map(cursors)] if not hub_stock.empty else hub_stock
+            new_posts = hub_sentiment[hub_sentiment['timestamp'] > st.session_state['post_cursor']] if not hub_sentiment.empty else hub_sentiment
+        
+        now = datetime.now()
+        if not new_posts.empty:
+            st.session_state['post_cursor'] = new_posts['timestamp'].max()
+        
+        if not new_bars.empty:
+            st.session_state['stock_data'] = pd.concat([current_stock, new_bars], ignore_index=True)
+        if not new_posts.empty:
+            st.session_state['sentiment_data'] = pd.concat([st.session_state['sentiment_data'], new_posts], ignore_index=True)
+            st.session_state['sentiment_cube'].update(new_posts)
+            st.session_state['mention_index'].add_posts(new_posts)
+            # Windowed buckets older than the session's history can no longer be queried
+            st.session_state['mention_index'].expire(now - pd.Timedelta(days=num_days))
+            st.session_state['momentum_tracker'].update(new_posts)
+        if not new_bars.empty or not new_posts.empty:
+            # New last_update is the data version, so cached panels recompute on next view
+            st.session_state['last_update'] = now
+            memory_ledger.track(session_frames())
+    
+    # Display last update time
+    if st.session_state.get('last_update'):
+        st.markdown(f"**Last updated:** {st.session_state['last_update'].strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    cache_stats = data_hub.cache_stats()
+    st.caption(
+        f"Data cache: {cache_stats['superset_hit_rate']:.0%} of {cache_stats['requests']} loads served from cached data "
+        f"({cache_stats['partial_hits']} partial, {cache_stats['misses']} misses)"
+    )
+
+with st.sidebar:
+    ingest_new_data()
 
 # Main content
 if stock_data is None or sentiment_data is None or stock_data.empty or sentiment_data.empty:
     st.error("❌ Failed to load data. Please try refreshing.")
+    finish_profile()
     st.stop()
 
-# Tab layout
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "📈 Detailed Analysis", "🔍 Correlation", "💬 Top Mentions"])
+memory_ledger.begin_run(session_frames(), panel_registry)
+
+# Panels declare the inputs they depend on; results are cached per (panel, inputs, data version)
+def _session_data():
+    return st.session_state['stock_data'], st.session_state['sentiment_data']
+
+def _merged_by_ticker(tickers):
+    return {ticker: panel('merged', ticker=ticker) for ticker in tickers}
+
+panel_registry.register(
+    'sentiment_summary', lambda ticker: processor.get_sentiment_summary(
+        _session_data()[1], _session_data()[0], ticker, merged=panel('merged', ticker=ticker)), inputs=('ticker',)
+).register(
+    'merged', lambda ticker: processor.merge_stock_and_sentiment(*_session_data(), ticker), inputs=('ticker',)
+).register(
+    'significance', lambda tickers: processor.calculate_significance_for_tickers(_merged_by_ticker(tickers)), inputs=('tickers',)
+).register(
+    'granger_screen', lambda tickers: processor.screen_granger_causality(_merged_by_ticker(tickers), max_lag=24), inputs=('tickers',)
+).register(
+    'backtest', lambda tickers: backtester.run(_merged_by_ticker(tickers)), inputs=('tickers',)
+).register(
+    'comparison_chart', lambda tickers: visualizer.create_multi_stock_comparison(
+        {ticker: panel('sentiment_summary', ticker=ticker) for ticker in tickers}), inputs=('tickers',)
+).register(
+    'correlation_heatmap', lambda tickers: visualizer.create_correlation_heatmap(
+        {ticker: panel('sentiment_summary', ticker=ticker) for ticker in tickers}), inputs=('tickers',)
+).register(
+    'sentiment_gauge', lambda ticker: visualizer.create_sentiment_gauge(
+        panel('sentiment_summary', ticker=ticker)['latest_sentiment'], ticker), inputs=('ticker',)
+).register(
+    'sentiment_vs_price', lambda ticker: visualizer.create_sentiment_vs_price_chart(
+        panel('sentiment_summary', ticker=ticker)['merged_data'], ticker), inputs=('ticker',)
+).register(
+    'mention_volume', lambda ticker: visualizer.create_mention_volume_chart(_session_data()[1], ticker), inputs=('ticker',)
+).register(
+    'sentiment_distribution', lambda ticker: visualizer.create_sentiment_distribution_pie(
+        _session_data()[1], ticker, cube=st.session_state['sentiment_cube']), inputs=('ticker',)
+).register(
+    'source_breakdown', lambda ticker: st.session_state['sentiment_cube'].rollup('source', ticker=ticker), inputs=('ticker',)
+).register(
+    'candlestick', lambda ticker: visualizer.create_candlestick_chart(_session_data()[0], ticker), inputs=('ticker',)
+).register(
+    'sentiment_spikes', lambda ticker: processor.detect_sentiment_spikes(_session_data()[1], ticker, threshold=2.0), inputs=('ticker',)
+)
+
+def panel(name, **inputs):
+    """Cached panel result at the session's current data version"""
+    return panel_registry.get(name, st.session_state['last_update'], **inputs)
+
+# Results for older data versions can never be requested again
+panel_registry.invalidate(st.session_state['last_update'])
 
 # Tab 1: Overview
-with tab1:
+def render_overview():
+    """Market overview tab"""
     st.header("Market Overview")
     
-    # Create columns for each stock
-    cols = st.columns(len(selected_tickers))
-    
-    for idx, ticker in enumerate(selected_tickers):
-        with cols[idx]:
-            # Get stock info - FIXED: Add error handling
-            stock_info = collector.get_latest_stock_info(ticker)
-            
-            if stock_info and stock_info.get('current_price') is not None:
-                # Get sentiment summary
-                summary = processor.get_sentiment_summary(sentiment_data, stock_data, ticker)
-                
-                # Display metrics
-                st.subheader(f"{stock_info.get('company_name', ticker)}")
-                
-                current_price = stock_info.get('current_price', 0)
-                previous_close = stock_info.get('previous_close', current_price)
-                
-                st.metric(
-                    label="Current Price",
-                    value=f"${current_price:.2f}",
-                    delta=f"{calculate_price_change(current_price, previous_close):.2f}%"
-                )
-                
-                sentiment_score = summary['latest_sentiment']
-                sentiment_label = get_sentiment_label(sentiment_score)
-                sentiment_color = get_sentiment_color(sentiment_score)
+    @panel_fragment(run_every=refresh_intervals['overview'])
+    def overview_metrics():
+        """Per-stock price and sentiment metrics"""
+        # Create columns for each stock
+        cols = st.columns(len(selected_tickers))
+        
+        for idx, ticker in enumerate(selected_tickers):
+            with cols[idx]:
+                # Get stock info - FIXED: Add error handling
+                stock_info = collector.get_latest_stock_info(ticker)
                 
-                st.markdown(f"**Sentiment:** <span style='color:{sentiment_color}'>{sentiment_label} ({sentiment_score:.3f})</span>", unsafe_allow_html=True)
-                st.metric(label="Market Cap", value=format_large_number(stock_info.get('market_cap', 0)))
-                st.metric(label="Correlation", value=f"{summary['price_correlation']:.3f}")
-            else:
-                st.error(f"Unable to load data for {ticker}")
+                if stock_info and stock_info.get('current_price') is not None:
+                    # Get sentiment summary
+                    summary = panel('sentiment_summary', ticker=ticker)
+                    
+                    # Display metrics
+                    st.subheader(f"{stock_info.get('company_name', ticker)}")
+                    
+                    current_price = stock_info.get('current_price', 0)
+                    previous_close = stock_info.get('previous_close', current_price)
+                    
+                    st.metric(
+                        label="Current Price",
+                        value=f"${current_price:.2f}",
+                        delta=f"{calculate_price_change(current_price, previous_close):.2f}%"
+                    )
+                    
+                    sentiment_score = summary['latest_sentiment']
+                    sentiment_label = get_sentiment_label(sentiment_score)
+                    sentiment_color = get_sentiment_color(sentiment_score)
+                    
+                    st.markdown(f"**Sentiment:** <span style='color:{sentiment_color}'>{sentiment_label} ({sentiment_score:.3f})</span>", unsafe_allow_html=True)
+                    st.metric(label="Market Cap", value=format_large_number(stock_info.get('market_cap', 0)))
+                    st.metric(label="Correlation", value=f"{summary['price_correlation']:.3f}")
+                else:
+                    st.error(f"Unable to load data for {ticker}")
+    
+    overview_metrics()
     
     st.markdown("---")
     
     # Multi-stock comparison
     st.subheader("📊 Multi-Stock Comparison")
     
-    sentiment_summaries = {}
-    for ticker in selected_tickers:
-        summary = processor.get_sentiment_summary(sentiment_data, stock_data, ticker)
-        sentiment_summaries[ticker] = summary
-    
-    comparison_fig = visualizer.create_multi_stock_comparison(sentiment_summaries)
+    comparison_fig = panel('comparison_chart', tickers=selected_tickers)
     st.plotly_chart(comparison_fig, use_container_width=True)
     
+    # Biggest sentiment movers, ranked from the momentum vector
+    @panel_fragment(run_every=refresh_intervals['movers'])
+    def sentiment_movers():
+        """Momentum ranking, refreshed from the incrementally updated tracker"""
+        st.subheader("🚀 Biggest Sentiment Movers (24h)")
+        tracker = st.session_state['momentum_tracker']
+        movers = tracker.momentum_vector(window_hours=24).reindex(selected_tickers).fillna(0)
+        movers = movers.iloc[movers.abs().argsort()[::-1]]
+        movers_df = pd.DataFrame({
+            'Ticker': movers.index,
+            'Momentum (%)': [f"{m:+.1f}" for m in movers.values]
+        })
+        st.dataframe(movers_df, use_container_width=True, hide_index=True)
+    
+    sentiment_movers()
+    
     # Correlation heatmap
     st.subheader("🔥 Sentiment-Price Correlation Heatmap")
-    correlation_data = {ticker: sentiment_summaries[ticker] for ticker in selected_tickers}
-    heatmap_fig = visualizer.create_correlation_heatmap(correlation_data)
+    heatmap_fig = panel('correlation_heatmap', tickers=selected_tickers)
     st.plotly_chart(heatmap_fig, use_container_width=True)
 
 # Tab 2: Detailed Analysis
-with tab2:
+def render_detailed_analysis():
+    """Single-stock detail tab"""
     st.header("Detailed Stock Analysis")
     
     # Stock selector for detailed view
@@ -233,15 +494,14 @@ with tab2:
     
     if selected_stock:
         # Get data for selected stock
-        summary = processor.get_sentiment_summary(sentiment_data, stock_data, selected_stock)
-        merged_data = summary['merged_data']
+        summary = panel('sentiment_summary', ticker=selected_stock)
         
         # Sentiment gauge
         col1, col2 = st.columns([1, 2])
         
         with col1:
             st.subheader("Current Sentiment")
-            gauge_fig = visualizer.create_sentiment_gauge(summary['latest_sentiment'], selected_stock)
+            gauge_fig = panel('sentiment_gauge', ticker=selected_stock)
             st.plotly_chart(gauge_fig, use_container_width=True)
             
             # Key metrics
@@ -251,7 +511,14 @@ with tab2:
             st.metric("Price Correlation", f"{summary['price_correlation']:.3f}")
             st.metric("Leading Correlation", f"{summary['leading_correlation']:.3f}")
             
-            if summary['p_value'] < 0.05:
+            stock_significance = panel('significance', tickers=selected_tickers)[selected_stock]
+            st.metric("Empirical P-Value", f"{stock_significance['empirical_p_value']:.4f}")
+            st.caption(
+                f"95% CI: [{stock_significance['ci_low']:.3f}, {stock_significance['ci_high']:.3f}] "
+                f"from {stock_significance['n_permutations']} circular-shift permutations"
+            )
+            
+            if stock_significance['empirical_p_value'] < 0.05:
                 st.success("✅ Statistically significant correlation")
             else:
                 st.info("ℹ️ Correlation not statistically significant")
@@ -259,7 +526,7 @@ with tab2:
         with col2:
             # Sentiment vs Price chart
             st.subheader("Sentiment vs Price Movement")
-            sentiment_price_fig = visualizer.create_sentiment_vs_price_chart(merged_data, selected_stock)
+            sentiment_price_fig = panel('sentiment_vs_price', ticker=selected_stock)
             st.plotly_chart(sentiment_price_fig, use_container_width=True)
         
         # Additional charts
@@ -267,21 +534,34 @@ with tab2:
         
         with col3:
             st.subheader("Volume of Mentions")
-            volume_fig = visualizer.create_mention_volume_chart(sentiment_data, selected_stock)
+            volume_fig = panel('mention_volume', ticker=selected_stock)
             st.plotly_chart(volume_fig, use_container_width=True)
         
         with col4:
             st.subheader("Sentiment Distribution")
-            pie_fig = visualizer.create_sentiment_distribution_pie(sentiment_data, selected_stock)
+            pie_fig = panel('sentiment_distribution', ticker=selected_stock)
             st.plotly_chart(pie_fig, use_container_width=True)
         
+        # Sentiment by source, rolled up from the cube
+        st.subheader("Sentiment by Source")
+        source_breakdown = panel('source_breakdown', ticker=selected_stock)
+        source_table = pd.DataFrame({
+            'Source': source_breakdown['source'],
+            'Mentions': source_breakdown['count'].astype(int),
+            'Avg Sentiment': source_breakdown['avg_sentiment'].map(lambda v: f"{v:.3f}"),
+            'Positive': source_breakdown['positive_count'].astype(int),
+            'Negative': source_breakdown['negative_count'].astype(int)
+        })
+        st.dataframe(source_table[source_table['Mentions'] > 0], use_container_width=True)
+        
         # Candlestick chart
         st.subheader("Price Movement (Candlestick)")
-        candlestick_fig = visualizer.create_candlestick_chart(stock_data, selected_stock)
+        candlestick_fig = panel('candlestick', ticker=selected_stock)
         st.plotly_chart(candlestick_fig, use_container_width=True)
 
 # Tab 3: Correlation Analysis
-with tab3:
+def render_correlation():
+    """Correlation, causality and backtest tab"""
     st.header("Correlation Analysis")
     
     st.markdown("""
@@ -291,12 +571,15 @@ with tab3:
     - **Positive correlation**: Sentiment and price move in the same direction
     - **Negative correlation**: Sentiment and price move in opposite directions
     - **Leading correlation**: Sentiment predicts future price movement
+    - **Empirical p-value**: Share of circular-shift permutations with a correlation at least as strong,
+      which stays reliable for autocorrelated hourly series
     """)
     
     # Create correlation summary table
+    significance = panel('significance', tickers=selected_tickers)
     correlation_summary = []
     for ticker in selected_tickers:
-        summary = processor.get_sentiment_summary(sentiment_data, stock_data, ticker)
+        summary = panel('sentiment_summary', ticker=ticker)
         correlation_summary.append({
             'Ticker': ticker,
             'Avg Sentiment': f"{summary['avg_sentiment']:.3f}",
@@ -304,7 +587,9 @@ with tab3:
             'Leading Correlation (1h)': f"{summary['leading_correlation']:.3f}",
             'Sentiment Volatility': f"{summary['sentiment_volatility']:.3f}",
             'P-Value': f"{summary['p_value']:.4f}",
-            'Significant': '✅' if summary['p_value'] < 0.05 else '❌'
+            'Empirical P-Value': f"{significance[ticker]['empirical_p_value']:.4f}",
+            '95% CI': f"[{significance[ticker]['ci_low']:.3f}, {significance[ticker]['ci_high']:.3f}]",
+            'Significant': '✅' if significance[ticker]['empirical_p_value'] < 0.05 else '❌'
         })
     
     correlation_df = pd.DataFrame(correlation_summary)
@@ -312,13 +597,56 @@ with tab3:
     
     st.markdown("---")
     
+    # Granger-causality screen over lags 1-24h
+    st.subheader("🧭 Granger Causality Screen (Sentiment → Returns)")
+    st.caption("Best lag per stock across lags 1-24h; p-values are Bonferroni-adjusted for the number of lags tested.")
+    granger_best = processor.summarize_granger_screen(panel('granger_screen', tickers=selected_tickers))
+    if granger_best.empty:
+        st.info("ℹ️ Not enough price history for a Granger screen")
+    else:
+        granger_df = pd.DataFrame({
+            'Ticker': granger_best['ticker'],
+            'Best Lag (h)': granger_best['best_lag'],
+            'F-Statistic': granger_best['f_stat'].map(lambda v: f"{v:.3f}"),
+            'P-Value': granger_best['p_value'].map(lambda v: f"{v:.4f}"),
+            'Adjusted P-Value': granger_best['p_value_adjusted'].map(lambda v: f"{v:.4f}"),
+            'Significant': granger_best['significant'].map(lambda v: '✅' if v else '❌')
+        })
+        st.dataframe(granger_df, use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
+    # Sentiment strategy backtest over the default parameter grid
+    st.subheader("💹 Sentiment Strategy Backtest")
+    st.caption(
+        "Best of threshold, momentum and spike rules per stock across thresholds, holding periods and lags, "
+        "after transaction costs. In-sample results; not a trading recommendation."
+    )
+    backtest_best = backtester.best_by_ticker(panel('backtest', tickers=selected_tickers))
+    if backtest_best.empty:
+        st.info("ℹ️ Not enough price history to backtest")
+    else:
+        backtest_df = pd.DataFrame({
+            'Ticker': backtest_best['ticker'],
+            'Strategy': backtest_best['strategy'],
+            'Threshold': backtest_best['threshold'],
+            'Holding (h)': backtest_best['holding_period'],
+            'Lag (h)': backtest_best['lag'],
+            'Total PnL': backtest_best['total_pnl'].map(lambda v: f"{v:+.2%}"),
+            'Sharpe': backtest_best['sharpe'].map(lambda v: f"{v:.2f}"),
+            'Turnover': backtest_best['turnover'].map(lambda v: f"{v:.3f}")
+        })
+        st.dataframe(backtest_df, use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
     # Sentiment spikes detection
     st.subheader("🚨 Sentiment Anomalies & Spikes")
     
     selected_spike_stock = st.selectbox("Select stock for anomaly detection:", selected_tickers, key='spike_stock')
     
     if selected_spike_stock:
-        spikes = processor.detect_sentiment_spikes(sentiment_data, selected_spike_stock, threshold=2.0)
+        spikes = panel('sentiment_spikes', ticker=selected_spike_stock)
         
         if spikes:
             st.warning(f"⚠️ Detected {len(spikes)} sentiment anomalies for {selected_spike_stock}")
@@ -330,63 +658,155 @@ with tab3:
             st.success(f"✅ No significant sentiment anomalies detected for {selected_spike_stock}")
 
 # Tab 4: Top Mentions
-with tab4:
+def render_top_mentions():
+    """Top mentions tab"""
     st.header("💬 Top Mentions")
     
-    selected_mention_stock = st.selectbox("Select stock:", selected_tickers, key='mention_stock')
-    
-    if selected_mention_stock:
-        col1, col2 = st.columns(2)
+    @panel_fragment(run_every=refresh_intervals['mentions'])
+    def top_mentions():
+        """Top positive and negative posts from the incrementally updated index"""
+        selected_mention_stock = st.selectbox("Select stock:", selected_tickers, key='mention_stock')
         
-        with col1:
-            st.subheader("🟢 Top Positive Mentions")
-            positive_mentions = analyzer.get_top_mentions(sentiment_data, selected_mention_stock, top_n=10, sentiment_type='positive')
+        if selected_mention_stock:
+            col1, col2 = st.columns(2)
             
-            if positive_mentions:
-                for mention in positive_mentions:
-                    timestamp = pd.to_datetime(mention['timestamp']).strftime('%Y-%m-%d %H:%M')
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <strong>{mention['source']}</strong> - {timestamp}<br>
-                        <span class="positive-sentiment">Score: {mention['sentiment_score']:.3f}</span><br>
-                        "{mention['text']}"
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.markdown("<br>", unsafe_allow_html=True)
-            else:
-                st.info("No positive mentions found")
-        
-        with col2:
-            st.subheader("🔴 Top Negative Mentions")
-            negative_mentions = analyzer.get_top_mentions(sentiment_data, selected_mention_stock, top_n=10, sentiment_type='negative')
+            with col1:
+                st.subheader("🟢 Top Positive Mentions")
+                positive_mentions = analyzer.get_top_mentions(st.session_state['sentiment_data'], selected_mention_stock, top_n=10, sentiment_type='positive', index=st.session_state['mention_index'])
+                
+                if positive_mentions:
+                    for mention in positive_mentions:
+                        timestamp = pd.to_datetime(mention['timestamp']).strftime('%Y-%m-%d %H:%M')
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <strong>{mention['source']}</strong> - {timestamp}<br>
+                            <span class="positive-sentiment">Score: {mention['sentiment_score']:.3f}</span><br>
+                            "{mention['text']}"
+                        </div>
+                        """, unsafe_allow_html=True)
+                        st.markdown("<br>", unsafe_allow_html=True)
+                else:
+                    st.info("No positive mentions found")
             
-            if negative_mentions:
-                for mention in negative_mentions:
-                    timestamp = pd.to_datetime(mention['timestamp']).strftime('%Y-%m-%d %H:%M')
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <strong>{mention['source']}</strong> - {timestamp}<br>
-                        <span class="negative-sentiment">Score: {mention['sentiment_score']:.3f}</span><br>
-                        "{mention['text']}"
-                    </div>
-                    """, unsafe_allow_html=True)
-                    st.markdown("<br>", unsafe_allow_html=True)
-            else:
-                st.info("No negative mentions found")
+            with col2:
+                st.subheader("🔴 Top Negative Mentions")
+                negative_mentions = analyzer.get_top_mentions(st.session_state['sentiment_data'], selected_mention_stock, top_n=10, sentiment_type='negative', index=st.session_state['mention_index'])
+                
+                if negative_mentions:
+                    for mention in negative_mentions:
+                        timestamp = pd.to_datetime(mention['timestamp']).strftime('%Y-%m-%d %H:%M')
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <strong>{mention['source']}</strong> - {timestamp}<br>
+                            <span class="negative-sentiment">Score: {mention['sentiment_score']:.3f}</span><br>
+                            "{mention['text']}"
+                        </div>
+                        """, unsafe_allow_html=True)
+                        st.markdown("<br>", unsafe_allow_html=True)
+                else:
+                    st.info("No negative mentions found")
+    
+    top_mentions()
 
-# Auto-refresh logic - FIXED: Use experimental_rerun for compatibility
-if auto_refresh:
-    time.sleep(300)  # Wait 5 minutes
-    if hasattr(st, 'rerun'):
-        st.rerun()
+# Tab layout - only the selected tab runs; hidden tabs are recorded as skipped
+tab_layout = [
+    ("📊 Overview", render_overview, ['sentiment_summary', 'comparison_chart', 'correlation_heatmap']),
+    ("📈 Detailed Analysis", render_detailed_analysis, ['sentiment_gauge', 'sentiment_vs_price', 'significance',
+                                                        'mention_volume', 'sentiment_distribution', 'candlestick']),
+    ("🔍 Correlation", render_correlation, ['significance', 'granger_screen', 'backtest', 'sentiment_spikes']),
+    ("💬 Top Mentions", render_top_mentions, [])
+]
+tab_labels = [label for label, _, _ in tab_layout]
+try:
+    tabs = st.tabs(tab_labels, key='active_tab', on_change='rerun')
+except TypeError:
+    # Older Streamlit versions render every tab
+    tabs = st.tabs(tab_labels)
+
+for tab, (label, render, panels) in zip(tabs, tab_layout):
+    if getattr(tab, 'open', None) is False:
+        panel_registry.skip(*panels)
+        continue
+    with tab:
+        render()
+
+# Rerun latency breakdown
+with st.sidebar.expander("⏱️ Rerun Latency"):
+    breakdown = panel_registry.latency_breakdown()
+    st.metric("Script run", f"{(time.perf_counter() - run_started) * 1000:.0f} ms")
+    st.caption(f"Panels: {breakdown['ms'].sum():.0f} ms computing, ~{breakdown['saved_ms'].sum():.0f} ms saved by cache")
+    st.dataframe(
+        breakdown.assign(ms=breakdown['ms'].round(1), saved_ms=breakdown['saved_ms'].round(1)),
+        use_container_width=True, hide_index=True
+    )
+
+# Hot-path metrics, shared by every session in the process
+with st.sidebar.expander("📊 Performance"):
+    recording = st.checkbox("Record metrics", value=metrics.is_enabled(), key='metrics_enabled')
+    if recording != metrics.is_enabled():
+        metrics.enable(recording)
+    stage_rows, cache_counters = metrics.snapshot()
+    if stage_rows:
+        stage_table = pd.DataFrame(stage_rows).sort_values('total_ms', ascending=False)
+        st.dataframe(
+            stage_table.round({'total_ms': 1, 'mean_ms': 2, 'p50_ms': 2, 'p95_ms': 2}),
+            use_container_width=True, hide_index=True
+        )
     else:
-        st.experimental_rerun()
+        st.caption("No calls recorded yet")
+    for cache, counters in sorted(cache_counters.items()):
+        st.caption(f"{cache} cache: {counters['hit_rate']:.0%} hits ({counters['hits']} of {counters['hits'] + counters['misses']})")
+    if sentiment_pipeline is not None:
+        pipeline_rows, pipeline_summary = sentiment_pipeline.stats()
+        lag = pipeline_summary['lag_p50_ms']
+        st.caption(f"Pipeline: {pipeline_summary['alive']} worker processes, "
+                   f"collection to publish p50 {lag:.0f} ms" if lag is not None else "Pipeline: waiting for posts")
+        st.dataframe(
+            pd.DataFrame(pipeline_rows)[['stage', 'workers', 'records_out', 'per_s', 'capacity_per_s', 'busy_pct', 'blocked_s', 'queued']]
+            .round({'per_s': 1, 'capacity_per_s': 0, 'busy_pct': 1, 'blocked_s': 2}),
+            use_container_width=True, hide_index=True
+        )
+    if st.button("Reset metrics"):
+        metrics.reset()
+    if os.environ.get('SENTIMENT_METRICS_PORT'):
+        st.caption(f"Prometheus: http://127.0.0.1:{os.environ['SENTIMENT_METRICS_PORT']}/metrics")
+
+# Memory held by this session and the process, against the configured budget
+memory_ledger.end_run()
+memory_actions = memory_budget.enforce()
+with st.sidebar.expander("🧠 Memory"):
+    session_rows, memory_totals = memory_budget.usage()
+    session_mb = sum(memory_ledger.account().values()) / 1e6
+    st.metric("This session", f"{session_mb:.1f} MB")
+    st.metric(
+        "Process (accounted)", f"{memory_totals['total_bytes'] / 1e6:.1f} MB",
+        delta=f"{memory_totals['total_bytes'] / memory_totals['limit_bytes']:.0%} of {memory_totals['limit_bytes'] / 1e6:.0f} MB budget",
+        delta_color='off'
+    )
+    if memory_totals['rss_bytes'] is not None:
+        st.caption(f"Process RSS: {memory_totals['rss_bytes'] / 1e6:.0f} MB, shared hub data: {memory_totals['hub_bytes'] / 1e6:.1f} MB")
+    if session_rows:
+        session_table = pd.DataFrame(session_rows)
+        size_columns = [column for column in session_table.columns if column not in ('session', 'idle_s')]
+        session_table[size_columns] = (session_table[size_columns] / 1e6).round(2)
+        st.caption(f"{memory_totals['sessions']} sessions, least recently used first (MB)")
+        st.dataframe(session_table.round({'idle_s': 0}), use_container_width=True, hide_index=True)
+    for action in memory_actions:
+        st.caption(f"Over budget: {action['action']} in session {action['session']} ({action['bytes'] / 1e6:.1f} MB)")
+    if st.button("Tracemalloc snapshot"):
+        top_allocations = memory_budget.tracemalloc_snapshot()
+        if top_allocations is None:
+            st.caption("Tracing started; take another snapshot to see allocations made since")
+        else:
+            st.dataframe(pd.DataFrame(top_allocations).round({'size_mb': 2}), use_container_width=True, hide_index=True)
 
 # Footer
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666;'>
-    <p>Real-time Stock Market Sentiment Analyzer | Data updates every 5 minutes</p>
+    <p>Real-time Stock Market Sentiment Analyzer | Panels refresh incrementally while auto-refresh is on</p>
     <p>⚠️ This is a demo using simulated sentiment data. Not for actual trading decisions.</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_profile()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Benchmark Cases
+Seeded offline fixtures and the timed calls for collector, analyzer, processor and visualizations
+"""
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from modules.data_collector import DataCollector
+from modules.sentiment_analyzer import SentimentAnalyzer
+from modules.data_processor import DataProcessor
+from modules.visualizations import Visualizations
+
+# name: (tickers, posts across all tickers)
+SCALES = {
+    'small': (5, 1_000),
+    'medium': (50, 100_000),
+    'large': (500, 10_000_000)
+}
+
+NUM_DAYS = 7
+BASE_TICKERS = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+TEMPLATES = {
+    'positive': ["${} looking strong! 🚀", "Bullish on ${}", "${} to the moon!", "Great earnings from ${}", "${} is my top pick"],
+    'negative': ["${} overvalued", "Bearish on ${}", "${} might drop", "Selling my ${} position", "${} concerns me"],
+    'neutral': ["Watching ${}", "${} holding steady", "Thoughts on ${}?", "${} analysis needed", "${} sideways movement"]
+}
+
+
+def ticker_names(num_tickers):
+    return BASE_TICKERS[:num_tickers] + [f'T{i:03d}' for i in range(len(BASE_TICKERS), num_tickers)]
+
+
+def make_bars(tickers, num_days=NUM_DAYS, seed=0, end=None):
+    """
+    Hourly market-hours bars shaped like DataCollector's simulated bars
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2024, 1, 12, 17)
+    hours = pd.date_range(end - timedelta(days=num_days), end, freq='1h')
+    hours = hours[(hours.weekday < 5) & (hours.hour >= 9) & (hours.hour <= 16)]
+    
+    n = len(hours)
+    close = 100.0 * np.cumprod(1 + rng.normal(0.001, 0.01, size=(len(tickers), n)), axis=1)
+    spread = close * 0.005
+    open_ = close + rng.normal(0, 1, close.shape) * spread
+    bars = pd.DataFrame({
+        'Datetime': np.tile(hours.to_pydatetime(), len(tickers)),
+        'Open': open_.ravel(),
+        'High': (np.maximum(close, open_) + np.abs(rng.normal(0, 1, close.shape)) * spread).ravel(),
+        'Low': (np.minimum(close, open_) - np.abs(rng.normal(0, 1, close.shape)) * spread).ravel(),
+        'Close': close.ravel(),
+        'Volume': rng.integers(1_000_000, 10_000_000, size=close.size),
+        'Ticker': np.repeat(tickers, n)
+    })
+    bars['Datetime'] = pd.to_datetime(bars['Datetime'])
+    return bars
+
+
+def make_posts(tickers, num_posts, num_days=NUM_DAYS, seed=0, end=None):
+    """
+    Posts shaped like DataCollector's simulated sentiment, built without per-row Python
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2024, 1, 12, 17)
+    start = np.datetime64(end - timedelta(days=num_days), 's')
+    offsets = rng.integers(0, num_days * 86400, size=num_posts).astype('timedelta64[s]')
+    scores = np.clip(rng.normal(0.1, 0.45, size=num_posts), -1, 1)
+    ticker_index = rng.integers(0, len(tickers), size=num_posts)
+    
+    labels = np.where(scores > 0.2, 'positive', np.where(scores < -0.2, 'negative', 'neutral'))
+    template_index = rng.integers(0, 5, size=num_posts)
+    names = np.asarray(tickers, dtype=object)[ticker_index]
+    texts = [TEMPLATES[label][i].format(name) for label, i, name in zip(labels, template_index, names)]
+    
+    posts = pd.DataFrame({
+        'timestamp': pd.to_datetime(start + offsets),
+        'ticker': names,
+        'sentiment_score': scores,
+        'text': texts,
+        'source': np.asarray(['Twitter', 'Reddit', 'News'], dtype=object)[rng.integers(0, 3, size=num_posts)],
+        'confidence': np.abs(scores)
+    })
+    return posts.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+class Fixture:
+    """
+    Dataset for one scale, built once and shared by every case at that scale
+    """
+    
+    def __init__(self, scale, seed=0):
+        self.scale = scale
+        num_tickers, num_posts = SCALES[scale]
+        self.tickers = ticker_names(num_tickers)
+        self.ticker = self.tickers[0]
+        self.posts_per_ticker = max(num_posts // num_tickers, 1)
+        self.stock_data = make_bars(self.tickers, seed=seed)
+        self.sentiment_data = make_posts(self.tickers, num_posts, seed=seed)
+        
+        self.collector = DataCollector()
+        self.analyzer = SentimentAnalyzer()
+        self.processor = DataProcessor()
+        self.visualizer = Visualizations()
+        
+        # One ticker's slice, as passed to per-ticker calls in the app
+        self.ticker_posts = self.sentiment_data[self.sentiment_data['ticker'] == self.ticker]
+        self.texts = self.ticker_posts['text'].tolist()
+        self.merged = self.processor.merge_stock_and_sentiment(self.stock_data, self.sentiment_data, self.ticker)
+        rng = np.random.default_rng(seed)
+        self.summaries = {
+            t: {'avg_sentiment': s, 'price_correlation': c}
+            for t, s, c in zip(self.tickers, rng.uniform(-1, 1, len(self.tickers)), rng.uniform(-1, 1, len(self.tickers)))
+        }
+
+
+def build_cases():
+    """
+    Benchmark name -> (call(fixture), rows processed)
+    Per-ticker work is measured on the first ticker's share of the posts;
+    calls that filter the full frame get the full frame, as in the app
+    """
+    return {
+        'collector.generate_simulated_sentiment_data': (
+            lambda f: f.collector.generate_simulated_sentiment_data(
+                f.ticker, num_days=NUM_DAYS, posts_per_day=max(f.posts_per_ticker // NUM_DAYS, 1)),
+            lambda f: max(f.posts_per_ticker // NUM_DAYS, 1) * NUM_DAYS
+        ),
+        'analyzer.analyze_batch': (
+            lambda f: f.analyzer.analyze_batch(f.texts),
+            lambda f: len(f.texts)
+        ),
+        'processor.merge_stock_and_sentiment': (
+            lambda f: f.processor.merge_stock_and_sentiment(f.stock_data, f.sentiment_data, f.ticker),
+            lambda f: len(f.sentiment_data)
+        ),
+        'processor.get_sentiment_summary': (
+            lambda f: f.processor.get_sentiment_summary(f.sentiment_data, f.stock_data, f.ticker),
+            lambda f: len(f.sentiment_data)
+        ),
+        'processor.detect_sentiment_spikes': (
+            lambda f: f.processor.detect_sentiment_spikes(f.sentiment_data, f.ticker),
+            lambda f: len(f.sentiment_data)
+        ),
+        'visualizations.create_sentiment_gauge': (
+            lambda f: f.visualizer.create_sentiment_gauge(0.35, f.ticker),
+            lambda f: 1
+        ),
+        'visualizations.create_sentiment_vs_price_chart': (
+            lambda f: f.visualizer.create_sentiment_vs_price_chart(f.merged, f.ticker),
+            lambda f: len(f.merged)
+        ),
+        'visualizations.create_mention_volume_chart': (
+            lambda f: f.visualizer.create_mention_volume_chart(f.sentiment_data, f.ticker),
+            lambda f: len(f.sentiment_data)
+        ),
+        'visualizations.create_sentiment_distribution_pie': (
+            lambda f: f.visualizer.create_sentiment_distribution_pie(f.sentiment_data, f.ticker),
+            lambda f: len(f.sentiment_data)
+        ),
+        'visualizations.create_correlation_heatmap': (
+            lambda f: f.visualizer.create_correlation_heatmap(f.summaries),
+            lambda f: len(f.summaries)
+        ),
+        'visualizations.create_candlestick_chart': (
+            lambda f: f.visualizer.create_candlestick_chart(f.stock_data, f.ticker),
+            lambda f: len(f.stock_data)
+        ),
+        'visualizations.create_multi_stock_comparison': (
+            lambda f: f.visualizer.create_multi_stock_comparison(f.summaries),
+            lambda f: len(f.summaries)
+        )
+    }
\ No newline at end of file
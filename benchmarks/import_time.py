@@ -0,0 +1,137 @@
+"""
+Startup Import-Time Report
+Measures the dashboard's cold start with python -X importtime and writes a per-module report
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Everything app.py imports and builds before its first render
+STARTUP_CODE = """
+import streamlit
+from modules.data_collector import DataCollector
+from modules.sentiment_analyzer import SentimentAnalyzer
+from modules.data_processor import DataProcessor
+from modules.visualizations import Visualizations
+from modules.backtester import SentimentBacktester
+from modules.data_hub import DataHub
+from modules.panel_registry import PanelRegistry
+from utils.helpers import get_sentiment_color
+collector = DataCollector()
+analyzer = SentimentAnalyzer()
+processor = DataProcessor()
+visualizer = Visualizations()
+backtester = SentimentBacktester()
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(root, runs):
+    """
+    Median wall time and per-module cumulative import time over fresh interpreters
+    """
+    wall = []
+    modules = {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', STARTUP_CODE],
+            cwd=root, capture_output=True, text=True
+        )
+        wall.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"Startup failed in {root}:\n{result.stderr[-2000:]}")
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                depth = (len(match.group(3)) - 1) // 2
+                entry = modules.setdefault(match.group(4), {'depth': depth, 'self_us': [], 'cumulative_us': []})
+                entry['self_us'].append(int(match.group(1)))
+                entry['cumulative_us'].append(int(match.group(2)))
+    
+    per_module = {
+        name: {
+            'depth': entry['depth'],
+            'self_ms': statistics.median(entry['self_us']) / 1000,
+            'cumulative_ms': statistics.median(entry['cumulative_us']) / 1000
+        }
+        for name, entry in modules.items()
+    }
+    return {'wall_ms': statistics.median(wall) * 1000, 'modules': per_module}
+
+
+def top_level(result, limit):
+    """
+    Slowest modules imported directly by the startup code
+    """
+    rows = [(name, m) for name, m in result['modules'].items() if m['depth'] == 0]
+    return sorted(rows, key=lambda row: row[1]['cumulative_ms'], reverse=True)[:limit]
+
+
+def write_report(path, current, baseline, runs, limit):
+    lines = [
+        '# Startup import-time report',
+        '',
+        f'Generated by `python benchmarks/import_time.py` (median of {runs} fresh interpreters, '
+        f'Python {sys.version.split()[0]}).',
+        'Each run imports what `app.py` imports and builds its components, without starting Streamlit\'s server.',
+        ''
+    ]
+    if baseline is not None:
+        lines += [
+            '| | Baseline | Current | Speed-up |',
+            '|---|---:|---:|---:|',
+            f"| Cold start (wall) | {baseline['wall_ms']:.0f} ms | {current['wall_ms']:.0f} ms | "
+            f"{baseline['wall_ms'] / current['wall_ms']:.2f}x |",
+            ''
+        ]
+    else:
+        lines += [f"Cold start (wall): {current['wall_ms']:.0f} ms", '']
+    
+    names = [name for name, _ in top_level(current, limit)]
+    if baseline is not None:
+        names += [name for name, _ in top_level(baseline, limit) if name not in names]
+    lines += [
+        '## Top-level imports (cumulative ms)',
+        '',
+        '| Module | Baseline | Current |' if baseline is not None else '| Module | Current |',
+        '|---|---:|---:|' if baseline is not None else '|---|---:|'
+    ]
+    for name in names:
+        now = current['modules'].get(name, {}).get('cumulative_ms')
+        now_text = f'{now:.1f}' if now is not None else 'deferred'
+        if baseline is not None:
+            before = baseline['modules'].get(name, {}).get('cumulative_ms')
+            lines.append(f"| `{name}` | {f'{before:.1f}' if before is not None else '-'} | {now_text} |")
+        else:
+            lines.append(f'| `{name}` | {now_text} |')
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import-time report")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=15, help="Modules listed in the report")
+    parser.add_argument('--baseline-root', help="Another checkout to measure for comparison")
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'import_time.md'))
+    args = parser.parse_args()
+    
+    baseline = measure(args.baseline_root, args.runs) if args.baseline_root else None
+    current = measure(ROOT_DIR, args.runs)
+    write_report(args.output, current, baseline, args.runs, args.limit)
+    print(f"Cold start: {current['wall_ms']:.0f} ms"
+          + (f" (baseline {baseline['wall_ms']:.0f} ms)" if baseline is not None else ''))
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
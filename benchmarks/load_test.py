@@ -0,0 +1,224 @@
+"""
+Load Test
+Simulates concurrent dashboard sessions against a stub market-data server and reports rerun latency
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.stub_market import create_stub_server, start_in_thread
+
+APP_PATH = os.path.join(ROOT_DIR, 'app.py')
+TICKERS = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+TAB_LABELS = ["📊 Overview", "📈 Detailed Analysis", "🔍 Correlation", "💬 Top Mentions"]
+
+# Relative frequency of each user action after the first page load
+ACTION_WEIGHTS = {'switch_tab': 6, 'change_days': 1, 'change_tickers': 1, 'refresh': 1}
+
+
+def share_apptest_runtime():
+    """
+    Let concurrent AppTest runs share one mock runtime
+    AppTest installs a process-global mock Runtime for each run and clears it
+    when the run ends, which would pull it from under sessions still running;
+    the last one installed is kept available instead.
+    """
+    from streamlit.runtime import Runtime
+    if getattr(Runtime, '_load_test_shared', False):
+        return
+    last = {}
+    
+    def instance(cls):
+        if cls._instance is not None:
+            last['runtime'] = cls._instance
+        if 'runtime' not in last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last['runtime']
+    
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or 'runtime' in last)
+    Runtime._load_test_shared = True
+
+
+class SimulatedSession:
+    """
+    One dashboard user: an AppTest script runner driven through a random walk of actions.
+    All sessions run in this process, as they do in a Streamlit server, so
+    they share the cached data hub and contend for the same interpreter.
+    """
+    
+    def __init__(self, session_id, actions, think_seconds, seed, timeout=600):
+        self.session_id = session_id
+        self.actions = actions
+        self.think_seconds = think_seconds
+        self.rng = random.Random(seed * 1000 + session_id)
+        self.timeout = timeout
+        self.samples = []
+    
+    def _timed(self, action, app):
+        started = time.perf_counter()
+        try:
+            app.run(timeout=self.timeout)
+            error = '; '.join(str(e.value) for e in app.exception) or None
+        except Exception as e:
+            error = str(e)
+        self.samples.append({
+            'session': self.session_id,
+            'action': action,
+            'seconds': time.perf_counter() - started,
+            'error': error
+        })
+    
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+        app = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        self._timed('load', app)
+        names, weights = zip(*ACTION_WEIGHTS.items())
+        for _ in range(self.actions):
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_seconds)
+            action = self.rng.choices(names, weights)[0]
+            try:
+                if action == 'switch_tab':
+                    app.session_state['active_tab'] = self.rng.choice(TAB_LABELS)
+                elif action == 'change_days':
+                    app.slider[0].set_value(self.rng.choice([3, 5, 7, 14]))
+                elif action == 'change_tickers':
+                    app.multiselect[0].set_value(sorted(self.rng.sample(TICKERS, self.rng.randint(2, 5))))
+                else:
+                    next(b for b in app.button if b.label == "🔄 Refresh Data").click()
+            except (IndexError, StopIteration):
+                # The previous run failed before the widget was drawn; reload instead
+                action = 'load'
+            self._timed(action, app)
+
+
+def percentile_table(samples):
+    """
+    Count, p50, p99 and max latency (ms) per action and overall
+    """
+    table = {}
+    groups = {'all': samples}
+    for sample in samples:
+        groups.setdefault(sample['action'], []).append(sample)
+    for action, group in groups.items():
+        seconds = np.array([s['seconds'] for s in group])
+        table[action] = {
+            'count': len(group),
+            'errors': sum(1 for s in group if s['error']),
+            'p50_ms': float(np.percentile(seconds, 50) * 1000),
+            'p99_ms': float(np.percentile(seconds, 99) * 1000),
+            'max_ms': float(seconds.max() * 1000)
+        }
+    return table
+
+
+def provider_stats(server, market_url):
+    if server is not None:
+        return server.stats()
+    from urllib.request import urlopen
+    with urlopen(market_url.rstrip('/') + '/__stats', timeout=10) as response:
+        return json.loads(response.read())
+
+
+def run_load_test(sessions, actions, think_seconds, seed, market_url=None, stub_options=None):
+    """
+    Run the sessions concurrently and return the report dict
+    """
+    server = None
+    if market_url is None:
+        server = create_stub_server(seed=seed, **(stub_options or {}))
+        start_in_thread(server)
+        market_url = server.url
+    # Read by DataCollector when the app first builds its components
+    os.environ['MARKET_DATA_URL'] = market_url
+    share_apptest_runtime()
+    
+    # One untimed session fills the shared hub, as on a server that has been up for a while
+    print(f"Warming up against {market_url}...")
+    warm_up = SimulatedSession(-1, 0, 0, seed)
+    warm_up.run()
+    warm_up_requests = provider_stats(server, market_url)
+    if server is not None:
+        server.reset_stats()
+    
+    print(f"Running {sessions} sessions x {actions} actions (think time ~{think_seconds:g}s)...")
+    simulated = [SimulatedSession(i, actions, think_seconds, seed) for i in range(sessions)]
+    threads = [threading.Thread(target=session.run, name=f'session-{i}') for i, session in enumerate(simulated)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    samples = [sample for session in simulated for sample in session.samples]
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'sessions': sessions,
+        'actions_per_session': actions,
+        'think_seconds': think_seconds,
+        'seed': seed,
+        'stub': stub_options if server is not None else {'url': market_url},
+        'elapsed_s': elapsed,
+        'reruns': len(samples),
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency': percentile_table(samples),
+        'provider_requests': provider_stats(server, market_url),
+        'warm_up_provider_requests': warm_up_requests['total']
+    }
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions, {report['reruns']} reruns in {report['elapsed_s']:.1f}s "
+          f"= {report['throughput_rps']:.2f} reruns/s")
+    print(f"{'action':<16}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, row in sorted(report['latency'].items(), key=lambda item: item[0] != 'all'):
+        print(f"{action:<16}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10.0f}{row['p99_ms']:>10.0f}{row['max_ms']:>10.0f}")
+    provider = report['provider_requests']
+    print(f"Provider requests: {provider['total']} ({provider['requests']}, errors {provider['errors']}); "
+          f"{report['warm_up_provider_requests']} during warm-up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent dashboard session load test")
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--actions', type=int, default=10, help="Actions per session after the first load")
+    parser.add_argument('--think', type=float, default=1.0, help="Mean seconds between a session's actions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--market-url', help="Use an already running stub (benchmarks/stub_market.py)")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="In-process stub: delay per request")
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--replay', metavar='DIR', help="In-process stub: serve recorded responses")
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'load_test.json'))
+    args = parser.parse_args()
+    
+    warnings.filterwarnings('ignore')
+    stub_options = {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                    'error_rate': args.error_rate, 'replay_dir': args.replay}
+    report = run_load_test(args.sessions, args.actions, args.think, args.seed,
+                           market_url=args.market_url, stub_options=stub_options)
+    print_report(report)
+    
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {os.path.relpath(args.output, ROOT_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Pipeline Benchmark
+Scoring throughput and UI-thread latency with posts scored inline versus in pipeline worker processes
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from modules.data_collector import DataCollector
+from modules.data_hub import DataHub
+from modules.data_processor import DataProcessor
+from modules.market_data import SimulatedProvider
+from modules.pipeline import COLLECT_INTERVAL, SentimentPipeline
+from modules.sentiment_analyzer import SentimentAnalyzer
+
+TICKERS = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+
+
+def build_hub(seed, days):
+    hub = DataHub(DataCollector(provider=SimulatedProvider(seed=seed), seed=seed))
+    hub.ensure(TICKERS, days)
+    return hub
+
+
+def probe_ui(hub, days, seconds, interval=0.05):
+    """
+    Time what a dashboard rerun does on the UI thread: slice the hub and merge one ticker's series
+    """
+    processor = DataProcessor()
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        stock_data, sentiment_data = hub.view(TICKERS[:1], days)
+        processor.merge_stock_and_sentiment(stock_data, sentiment_data, TICKERS[0])
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+    return np.array(samples)
+
+
+def score_inline(hub, rate, stop, counts, flush_seconds=1.0):
+    """
+    The single-process baseline: simulate, VADER-score and publish posts on a thread beside the UI
+    """
+    collector = hub.collector
+    analyzer = SentimentAnalyzer()
+    pending = []
+    last = last_flush = time.time()
+    while not stop.wait(COLLECT_INTERVAL):
+        now = time.time()
+        elapsed, last = now - last, now
+        for ticker in TICKERS:
+            count = np.random.poisson(rate / len(TICKERS) * elapsed)
+            if count:
+                timestamps = pd.Timestamp(datetime.fromtimestamp(now)) - pd.to_timedelta(np.sort(np.random.uniform(0, elapsed, count))[::-1], unit='s')
+                posts = collector._simulate_posts(ticker, list(timestamps.to_pydatetime()))
+                scores = np.array([analyzer.analyze_sentiment(text)['compound'] for text in posts['text']])
+                pending.append(posts.assign(sentiment_score=scores, confidence=np.abs(scores)))
+                counts['scored'] += count
+        if pending and now - last_flush >= flush_seconds:
+            hub.ingest(None, pd.concat(pending, ignore_index=True))
+            pending = []
+            last_flush = now
+
+
+def summarize(mode, ui_ms, scored, seconds, extra=None):
+    row = {
+        'mode': mode,
+        'scored_per_s': scored / seconds,
+        'ui_p50_ms': float(np.percentile(ui_ms, 50)),
+        'ui_p99_ms': float(np.percentile(ui_ms, 99)),
+        'ui_max_ms': float(ui_ms.max())
+    }
+    row.update(extra or {})
+    return row
+
+
+def run_benchmark(rate, seconds, scorer_counts, days, seed):
+    results = []
+    hub = build_hub(seed, days)
+    results.append(summarize('idle', probe_ui(hub, days, seconds), 0, seconds))
+    
+    hub = build_hub(seed, days)
+    stop = threading.Event()
+    counts = {'scored': 0}
+    thread = threading.Thread(target=score_inline, args=(hub, rate, stop, counts), daemon=True)
+    thread.start()
+    ui_ms = probe_ui(hub, days, seconds)
+    stop.set()
+    thread.join()
+    results.append(summarize('inline', ui_ms, counts['scored'], seconds))
+    
+    for scorers in scorer_counts:
+        hub = build_hub(seed, days)
+        pipeline = SentimentPipeline(hub, tickers=TICKERS, scorers=scorers, rate=rate, seed=seed).start()
+        # Worker start-up (interpreter, imports, lexicon) is not part of the steady state
+        time.sleep(3)
+        before = pipeline.stats()[0][1]['records_out']
+        ui_ms = probe_ui(hub, days, seconds)
+        stage_rows, summary = pipeline.stats()
+        scored = stage_rows[1]['records_out'] - before
+        pipeline.stop()
+        results.append(summarize(f'pipeline x{scorers}', ui_ms, scored, seconds, {
+            'scorer_capacity_per_s': stage_rows[1]['capacity_per_s'],
+            'collector_blocked_s': stage_rows[0]['blocked_s'],
+            'lag_p50_ms': summary['lag_p50_ms'],
+            'lag_p99_ms': summary['lag_p99_ms']
+        }))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process sentiment pipeline benchmark")
+    parser.add_argument('--rate', type=float, default=20000.0, help="Posts per second offered to the scorers")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Measurement time per mode")
+    parser.add_argument('--scorers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--days', type=int, default=5, help="History held by the hub")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'pipeline.json'))
+    args = parser.parse_args()
+    
+    warnings.filterwarnings('ignore')
+    results = run_benchmark(args.rate, args.seconds, args.scorers, args.days, args.seed)
+    print(f"{'mode':<14}{'scored/s':>10}{'UI p50 ms':>11}{'UI p99 ms':>11}{'lag p50 ms':>12}")
+    for row in results:
+        lag = row.get('lag_p50_ms')
+        print(f"{row['mode']:<14}{row['scored_per_s']:>10.0f}{row['ui_p50_ms']:>11.1f}{row['ui_p99_ms']:>11.1f}"
+              f"{(f'{lag:.0f}' if lag is not None else '-'):>12}")
+    
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'cpus': os.cpu_count(), 'rate': args.rate, 'results': results}, f, indent=2)
+    print(f"Results written to {os.path.relpath(args.output, ROOT_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Replay
+Time-accelerated replay of recorded posts and bars through the data hub, reporting throughput and end-to-end lag
+"""
+import argparse
+import json
+import os
+import sys
+import warnings
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from modules.data_collector import DataCollector
+from modules.market_data import SimulatedProvider
+from modules.replay_engine import Burst, ReplayEngine
+from modules.segment_store import SegmentStore
+
+TICKERS = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+
+
+def generate_dataset(data_dir, tickers, days, posts_per_day, seed):
+    """
+    Write a seeded history of simulated bars and posts into data_dir/posts and data_dir/bars
+    """
+    posts_store = SegmentStore.for_posts(os.path.join(data_dir, 'posts'))
+    bars_store = SegmentStore.for_bars(os.path.join(data_dir, 'bars'))
+    held = posts_store.stats()['rows'] + bars_store.stats()['rows']
+    if held:
+        raise SystemExit(f"{data_dir} already holds {held} rows; pick an empty --data-dir to generate into")
+    
+    collector = DataCollector(provider=SimulatedProvider(seed=seed), seed=seed)
+    for ticker in tickers:
+        posts_store.append(collector.generate_simulated_sentiment_data(ticker, days, posts_per_day))
+        bars_store.append(collector.fetch_stock_data(ticker, period=f'{days}d'))
+    posts_store.flush()
+    bars_store.flush()
+    return posts_store.stats()['rows'], bars_store.stats()['rows']
+
+
+def parse_speed(value):
+    """
+    Replay speed: a multiple of real time, or 'max' for as fast as possible
+    """
+    return None if value.lower() in ('max', 'asap', 'inf') else float(value)
+
+
+def print_report(report):
+    speed = 'max' if report['speed'] is None else f"{report['speed']:g}x"
+    print(f"Replayed {report['posts']} posts ({report['burst_posts']} from bursts) and {report['bars']} bars "
+          f"spanning {report['event_span_s'] / 3600:.1f}h at {speed}")
+    print(f"  elapsed {report['elapsed_s']:.2f}s, achieved {report['achieved_speed']:.0f}x, "
+          f"{report['rows_per_s']:.0f} rows/s in {report['batches']} batches, max backlog {report['max_backlog_s']:.3f}s")
+    print(f"  ingest p50 {report['ingest_p50_ms']:.1f} ms, p99 {report['ingest_p99_ms']:.1f} ms")
+    if report.get('lag_p50_ms') is not None:
+        print(f"  lag to visible aggregate: p50 {report['lag_p50_ms']:.1f} ms, p95 {report['lag_p95_ms']:.1f} ms, "
+              f"p99 {report['lag_p99_ms']:.1f} ms, max {report['lag_max_ms']:.1f} ms ({report['probe_cycles']} updates)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded posts and bars through the data hub")
+    parser.add_argument('--data-dir', default=os.path.join(ROOT_DIR, 'data', 'segments'),
+                        help="Directory with posts/ and bars/ segment stores")
+    parser.add_argument('--generate', type=int, metavar='DAYS',
+                        help="First fill an empty --data-dir with DAYS of seeded simulated history")
+    parser.add_argument('--posts-per-day', type=int, default=50)
+    parser.add_argument('--tickers', nargs='+', help="Tickers to replay (default: all recorded)")
+    parser.add_argument('--speed', type=parse_speed, default=100.0, help="Multiple of real time, or 'max'")
+    parser.add_argument('--burst', action='append', default=[], type=Burst.parse,
+                        metavar='OFFSET:DURATION:MULTIPLIER[:TICKERS]',
+                        help="Extra post volume, e.g. 2d:1h:50 for 50x the recorded rate for an hour two days in")
+    parser.add_argument('--max-batch', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'replay.json'))
+    args = parser.parse_args()
+    
+    warnings.filterwarnings('ignore')
+    if args.generate:
+        posts, bars = generate_dataset(args.data_dir, args.tickers or TICKERS, args.generate, args.posts_per_day, args.seed)
+        print(f"Generated {posts} posts and {bars} bars in {os.path.relpath(args.data_dir, ROOT_DIR)}")
+    
+    engine = ReplayEngine.from_stores(
+        os.path.join(args.data_dir, 'posts'), os.path.join(args.data_dir, 'bars'), tickers=args.tickers,
+        speed=args.speed, bursts=args.burst, max_batch=args.max_batch, seed=args.seed
+    )
+    report = engine.run()
+    report['recorded_at'] = datetime.now().isoformat(timespec='seconds')
+    print_report(report)
+    
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {os.path.relpath(args.output, ROOT_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
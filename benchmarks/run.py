@@ -0,0 +1,145 @@
+"""
+Benchmark Runner
+Times the benchmark cases per scale, stores JSON results and compares them with a baseline
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.cases import SCALES, Fixture, build_cases
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json')
+
+
+def time_call(call, fixture, min_runs=3, max_runs=20, budget_seconds=2.0):
+    """
+    Per-call timings: at least min_runs, then more while within the time budget
+    Garbage collection is paused while timing, as timeit does
+    """
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(timings) < max_runs:
+            call_started = time.perf_counter()
+            call(fixture)
+            timings.append(time.perf_counter() - call_started)
+            if len(timings) >= min_runs and time.perf_counter() - started > budget_seconds:
+                break
+    finally:
+        gc.enable()
+    return timings
+
+
+def run_suite(scales, pattern=None, budget_seconds=2.0):
+    cases = build_cases()
+    results = {}
+    for scale in scales:
+        print(f"Building {scale} fixture: {SCALES[scale][0]} tickers, {SCALES[scale][1]:,} posts")
+        fixture = Fixture(scale)
+        for name, (call, rows) in cases.items():
+            if pattern and pattern not in name:
+                continue
+            # One untimed call warms caches and lazy imports
+            call(fixture)
+            timings = time_call(call, fixture, budget_seconds=budget_seconds)
+            median = statistics.median(timings)
+            results[f'{name}[{scale}]'] = {
+                'case': name,
+                'scale': scale,
+                'runs': len(timings),
+                'median_s': median,
+                'min_s': min(timings),
+                'rows': rows(fixture),
+                'rows_per_s': rows(fixture) / median if median > 0 else None
+            }
+            print(f"  {name:<55} {median * 1000:10.2f} ms  ({len(timings)} runs)")
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import numpy
+    import pandas
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or None
+    }
+
+
+def compare(results, baseline, threshold, noise_floor_ms=2.0):
+    """
+    Cases slower than baseline by more than threshold (and the noise floor)
+    Best-of-runs times are compared, as they are the least affected by machine noise
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get('results', {}).get(key)
+        if before is None:
+            continue
+        ratio = result['min_s'] / before['min_s'] if before['min_s'] > 0 else float('inf')
+        result['baseline_min_s'] = before['min_s']
+        result['ratio'] = ratio
+        if ratio > threshold and (result['min_s'] - before['min_s']) * 1000 > noise_floor_ms:
+            regressions.append((key, before['min_s'], result['min_s'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument('--scale', nargs='+', choices=list(SCALES), default=['small', 'medium'],
+                        help="Scales to run; 'large' needs several GB of memory and a long time")
+    parser.add_argument('--filter', help="Only cases whose name contains this text")
+    parser.add_argument('--budget', type=float, default=2.0, help="Seconds to spend timing each case")
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'benchmarks', 'results', 'latest.json'))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=1.5, help="Slowdown ratio (best run) reported as a regression")
+    args = parser.parse_args()
+    
+    warnings.simplefilter('ignore')
+    results = run_suite(args.scale, args.filter, args.budget)
+    
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with baseline from {baseline['environment'].get('commit')} "
+              f"({baseline['environment'].get('created')})")
+        for key, before, after, ratio in regressions:
+            print(f"  REGRESSION {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)")
+        if not regressions:
+            print(f"  No case slower than {args.threshold:.2f}x baseline")
+    
+    output = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
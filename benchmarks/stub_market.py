@@ -0,0 +1,320 @@
+"""
+Stub Market Data Server
+Local stand-in for Yahoo's chart and quote endpoints with record/replay, latency and error injection
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+from urllib.request import urlopen
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from modules.market_data import BASE_PRICES, COMPANY_NAMES
+
+EXCHANGE_TZ = 'America/New_York'
+RANGE_DAYS = {'1d': 1, '5d': 5, '7d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366}
+
+
+class MarketData:
+    """
+    Hourly bars per ticker: seeded synthetic series, or recorded Yahoo responses
+    Synthetic bars cover history_days before startup to two weeks after, and
+    are only served once their timestamp has passed, so a long load test
+    sees new bars arrive as it would against the live endpoint.
+    """
+    
+    def __init__(self, seed=0, history_days=60, replay_dir=None):
+        self.seed = seed
+        self.history_days = history_days
+        self.replay_dir = replay_dir
+        self._bars = {}
+        self._quotes = {}
+        self._lock = threading.Lock()
+    
+    def bars(self, symbol):
+        """
+        (epoch seconds, open, high, low, close, volume) arrays for a symbol
+        """
+        with self._lock:
+            if symbol not in self._bars:
+                self._bars[symbol] = self._replayed_bars(symbol) if self.replay_dir else self._synthetic_bars(symbol)
+            return self._bars[symbol]
+    
+    def _synthetic_bars(self, symbol):
+        # Bars open on the half hour through the exchange session, on weekdays
+        today = pd.Timestamp.now(tz=EXCHANGE_TZ).tz_localize(None).normalize()
+        days = pd.date_range(today - pd.Timedelta(days=self.history_days), today + pd.Timedelta(days=14), freq='B')
+        hours = pd.to_timedelta([9.5, 10.5, 11.5, 12.5, 13.5, 14.5, 15.5], unit='h')
+        stamps = pd.DatetimeIndex((days.values[:, None] + hours.values[None, :]).ravel()).tz_localize(EXCHANGE_TZ)
+        
+        # Seeded per symbol so every run and every process serves the same series
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        close = BASE_PRICES.get(symbol, 100.0) * np.cumprod(1 + rng.normal(0.0002, 0.006, len(stamps)))
+        spread = close * 0.004
+        open_ = close + rng.normal(0, spread)
+        high = np.maximum(open_, close) + np.abs(rng.normal(0, spread))
+        low = np.minimum(open_, close) - np.abs(rng.normal(0, spread))
+        volume = rng.integers(1_000_000, 10_000_000, len(stamps))
+        return stamps.asi8 // 10**9, open_, high, low, close, volume
+    
+    def _replayed_bars(self, symbol):
+        path = os.path.join(self.replay_dir, f'chart_{symbol}.json')
+        with open(path) as f:
+            result = json.load(f)['chart']['result'][0]
+        stamps = np.asarray(result['timestamp'], dtype='int64')
+        quote = result['indicators']['quote'][0]
+        columns = [np.asarray([np.nan if v is None else v for v in quote[key]], dtype=float)
+                   for key in ('open', 'high', 'low', 'close', 'volume')]
+        # Move the recording forward by whole weeks so its last bar falls in the past week
+        week = 7 * 24 * 3600
+        stamps = stamps + max(0, int(time.time() - stamps[-1]) // week) * week
+        return (stamps, *columns)
+    
+    def chart(self, symbol, params):
+        """
+        Yahoo v8 chart payload for the requested range or period1/period2
+        """
+        if params.get('interval', '1h') not in ('1h', '60m'):
+            return self._chart_error('Unsupported interval', f"Stub only serves 1h bars, not {params.get('interval')}")
+        try:
+            stamps, open_, high, low, close, volume = self.bars(symbol)
+        except FileNotFoundError:
+            return self._chart_error('Not Found', f"No recording for {symbol}")
+        now = int(time.time())
+        if 'period1' in params:
+            start, end = int(params['period1']), min(int(params.get('period2', now)), now)
+        else:
+            start, end = now - RANGE_DAYS.get(params.get('range', '1mo'), 31) * 86400, now
+        mask = (stamps >= start) & (stamps <= end)
+        
+        last = int(np.flatnonzero(stamps <= now)[-1]) if (stamps <= now).any() else 0
+        return {'chart': {'result': [{
+            'meta': {
+                'currency': 'USD',
+                'symbol': symbol,
+                'exchangeTimezoneName': EXCHANGE_TZ,
+                'regularMarketPrice': float(close[last]),
+                'chartPreviousClose': float(close[max(last - 7, 0)]),
+                'dataGranularity': '1h'
+            },
+            'timestamp': stamps[mask].tolist(),
+            'indicators': {'quote': [{
+                'open': open_[mask].tolist(),
+                'high': high[mask].tolist(),
+                'low': low[mask].tolist(),
+                'close': close[mask].tolist(),
+                'volume': volume[mask].tolist()
+            }]}
+        }], 'error': None}}
+    
+    def _chart_error(self, code, description):
+        return {'chart': {'result': None, 'error': {'code': code, 'description': description}}}
+    
+    def quote(self, symbols):
+        """
+        Yahoo v7 quote payload; the price is the last bar that has already closed
+        """
+        results = []
+        for symbol in symbols:
+            if self.replay_dir and os.path.exists(os.path.join(self.replay_dir, f'quote_{symbol}.json')):
+                with open(os.path.join(self.replay_dir, f'quote_{symbol}.json')) as f:
+                    results.extend(json.load(f)['quoteResponse']['result'])
+                continue
+            try:
+                stamps, _, _, _, close, volume = self.bars(symbol)
+            except FileNotFoundError:
+                continue
+            past = np.flatnonzero(stamps <= time.time())
+            last = int(past[-1]) if len(past) else 0
+            results.append({
+                'symbol': symbol,
+                'longName': COMPANY_NAMES.get(symbol, symbol),
+                'regularMarketPrice': float(close[last]),
+                'regularMarketPreviousClose': float(close[max(last - 7, 0)]),
+                'regularMarketVolume': int(volume[max(last - 6, 0):last + 1].sum()),
+                'marketCap': int(close[last] * 1e9)
+            })
+        return {'quoteResponse': {'result': results, 'error': None}}
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves /v8/finance/chart/<symbol> and /v7/finance/quote, plus /__stats and /__reset
+    """
+    server_version = 'StubMarket/1.0'
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        if url.path == '/__stats':
+            return self._send(200, self.server.stats())
+        if url.path == '/__reset':
+            self.server.reset_stats()
+            return self._send(200, {'reset': True})
+        
+        if url.path.startswith('/v8/finance/chart/'):
+            endpoint, symbol = 'chart', url.path.rsplit('/', 1)[-1].upper()
+        elif url.path.rstrip('/') == '/v7/finance/quote':
+            endpoint, symbol = 'quote', params.get('symbols', '').upper()
+        else:
+            return self._send(404, {'error': 'Not Found'})
+        
+        server = self.server
+        if server.latency_ms or server.jitter_ms:
+            time.sleep(max(0.0, server.latency_ms + server.rng.uniform(-server.jitter_ms, server.jitter_ms)) / 1000)
+        if server.rng.random() < server.error_rate:
+            server.count(endpoint, symbol, error=True)
+            return self._send(500, {'finance': {'result': None, 'error': {'code': 'Internal', 'description': 'Injected error'}}})
+        
+        if server.upstream:
+            payload = server.proxy(self.path)
+            server.save(endpoint, symbol, payload)
+        elif endpoint == 'chart':
+            payload = server.market.chart(symbol, params)
+        else:
+            payload = server.market.quote([s for s in symbol.split(',') if s])
+        server.count(endpoint, symbol)
+        self._send(200, payload)
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubMarketServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the stub's data source, fault settings and request counters
+    With upstream set, requests are proxied and each response is recorded
+    into record_dir, in the layout replay_dir expects.
+    """
+    daemon_threads = True
+    
+    def __init__(self, address, market, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0,
+                 upstream=None, record_dir=None):
+        super().__init__(address, StubRequestHandler)
+        self.market = market
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.record_dir = record_dir
+        self._lock = threading.Lock()
+        self.reset_stats()
+    
+    @property
+    def url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+    
+    def reset_stats(self):
+        with self._lock:
+            self.requests = {}
+            self.errors = {}
+            self.symbols = {}
+            self.bytes_sent = 0
+            self.started = time.time()
+    
+    def count(self, endpoint, symbol, error=False):
+        with self._lock:
+            counters = self.errors if error else self.requests
+            counters[endpoint] = counters.get(endpoint, 0) + 1
+            if not error:
+                self.symbols[symbol] = self.symbols.get(symbol, 0) + 1
+    
+    def stats(self):
+        """
+        Request counts per endpoint and symbol since the last reset
+        """
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'symbols': dict(self.symbols),
+                'total': sum(self.requests.values()) + sum(self.errors.values()),
+                'bytes_sent': self.bytes_sent,
+                'seconds': time.time() - self.started
+            }
+    
+    def proxy(self, path):
+        with urlopen(self.upstream + path, timeout=30) as response:
+            return json.loads(response.read())
+    
+    def save(self, endpoint, symbol, payload):
+        if not self.record_dir:
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, f'{endpoint}_{symbol}.json')
+        # Keep the longest chart seen, so replay covers every range the app asked for
+        if endpoint == 'chart' and os.path.exists(path):
+            with open(path) as f:
+                held = (json.load(f)['chart']['result'] or [{}])[0].get('timestamp') or []
+            if len(held) >= len((payload['chart']['result'] or [{}])[0].get('timestamp') or []):
+                return
+        with open(path, 'w') as f:
+            json.dump(payload, f)
+
+
+def create_stub_server(host='127.0.0.1', port=0, seed=0, history_days=60, replay_dir=None,
+                       latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, upstream=None, record_dir=None):
+    """
+    Build a stub server; port 0 picks a free port (see server.url)
+    """
+    market = MarketData(seed=seed, history_days=history_days, replay_dir=replay_dir)
+    return StubMarketServer((host, port), market, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                            error_rate=error_rate, seed=seed, upstream=upstream, record_dir=record_dir)
+
+
+def start_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, name='stub-market', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Yahoo chart/quote server for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic bars and injected faults")
+    parser.add_argument('--history-days', type=int, default=60)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added delay per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Uniform +/- variation of the delay")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--replay', metavar='DIR', help="Serve responses recorded in DIR instead of synthetic bars")
+    parser.add_argument('--record', metavar='DIR', help="Proxy to --upstream and record responses into DIR")
+    parser.add_argument('--upstream', default='https://query2.finance.yahoo.com', help="Upstream for --record")
+    args = parser.parse_args()
+    
+    server = create_stub_server(
+        args.host, args.port, seed=args.seed, history_days=args.history_days, replay_dir=args.replay,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        upstream=args.upstream if args.record else None, record_dir=args.record
+    )
+    print(f"Stub market data on {server.url} (set MARKET_DATA_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,422 @@
+"""
+Analytics Service
+JSON views of the sentiment analytics for the HTTP API, cached per data version
+"""
+import gzip
+import hashlib
+import inspect
+import json
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, date
+import pandas as pd
+import numpy as np
+
+from modules.data_hub import DataHub
+from modules.delta_feed import DeltaFeed
+from modules.data_processor import DataProcessor
+from modules.market_data import COMPANY_NAMES
+from modules.sentiment_analyzer import SentimentAnalyzer
+from modules.sentiment_cube import SentimentCube
+from utils.helpers import calculate_price_change
+from utils.metrics import record_cache
+
+
+AVAILABLE_TICKERS = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+
+
+def to_json_safe(value):
+    """
+    Convert pandas/NumPy values into plain JSON types (NaN becomes null)
+    """
+    if isinstance(value, dict):
+        return {str(k): to_json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(v) for v in value]
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+class CachedResponse:
+    """
+    Serialized JSON body with its gzip encoding and ETag, built once per cache entry
+    """
+    
+    def __init__(self, payload):
+        self.body = json.dumps(to_json_safe(payload), separators=(',', ':')).encode('utf-8')
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self._gzipped = None
+    
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+class AnalyticsService:
+    """
+    Read-only analytics endpoints over a DataHub.
+    Responses are cached per (endpoint, parameters, hub version) as encoded
+    bytes, so repeated requests from any number of clients cost a dictionary
+    lookup until the hub publishes new data.
+    """
+    
+    def __init__(self, hub=None, processor=None, analyzer=None, max_entries=512):
+        self.hub = hub or DataHub()
+        self.processor = processor or DataProcessor().attach_hub(self.hub)
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.max_entries = max_entries
+        # Hourly cube, spike carries and newest post per ticker, kept current by _on_publish for deltas
+        self._state_lock = threading.Lock()
+        self._rebuild_state()
+        self.hub.add_listener(self._on_publish)
+        self.feed = DeltaFeed(self.hub)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+        self.endpoints = {
+            'tickers': self.tickers,
+            'summary': self.summary,
+            'series': self.series,
+            'spikes': self.spikes,
+            'mentions': self.mentions,
+            'changes': self.changes
+        }
+    
+    def respond(self, endpoint, params):
+        """
+        CachedResponse for an endpoint, computing it on a miss
+        Raises KeyError for unknown endpoints and ValueError for bad parameters
+        """
+        if endpoint not in self.endpoints:
+            raise KeyError(f"Unknown endpoint: {endpoint}")
+        handler = self.endpoints[endpoint]
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise ValueError(f"Bad parameters for {endpoint}: {e}")
+        key = (endpoint, tuple(sorted(params.items())), self.hub.version)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                record_cache('api_response', True)
+                return cached
+        
+        payload = handler(**params)
+        response = CachedResponse(payload)
+        
+        # Serving a new ticker or range may itself publish a new hub version
+        key = (endpoint, key[1], self.hub.version)
+        with self._lock:
+            self.stats['misses'] += 1
+            self._cache[key] = response
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        record_cache('api_response', False)
+        return response
+    
+    def _parse_tickers(self, tickers):
+        selected = [t.strip().upper() for t in str(tickers or '').split(',') if t.strip()] or list(AVAILABLE_TICKERS)
+        unknown = [t for t in selected if t not in AVAILABLE_TICKERS]
+        if unknown:
+            raise ValueError(f"Unknown tickers: {', '.join(unknown)}")
+        return selected
+    
+    def _parse_days(self, days):
+        days = int(days)
+        if not 1 <= days <= self.hub.max_days:
+            raise ValueError(f"days must be between 1 and {self.hub.max_days}")
+        return days
+    
+    def _data(self, tickers, days):
+        return self.hub.subscribe(tickers, days)
+    
+    def tickers(self):
+        return {'tickers': AVAILABLE_TICKERS, 'version': self.hub.version}
+    
+    def summary(self, tickers=None, days=7):
+        """
+        Per-ticker price and sentiment summary, as shown on the overview cards
+        """
+        selected = self._parse_tickers(tickers)
+        days = self._parse_days(days)
+        stock_data, sentiment_data = self._data(selected, days)
+        
+        summaries = []
+        for ticker in selected:
+            summary = self.processor.get_sentiment_summary(sentiment_data, stock_data, ticker)
+            # Permutation-based, as the dashboard's significance badge; the pearsonr p-value overstates it for autocorrelated series
+            significance = self.processor.calculate_correlation_significance(summary['merged_data'])
+            stock_info = self.hub.collector.get_latest_stock_info(ticker) or {}
+            current_price = stock_info.get('current_price')
+            previous_close = stock_info.get('previous_close', current_price)
+            summaries.append({
+                'ticker': ticker,
+                'name': stock_info.get('company_name', ticker),
+                'price': current_price,
+                'change': calculate_price_change(current_price, previous_close) if current_price is not None else None,
+                'sentiment': summary['avg_sentiment'],
+                'latest_sentiment': summary['latest_sentiment'],
+                'correlation': summary['price_correlation'],
+                'leading_correlation': summary['leading_correlation'],
+                'sentiment_volatility': summary['sentiment_volatility'],
+                'p_value': summary['p_value'],
+                'empirical_p_value': significance['empirical_p_value'],
+                'significant': bool(significance['empirical_p_value'] < 0.05),
+                'spike_count': summary['spike_count']
+            })
+        return {'version': self.hub.version, 'last_update': self.hub.last_update, 'summaries': summaries}
+    
+    def series(self, ticker, days=7):
+        """
+        Hourly merged price and sentiment series for one ticker
+        """
+        selected = self._parse_tickers(ticker)[0]
+        days = self._parse_days(days)
+        stock_data, sentiment_data = self._data([selected], days)
+        merged = self.processor.merge_stock_and_sentiment(stock_data, sentiment_data, selected)
+        if merged is None or merged.empty:
+            return {'ticker': selected, 'timestamp': [], 'close': [], 'avg_sentiment': [], 'mention_count': []}
+        return {
+            'ticker': selected,
+            'timestamp': merged['timestamp'].tolist(),
+            'close': merged['Close'].tolist(),
+            'avg_sentiment': merged['avg_sentiment'].tolist(),
+            'mention_count': merged['mention_count'].tolist()
+        }
+    
+    def spikes(self, ticker, days=7, threshold=2.0):
+        """
+        Sentiment anomalies for one ticker
+        """
+        selected = self._parse_tickers(ticker)[0]
+        days = self._parse_days(days)
+        _, sentiment_data = self._data([selected], days)
+        spikes = self.processor.detect_sentiment_spikes(sentiment_data, selected, threshold=float(threshold))
+        return {'ticker': selected, 'spikes': spikes}
+    
+    def mentions(self, ticker, days=7, n=5):
+        """
+        Top positive and negative mentions for one ticker
+        """
+        selected = self._parse_tickers(ticker)[0]
+        days = self._parse_days(days)
+        n = max(1, min(int(n), 50))
+        _, sentiment_data = self._data([selected], days)
+        return {
+            'ticker': selected,
+            'positive': self.analyzer.get_top_mentions(sentiment_data, selected, top_n=n, sentiment_type='positive'),
+            'negative': self.analyzer.get_top_mentions(sentiment_data, selected, top_n=n, sentiment_type='negative')
+        }
+    
+    def changes(self, cursor=None, tickers=None, days=7):
+        """
+        Changes since a cursor from a previous response
+        In 'delta' mode only new rows, the hourly buckets they touched, new
+        spikes and updated summaries of changed tickers are returned. Without
+        a cursor, or when it has fallen out of the change log, the response is
+        a compacted 'snapshot': hourly buckets, spikes and summaries only.
+        """
+        selected = self._parse_tickers(tickers)
+        days = self._parse_days(days)
+        cursor = int(cursor) if cursor not in (None, '') else None
+        self.hub.ensure(selected, days)
+        
+        rows = self.feed.rows_since(cursor, selected)
+        if rows is None:
+            changed = {ticker: self.ticker_changes(ticker, days) for ticker in selected}
+            return {'cursor': self.feed.version, 'mode': 'snapshot', 'tickers': changed}
+        
+        next_cursor, new_bars, new_posts = rows
+        touched_bars = set(new_bars['Ticker']) if not new_bars.empty else set()
+        touched_posts = set(new_posts['ticker']) if not new_posts.empty else set()
+        changed = {}
+        for ticker in sorted(touched_bars | touched_posts):
+            changed[ticker] = self.ticker_changes(ticker, days, new_bars, new_posts)
+            changed[ticker]['bars'] = new_bars[new_bars['Ticker'] == ticker].to_dict('records') if ticker in touched_bars else []
+            changed[ticker]['posts'] = new_posts[new_posts['ticker'] == ticker].to_dict('records') if ticker in touched_posts else []
+        return {'cursor': next_cursor, 'mode': 'delta', 'tickers': changed}
+    
+    def ticker_changes(self, ticker, days, new_bars=None, new_posts=None):
+        """
+        Hourly buckets, spikes and summary for one ticker
+        Without new bars/posts (a snapshot) everything is computed over the
+        window. With them, buckets start at the first hour they touched and
+        spikes are limited to the new posts, and nothing rescans the window's
+        posts: hourly sentiment comes from the service's SentimentCube and
+        spikes from those found as posts were published.
+        """
+        if new_bars is None and new_posts is None:
+            return self._ticker_snapshot(ticker, days)
+        
+        stock_data, _ = self.hub.snapshot()
+        bars, _ = self.hub.window(stock_data, pd.DataFrame(), [ticker], days)
+        cutoff = pd.Timestamp(datetime.now()) - pd.Timedelta(days=days)
+        with self._state_lock:
+            merged = self.processor.merge_stock_and_sentiment_cube(bars, self._cube, ticker, start=cutoff)
+            totals = self._cube.totals(ticker=ticker, start=cutoff)
+            volatility = self.processor.calculate_sentiment_volatility_cube(self._cube, ticker, start=cutoff)
+            spikes = [spike for spike in self._spikes.get(ticker, []) if spike['timestamp'] >= cutoff]
+            latest = self._latest.get(ticker, (None, 0))[1]
+        
+        candidates = self._first_affected(ticker, new_bars, new_posts)
+        buckets = self._buckets(merged, candidates) if candidates else self._buckets(pd.DataFrame())
+        
+        posts = new_posts[new_posts['ticker'] == ticker] if new_posts is not None and not new_posts.empty else pd.DataFrame()
+        new_spikes = []
+        if not posts.empty:
+            first_new = pd.to_datetime(posts['timestamp']).min()
+            new_spikes = [spike for spike in spikes if pd.Timestamp(spike['timestamp']) >= first_new]
+        
+        avg_sentiment = totals['sentiment_sum'] / totals['count'] if totals['count'] else 0
+        return {
+            'buckets': buckets,
+            'summary': self._stream_summary(ticker, bars, merged, avg_sentiment, latest, volatility, len(spikes)),
+            'spikes': new_spikes
+        }
+    
+    def _ticker_snapshot(self, ticker, days):
+        """
+        ticker_changes over the whole window, from one view of the hub
+        """
+        stock_data, sentiment_data = self.hub.view([ticker], days)
+        merged = self.processor.merge_stock_and_sentiment(stock_data, sentiment_data, ticker)
+        spikes = self.processor.detect_sentiment_spikes(sentiment_data, ticker)
+        posts = sentiment_data[sentiment_data['ticker'] == ticker] if not sentiment_data.empty else pd.DataFrame()
+        if posts.empty:
+            avg_sentiment = latest = 0
+        else:
+            avg_sentiment = posts['sentiment_score'].mean()
+            latest = posts.sort_values('timestamp').iloc[-1]['sentiment_score']
+        volatility = self.processor.calculate_sentiment_volatility(sentiment_data, ticker) if not posts.empty else 0
+        bars = stock_data[stock_data['Ticker'] == ticker] if not stock_data.empty else stock_data
+        return {
+            'buckets': self._buckets(merged),
+            'summary': self._stream_summary(ticker, bars, merged, avg_sentiment, latest, volatility, len(spikes)),
+            'spikes': spikes
+        }
+    
+    def _buckets(self, merged, candidates=None):
+        """
+        Hourly bucket columns of a merged frame, from the first affected hour when candidates are given
+        """
+        if merged is None or merged.empty:
+            return {'timestamp': [], 'close': [], 'avg_sentiment': [], 'mention_count': []}
+        start = 0
+        if candidates:
+            timestamps = pd.to_datetime(merged['timestamp'])
+            align = self.hub.collector.align_timestamp
+            since = min(align(candidate, timestamps.dt.tz) for candidate in candidates)
+            # The bar open before the first change also absorbs posts from its hour
+            start = max(int(timestamps.searchsorted(since, side='right')) - 1, 0)
+        changed = merged.iloc[start:]
+        return {
+            'timestamp': changed['timestamp'].tolist(),
+            'close': changed['Close'].tolist(),
+            'avg_sentiment': changed['avg_sentiment'].tolist(),
+            'mention_count': changed['mention_count'].tolist()
+        }
+    
+    def _stream_summary(self, ticker, bars, merged, avg_sentiment, latest_sentiment, volatility, spike_count):
+        """
+        Summary in the shape of summary()'s entries, priced from the held bars instead of a live quote
+        """
+        correlation = self.processor.calculate_correlation(merged)
+        significance = self.processor.calculate_correlation_significance(merged)
+        price = change = None
+        if bars is not None and not bars.empty:
+            closes = bars['Close']
+            dates = pd.to_datetime(bars['Datetime' if 'Datetime' in bars.columns else 'Date']).dt.date
+            price = float(closes.iloc[-1])
+            earlier = closes[dates < dates.iloc[-1]]
+            previous_close = float(earlier.iloc[-1]) if not earlier.empty else float(bars['Open'].iloc[0])
+            change = calculate_price_change(price, previous_close)
+        return {
+            'ticker': ticker,
+            'name': COMPANY_NAMES.get(ticker, ticker),
+            'price': price,
+            'change': change,
+            'sentiment': avg_sentiment,
+            'latest_sentiment': latest_sentiment,
+            'correlation': correlation['price_sentiment_corr'],
+            'leading_correlation': self.processor.calculate_leading_indicators(merged, lag_hours=1),
+            'sentiment_volatility': volatility,
+            'p_value': correlation['p_value'],
+            'empirical_p_value': significance['empirical_p_value'],
+            'significant': bool(significance['empirical_p_value'] < 0.05),
+            'spike_count': spike_count
+        }
+    
+    def _on_publish(self, version, new_bars, new_posts):
+        """
+        Fold each publish into the cube, spike carries and latest posts, once for every consumer
+        """
+        if new_bars is None and new_posts is None:
+            self._rebuild_state()
+            return
+        if new_posts is None or new_posts.empty:
+            return
+        oldest = pd.Timestamp(datetime.now()) - pd.Timedelta(days=self.hub.max_days)
+        _, sentiment_data = self.hub.snapshot()
+        with self._state_lock:
+            self._cube.update(new_posts)
+            for ticker, posts in new_posts.groupby('ticker'):
+                carry = self._carries.get(ticker)
+                if carry is not None and not carry.empty and posts['timestamp'].min() < carry['timestamp'].iloc[-1]:
+                    # Older history was backfilled; the rolling spike windows restart from the ticker's full history
+                    held = sentiment_data[sentiment_data['ticker'] == ticker].sort_values('timestamp', kind='stable')
+                    self._spikes[ticker], self._carries[ticker], self._latest[ticker] = self._ticker_state(held, ticker)
+                    continue
+                found, self._carries[ticker] = self.processor.detect_new_sentiment_spikes(carry, posts)
+                self._spikes[ticker] = [spike for spike in self._spikes.get(ticker, []) if spike['timestamp'] >= oldest] + found
+                newest = posts.loc[pd.to_datetime(posts['timestamp']).idxmax()]
+                if ticker not in self._latest or newest['timestamp'] >= self._latest[ticker][0]:
+                    self._latest[ticker] = (newest['timestamp'], newest['sentiment_score'])
+    
+    def _rebuild_state(self):
+        """
+        Recompute the incremental state from the hub's current snapshot
+        """
+        _, sentiment_data = self.hub.snapshot()
+        cube = SentimentCube.from_frame(sentiment_data) if not sentiment_data.empty else SentimentCube()
+        carries, spikes, latest = {}, {}, {}
+        if not sentiment_data.empty:
+            for ticker, posts in sentiment_data.sort_values('timestamp', kind='stable').groupby('ticker'):
+                spikes[ticker], carries[ticker], latest[ticker] = self._ticker_state(posts, ticker)
+        with self._state_lock:
+            self._cube, self._carries, self._spikes, self._latest = cube, carries, spikes, latest
+    
+    def _ticker_state(self, posts, ticker):
+        """
+        Spikes, spike carry and newest post for one ticker's time-ordered posts
+        """
+        spikes = self.processor.detect_sentiment_spikes(posts, ticker)
+        carry = posts[['timestamp', 'sentiment_score', 'text']].iloc[-19:].reset_index(drop=True)
+        return spikes, carry, (posts['timestamp'].iloc[-1], posts['sentiment_score'].iloc[-1])
+    
+    def _first_affected(self, ticker, new_bars, new_posts):
+        """
+        Earliest timestamps whose hourly bucket changed for the ticker
+        """
+        candidates = []
+        if new_bars is not None and not new_bars.empty:
+            bars = new_bars[new_bars['Ticker'] == ticker]
+            date_column = 'Datetime' if 'Datetime' in bars.columns else 'Date'
+            if not bars.empty:
+                candidates.append(pd.Timestamp(pd.to_datetime(bars[date_column]).min()))
+        if new_posts is not None and not new_posts.empty:
+            posts = new_posts[new_posts['ticker'] == ticker]
+            if not posts.empty:
+                candidates.append(pd.Timestamp(pd.to_datetime(posts['timestamp']).min()).floor('1H'))
+        return candidates
\ No newline at end of file
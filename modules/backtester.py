@@ -0,0 +1,211 @@
+"""
+Sentiment Signal Backtester
+Evaluates sentiment trading rules over many parameter combinations at once
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+
+
+STRATEGIES = ('threshold', 'momentum', 'spike')
+
+DEFAULT_GRID = {
+    'strategy': list(STRATEGIES),
+    'threshold': [0.1, 0.2, 0.3, 0.5, 1.0, 2.0],
+    'holding_period': [1, 3, 6, 12],
+    'lag': [1, 2, 3]
+}
+
+
+def _strategy_features(sentiment, spike_window):
+    """
+    Signal feature per strategy, aligned with the sentiment series
+    """
+    momentum = np.concatenate([[np.nan], np.diff(sentiment)])
+    
+    rolling = pd.Series(sentiment).rolling(window=spike_window, min_periods=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = ((pd.Series(sentiment) - rolling.mean()) / rolling.std()).to_numpy()
+    
+    return {'threshold': sentiment, 'momentum': momentum, 'spike': z_score}
+
+
+def _evaluate_grid(sentiment, returns, strategy_codes, thresholds, holding_periods, lags,
+                   cost_per_trade, periods_per_year, spike_window):
+    """
+    Evaluate a block of parameter combinations on one ticker
+    Every row of the intermediate matrices is one combination
+    Kept at module level so it can be shipped to worker processes
+    """
+    length = len(returns)
+    combos = len(thresholds)
+    features = _strategy_features(sentiment, spike_window)
+    feature_matrix = np.stack([features[name] for name in STRATEGIES])
+    
+    # Lagged feature per combination: value observed `lag` bars before t
+    t = np.arange(length)
+    source_index = t[None, :] - lags[:, None]
+    valid = source_index >= 0
+    lagged = feature_matrix[strategy_codes[:, None], np.clip(source_index, 0, None)]
+    lagged = np.where(valid, lagged, np.nan)
+    
+    threshold = thresholds[:, None]
+    signal = (lagged > threshold).astype(float) - (lagged < -threshold).astype(float)
+    
+    # Hold each signal for holding_period bars via prefix sums of signals
+    cumulative = np.concatenate([np.zeros((combos, 1)), np.cumsum(signal, axis=1)], axis=1)
+    start = np.clip(t[None, :] + 1 - holding_periods[:, None], 0, None)
+    held = cumulative[:, 1:] - np.take_along_axis(cumulative, start, axis=1)
+    position = np.clip(held, -1, 1)
+    
+    # Position decided at bar t earns the return of bar t + 1
+    previous = np.concatenate([np.zeros((combos, 1)), position[:, :-1]], axis=1)
+    trades = np.abs(position - previous)
+    pnl = previous * returns[None, :] - cost_per_trade * trades
+    
+    mean = pnl.mean(axis=1)
+    std = pnl.std(axis=1, ddof=1) if length > 1 else np.zeros(combos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+    
+    return {
+        'total_pnl': pnl.sum(axis=1),
+        'sharpe': sharpe,
+        'turnover': trades.mean(axis=1),
+        'n_trades': (trades > 0).sum(axis=1),
+        'exposure': np.abs(position).mean(axis=1)
+    }
+
+
+def _run_ticker(ticker, sentiment, returns, grid_arrays, settings):
+    """
+    Evaluate all combinations for one ticker in fixed-size blocks
+    """
+    strategy_codes, thresholds, holding_periods, lags = grid_arrays
+    block = settings['block_size']
+    parts = []
+    for start in range(0, len(thresholds), block):
+        stop = start + block
+        parts.append(_evaluate_grid(
+            sentiment, returns,
+            strategy_codes[start:stop], thresholds[start:stop],
+            holding_periods[start:stop], lags[start:stop],
+            settings['cost_per_trade'], settings['periods_per_year'], settings['spike_window']
+        ))
+    metrics = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    metrics['ticker'] = np.full(len(thresholds), ticker, dtype=object)
+    return metrics
+
+
+class SentimentBacktester:
+    """
+    Vectorized backtests of sentiment rules on merge_stock_and_sentiment output.
+    Strategies:
+        threshold - long above +threshold sentiment, short below -threshold
+        momentum  - trade the hour-over-hour change in sentiment
+        spike     - trade rolling z-score spikes in the signal's direction
+    A parameter grid is expanded into arrays and evaluated as matrix
+    operations per ticker; tickers are spread over a process pool.
+    """
+    
+    def __init__(self, cost_per_trade=0.0005, periods_per_year=252 * 7, spike_window=20,
+                 block_size=2000, max_workers=None, parallel_threshold=8):
+        self.cost_per_trade = cost_per_trade
+        self.periods_per_year = periods_per_year
+        self.spike_window = spike_window
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+    
+    def expand_grid(self, grid=None):
+        """
+        Expand a dict of parameter lists into a DataFrame of combinations
+        """
+        grid = {**DEFAULT_GRID, **(grid or {})}
+        for strategy in grid['strategy']:
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown strategy: {strategy}")
+        keys = ['strategy', 'threshold', 'holding_period', 'lag']
+        combos = pd.DataFrame(list(itertools.product(*(grid[k] for k in keys))), columns=keys)
+        if (combos['holding_period'] < 1).any() or (combos['lag'] < 1).any():
+            raise ValueError("holding_period and lag must be at least 1")
+        return combos
+    
+    def _series(self, merged_df):
+        """
+        Sentiment and next-bar-aligned returns from a merged frame
+        """
+        if merged_df is None or merged_df.empty or len(merged_df) < 3:
+            return None
+        returns = merged_df['Close'].pct_change().fillna(0).to_numpy(dtype=float)
+        sentiment = merged_df['avg_sentiment'].fillna(0).to_numpy(dtype=float)
+        return sentiment, returns
+    
+    def run(self, merged_by_ticker, grid=None):
+        """
+        Backtest every parameter combination on every ticker
+        Args:
+            merged_by_ticker: dict mapping ticker -> merged DataFrame
+            grid: optional dict overriding DEFAULT_GRID entries
+        Returns:
+            DataFrame with one row per (ticker, combination)
+        """
+        combos = self.expand_grid(grid)
+        grid_arrays = (
+            combos['strategy'].map({name: i for i, name in enumerate(STRATEGIES)}).to_numpy(),
+            combos['threshold'].to_numpy(dtype=float),
+            combos['holding_period'].to_numpy(dtype=int),
+            combos['lag'].to_numpy(dtype=int)
+        )
+        settings = {
+            'block_size': self.block_size,
+            'cost_per_trade': self.cost_per_trade,
+            'periods_per_year': self.periods_per_year,
+            'spike_window': self.spike_window
+        }
+        
+        jobs = {}
+        for ticker, merged in merged_by_ticker.items():
+            series = self._series(merged)
+            if series is not None:
+                jobs[ticker] = (ticker, series[0], series[1], grid_arrays, settings)
+        
+        results = {}
+        workers = self.max_workers or os.cpu_count() or 1
+        if len(jobs) >= self.parallel_threshold and workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    futures = {ticker: pool.submit(_run_ticker, *args) for ticker, args in jobs.items()}
+                    for ticker, future in futures.items():
+                        results[ticker] = future.result()
+            except Exception as e:
+                print(f"Warning: Parallel backtest failed, running serially: {e}")
+        
+        for ticker, args in jobs.items():
+            if ticker not in results:
+                results[ticker] = _run_ticker(*args)
+        
+        if not results:
+            return pd.DataFrame(columns=['ticker'] + list(combos.columns) +
+                                ['total_pnl', 'sharpe', 'turnover', 'n_trades', 'exposure'])
+        
+        frames = []
+        for ticker in jobs:
+            metrics = results[ticker]
+            frame = combos.copy()
+            frame.insert(0, 'ticker', metrics.pop('ticker'))
+            for key, values in metrics.items():
+                frame[key] = values
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+    
+    def best_by_ticker(self, results, metric='sharpe'):
+        """
+        Best parameter combination per ticker by the given metric
+        """
+        if results.empty:
+            return results
+        best = results.loc[results.groupby('ticker')[metric].idxmax()]
+        return best.reset_index(drop=True)
\ No newline at end of file
@@ -2,44 +2,58 @@
 Data Collection Module
 Fetches stock prices and generates simulated sentiment data
 """
-import yfinance as yf
+import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import timedelta
 import random
 import time
 
+from modules.market_data import SimulatedProvider, align_timestamp, create_provider
+from utils.metrics import instrument
+
 
 class DataCollector:
-    def __init__(self):
+    def __init__(self, provider=None, seed=None):
         self.stock_tickers = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN']
+        # Where bars and quotes come from; see modules/market_data.py for the MARKET_DATA_* settings
+        self.provider = provider or create_provider(seed=seed)
+        if seed is None and isinstance(self.provider, SimulatedProvider):
+            seed = self.provider.seed
+        if seed is None and os.environ.get('MARKET_DATA_SEED'):
+            seed = int(os.environ['MARKET_DATA_SEED'])
+        self.seed = seed
+        # Fallback when the provider fails, seeded like the posts so seeded runs stay reproducible
+        self.simulator = self.provider if isinstance(self.provider, SimulatedProvider) else SimulatedProvider(seed=seed)
+    
+    def now(self):
+        """
+        Current time, or the simulator's fixed anchor in seeded runs
+        """
+        return self.simulator.now()
+    
+    def _rngs(self, *key):
+        """
+        (random, numpy random) sources for one simulated draw
+        Unseeded these are the global modules; seeded they are derived from the seed and key
+        """
+        if self.seed is None:
+            return random, np.random
+        seed = int(self.simulator.rng(*key).integers(2**32))
+        return random.Random(seed), np.random.RandomState(seed)
         
+    @instrument('collector.fetch_stock_data', rows=True)
     def fetch_stock_data(self, ticker, period='7d', interval='1h', max_retries=3):
         """
-        Fetch real stock price data using yfinance with retry logic
+        Fetch stock price data from the provider with retry logic
         """
         for attempt in range(max_retries):
             try:
-                stock = yf.Ticker(ticker)
-                
-                # Try different periods if the first one fails
-                periods_to_try = [period, '5d', '1mo', '3mo']
-                
-                for p in periods_to_try:
-                    df = stock.history(period=p, interval=interval)
-                    
-                    if not df.empty:
-                        # Limit to requested period if we got more data
-                        if p != period:
-                            days = int(period.replace('d', ''))
-                            cutoff_date = datetime.now() - timedelta(days=days)
-                            df = df[df.index >= cutoff_date]
-                        
-                        df['Ticker'] = ticker
-                        df.reset_index(inplace=True)
-                        return df
+                df = self.provider.history(ticker, period=period, interval=interval)
+                if not df.empty:
+                    return df
                 
-                # If all periods fail, generate simulated data as fallback
+                # If the provider has nothing, generate simulated data as fallback
                 print(f"Warning: Could not fetch real data for {ticker}, using simulated data")
                 return self._generate_simulated_stock_data(ticker, period, interval)
                 
@@ -57,68 +71,65 @@ class DataCollector:
         """
         Generate simulated stock data as fallback when real data is unavailable
         """
-        # Parse period
-        days = int(period.replace('d', ''))
-        
-        # Base prices for different stocks
-        base_prices = {
-            'AAPL': 180.0,
-            'TSLA': 250.0,
-            'MSFT': 380.0,
-            'GOOGL': 140.0,
-            'AMZN': 150.0
-        }
-        
-        base_price = base_prices.get(ticker, 100.0)
-        
-        # Generate timestamps
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # Generate hourly timestamps
-        timestamps = []
-        current = start_date
-        while current <= end_date:
-            # Only include market hours (9 AM - 4 PM EST, Mon-Fri)
-            if current.weekday() < 5 and 9 <= current.hour <= 16:
-                timestamps.append(current)
-            current += timedelta(hours=1)
-        
-        # Generate realistic price movements
-        prices = []
-        current_price = base_price
-        
-        for i in range(len(timestamps)):
-            # Random walk with slight upward bias
-            change_percent = np.random.normal(0.001, 0.01)  # 0.1% mean, 1% std
-            current_price *= (1 + change_percent)
-            prices.append(current_price)
+        return self.simulator.history(ticker, period=period, interval=interval)
+    
+    def fetch_stock_data_since(self, ticker, since, last_close=None, interval='1h'):
+        """
+        Fetch only the bars newer than a cursor timestamp
+        Falls back to extending the simulated series from last_close
+        """
+        return self.fetch_stock_data_range(ticker, since, start_price=last_close, interval=interval)
+    
+    @instrument('collector.fetch_stock_data_range', rows=True)
+    def fetch_stock_data_range(self, ticker, start, end=None, start_price=None, interval='1h', end_price=None):
+        """
+        Fetch the bars in (start, end], end defaulting to now
+        Falls back to simulated bars starting from start_price, or closing at
+        end_price when extending history back from a held bar
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else None
+        try:
+            df = self.provider.history(ticker, start=start, end=end, interval=interval, start_price=start_price, end_price=end_price)
+            if not df.empty:
+                return df
+        except Exception as e:
+            print(f"Range fetch failed for {ticker}: {e}")
         
-        # Generate OHLCV data
-        data = []
-        for i, timestamp in enumerate(timestamps):
-            price = prices[i]
-            volatility = price * 0.005  # 0.5% intraday volatility
-            
-            open_price = price + np.random.normal(0, volatility)
-            high_price = max(price, open_price) + abs(np.random.normal(0, volatility))
-            low_price = min(price, open_price) - abs(np.random.normal(0, volatility))
-            close_price = price
-            volume = int(np.random.uniform(1000000, 10000000))
-            
-            data.append({
-                'Datetime': timestamp,
-                'Open': open_price,
-                'High': high_price,
-                'Low': low_price,
-                'Close': close_price,
-                'Volume': volume,
-                'Ticker': ticker
-            })
+        return self._generate_simulated_stock_data_range(ticker, start, end, start_price, end_price)
+    
+    def align_timestamp(self, timestamp, tz):
+        """
+        Localize or strip a timestamp's timezone to compare with an index in tz
+        """
+        return align_timestamp(timestamp, tz)
+    
+    def _generate_simulated_stock_data_range(self, ticker, start, end=None, start_price=None, end_price=None):
+        """
+        Simulated hourly market-hours bars in (start, end]
+        """
+        return self.simulator.history(ticker, start=start, end=end, start_price=start_price, end_price=end_price)
+    
+    @instrument('collector.fetch_new_stock_data', rows=True)
+    def fetch_new_stock_data(self, cursors, last_closes=None, interval='1h'):
+        """
+        Fetch new bars for several tickers
+        Args:
+            cursors: dict mapping ticker -> timestamp of the last bar already held
+            last_closes: optional dict mapping ticker -> last close, for simulated continuation
+        """
+        last_closes = last_closes or {}
+        new_data = []
+        for ticker, since in cursors.items():
+            data = self.fetch_stock_data_since(ticker, since, last_closes.get(ticker), interval)
+            if data is not None and not data.empty:
+                new_data.append(data)
         
-        df = pd.DataFrame(data)
-        return df
+        if new_data:
+            return pd.concat(new_data, ignore_index=True)
+        return pd.DataFrame()
     
+    @instrument('collector.fetch_multiple_stocks', rows=True)
     def fetch_multiple_stocks(self, tickers, period='7d', interval='1h'):
         """
         Fetch data for multiple stock tickers
@@ -136,13 +147,15 @@ class DataCollector:
         print("Warning: All stock data fetches failed")
         return pd.DataFrame()
     
+    @instrument('collector.generate_simulated_sentiment_data', rows=True)
     def generate_simulated_sentiment_data(self, ticker, num_days=7, posts_per_day=50):
         """
         Generate simulated sentiment data that mimics social media posts
         This simulates Twitter/Reddit data with realistic patterns
         """
-        end_date = datetime.now()
+        end_date = self.now()
         start_date = end_date - timedelta(days=num_days)
+        rand, np_rand = self._rngs('posts', ticker, start_date, num_days, posts_per_day)
         
         # Generate timestamps
         timestamps = []
@@ -150,19 +163,26 @@ class DataCollector:
             current_date = start_date + timedelta(days=day)
             for _ in range(posts_per_day):
                 # Add some randomness to post times (more posts during market hours)
-                hour = random.choices(
+                hour = rand.choices(
                     range(24), 
                     weights=[1 if 9 <= h <= 16 else 0.3 for h in range(24)]
                 )[0]
-                minute = random.randint(0, 59)
+                minute = rand.randint(0, 59)
                 timestamp = current_date.replace(hour=hour, minute=minute, second=0)
                 timestamps.append(timestamp)
         
+        return self._simulate_posts(ticker, timestamps, (rand, np_rand))
+    
+    def _simulate_posts(self, ticker, timestamps, rngs=None):
+        """
+        Simulate social media posts for a ticker at the given timestamps
+        """
+        rand, np_rand = rngs or self._rngs('posts', ticker, timestamps[0] if timestamps else None, len(timestamps))
         # Generate sentiment scores with realistic patterns
         sentiment_data = []
         for timestamp in timestamps:
             # Base sentiment with some randomness
-            base_sentiment = np.random.normal(0, 0.3)
+            base_sentiment = np_rand.normal(0, 0.3)
             
             # Add trend component (stocks generally have positive bias in bull market)
             trend = 0.1 if ticker in ['AAPL', 'MSFT', 'GOOGL'] else 0.05
@@ -170,7 +190,7 @@ class DataCollector:
             # Add volatility for certain stocks
             volatility = 0.5 if ticker == 'TSLA' else 0.3
             
-            sentiment_score = np.clip(base_sentiment + trend + np.random.normal(0, volatility), -1, 1)
+            sentiment_score = np.clip(base_sentiment + trend + np_rand.normal(0, volatility), -1, 1)
             
             # Generate simulated post text
             sentiment_label = 'positive' if sentiment_score > 0.2 else 'negative' if sentiment_score < -0.2 else 'neutral'
@@ -198,21 +218,54 @@ class DataCollector:
                 ]
             }
             
-            post_text = random.choice(post_templates[sentiment_label])
+            post_text = rand.choice(post_templates[sentiment_label])
             
             sentiment_data.append({
                 'timestamp': timestamp,
                 'ticker': ticker,
                 'sentiment_score': sentiment_score,
                 'text': post_text,
-                'source': random.choice(['Twitter', 'Reddit', 'News']),
+                'source': rand.choice(['Twitter', 'Reddit', 'News']),
                 'confidence': abs(sentiment_score)
             })
         
-        df = pd.DataFrame(sentiment_data)
+        df = pd.DataFrame(sentiment_data, columns=['timestamp', 'ticker', 'sentiment_score', 'text', 'source', 'confidence'])
         df = df.sort_values('timestamp').reset_index(drop=True)
         return df
     
+    @instrument('collector.generate_sentiment_since', rows=True)
+    def generate_sentiment_since(self, tickers, since, until=None, posts_per_day=50):
+        """
+        Generate only the posts that would have arrived after a cursor timestamp
+        Post volume is proportional to the elapsed time, weighted towards market hours
+        """
+        since = pd.Timestamp(since)
+        until = pd.Timestamp(until) if until is not None else pd.Timestamp(self.now())
+        if until <= since:
+            return pd.DataFrame()
+        
+        # Candidate minutes in (since, until], weighted like the daily generator
+        minutes = pd.date_range(since.floor('min') + pd.Timedelta(minutes=1), until.floor('min'), freq='min')
+        if len(minutes) == 0:
+            return pd.DataFrame()
+        weights = np.where((minutes.hour >= 9) & (minutes.hour <= 16), 1.0, 0.3)
+        weights = weights / weights.sum()
+        elapsed_days = (until - since) / pd.Timedelta(days=1)
+        
+        all_sentiment = []
+        for ticker in tickers:
+            rand, np_rand = self._rngs('posts_since', ticker, since, until, posts_per_day)
+            num_posts = np_rand.poisson(posts_per_day * elapsed_days)
+            if num_posts == 0:
+                continue
+            chosen = np.sort(np_rand.choice(len(minutes), size=num_posts, p=weights))
+            all_sentiment.append(self._simulate_posts(ticker, list(minutes[chosen].to_pydatetime()), (rand, np_rand)))
+        
+        if all_sentiment:
+            return pd.concat(all_sentiment, ignore_index=True)
+        return pd.DataFrame()
+    
+    @instrument('collector.generate_sentiment_for_multiple_stocks', rows=True)
     def generate_sentiment_for_multiple_stocks(self, tickers, num_days=7):
         """
         Generate sentiment data for multiple stocks
@@ -226,31 +279,28 @@ class DataCollector:
             return pd.concat(all_sentiment, ignore_index=True)
         return pd.DataFrame()
     
+    def generate_sentiment_to_store(self, tickers, store, num_days=7, posts_per_day=50):
+        """
+        Generate sentiment data ticker by ticker straight into a PartitionedPostStore
+        Only one ticker's posts are held in memory at a time
+        """
+        written = 0
+        for ticker in tickers:
+            sentiment_df = self.generate_simulated_sentiment_data(ticker, num_days, posts_per_day)
+            written += store.write(sentiment_df)
+        return written
+    
+    @instrument('collector.get_latest_stock_info')
     def get_latest_stock_info(self, ticker):
         """
         Get latest stock information including current price and market cap
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            # Try to get current price from info
-            current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-            previous_close = info.get('previousClose', 0)
-            
-            # If info is empty or prices are 0, use simulated data
-            if not info or current_price == 0:
+            info = self.provider.quote(ticker)
+            if info is None:
                 print(f"Warning: Could not fetch info for {ticker}, using simulated data")
                 return self._generate_simulated_stock_info(ticker)
-            
-            return {
-                'ticker': ticker,
-                'current_price': current_price,
-                'previous_close': previous_close,
-                'market_cap': info.get('marketCap', 0),
-                'volume': info.get('volume', 0),
-                'company_name': info.get('longName', ticker)
-            }
+            return info
         except Exception as e:
             print(f"Error fetching info for {ticker}: {e}")
             return self._generate_simulated_stock_info(ticker)
@@ -259,31 +309,4 @@ class DataCollector:
         """
         Generate simulated stock info as fallback
         """
-        base_prices = {
-            'AAPL': 180.0,
-            'TSLA': 250.0,
-            'MSFT': 380.0,
-            'GOOGL': 140.0,
-            'AMZN': 150.0
-        }
-        
-        company_names = {
-            'AAPL': 'Apple Inc.',
-            'TSLA': 'Tesla, Inc.',
-            'MSFT': 'Microsoft Corporation',
-            'GOOGL': 'Alphabet Inc.',
-            'AMZN': 'Amazon.com, Inc.'
-        }
-        
-        base_price = base_prices.get(ticker, 100.0)
-        current_price = base_price * (1 + np.random.normal(0, 0.02))
-        previous_close = current_price * (1 + np.random.normal(-0.01, 0.02))
-        
-        return {
-            'ticker': ticker,
-            'current_price': current_price,
-            'previous_close': previous_close,
-            'market_cap': int(current_price * 1e9),  # Simulated market cap
-            'volume': int(np.random.uniform(50000000, 100000000)),
-            'company_name': company_names.get(ticker, ticker)
-        }
\ No newline at end of file
+        return self.simulator.quote(ticker)
\ No newline at end of file
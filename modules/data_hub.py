@@ -0,0 +1,386 @@
+"""
+Data Hub
+Process-wide owner of market and sentiment data shared by every dashboard session
+"""
+import os
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from modules.data_collector import DataCollector
+from modules.partitioned_store import PartitionedPostStore
+from modules.retention import TieredSentimentStore
+from utils.metrics import record_cache
+
+# Directory the hub mirrors its posts into, partitioned by ticker and date, for chunked processing
+POST_STORE_DIR = os.environ.get('SENTIMENT_POST_STORE')
+# Days of raw posts the hub keeps in memory when set; older posts are kept as tiered rollups
+RETENTION_RAW_DAYS = float(os.environ.get('SENTIMENT_RETENTION_RAW_DAYS') or 0)
+
+
+class DataHub:
+    """
+    Singleton-style ingestion service for all sessions in the process.
+    The hub fetches the union of tickers any session has asked for, over the
+    longest history requested, and a background thread refreshes it on a
+    schedule by pulling only bars and posts newer than its cursors.
+    Coverage is tracked per ticker as the oldest timestamp held, so a request
+    that is a subset in tickers and days is answered by slicing, and a wider
+    one fetches only the uncovered tickers and the missing older days.
+    Published frames are replaced, never mutated, so sessions can slice the
+    current snapshot without locking and without touching the network.
+    With a post store (SENTIMENT_POST_STORE), every published post is also
+    written to a PartitionedPostStore that DataProcessor can stream from
+    instead of the in-memory frames; it is emptied when the hub starts and
+    pruned to the hub's history window.
+    With a retention store (SENTIMENT_RETENTION_RAW_DAYS), published posts
+    also feed a TieredSentimentStore and the hub's frames keep only its raw
+    tier; older posts in the window survive as 5-minute and hourly rollups
+    that DataProcessor reads for windows reaching back past them.
+    """
+    
+    def __init__(self, collector=None, refresh_seconds=300, posts_per_day=50, max_days=30, post_store=None, retention=None):
+        self.collector = collector or DataCollector()
+        if post_store is None and POST_STORE_DIR:
+            post_store = PartitionedPostStore(POST_STORE_DIR)
+            # Left over from an earlier process; this hub fetches its own history
+            post_store.clear()
+        self.post_store = post_store
+        if retention is None and RETENTION_RAW_DAYS:
+            retention = TieredSentimentStore(raw_days=RETENTION_RAW_DAYS)
+        self.retention = retention
+        self.refresh_seconds = refresh_seconds
+        self.posts_per_day = posts_per_day
+        self.max_days = max_days
+        
+        self.tickers = set()
+        self.days = 0
+        self.coverage = {}
+        self.request_stats = {'requests': 0, 'superset_hits': 0, 'partial_hits': 0, 'misses': 0}
+        self.stock_data = pd.DataFrame()
+        self.sentiment_data = pd.DataFrame()
+        self._snapshot = (self.stock_data, self.sentiment_data)
+        self.post_cursor = None
+        # Set while another source (e.g. a SentimentPipeline) ingests live posts; refresh then fetches bars only
+        self.post_feed = None
+        self.version = 0
+        self.last_update = None
+        
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+    
+    def start(self):
+        """
+        Start the background refresh thread (idempotent)
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='data-hub-refresh', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Stop the background refresh thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def add_listener(self, callback):
+        """
+        Call callback(version, new_bars, new_posts) after each publish
+        new_bars and new_posts hold the rows added by that publish, which for
+        a newly covered ticker or a longer history can be older than rows
+        already held; both are None when the snapshot was rebuilt rather than extended
+        """
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _notify(self, version, new_bars=None, new_posts=None):
+        for callback in list(self._listeners):
+            try:
+                callback(version, new_bars, new_posts)
+            except Exception as e:
+                print(f"Warning: Data hub listener failed: {e}")
+    
+    def _run(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Warning: Data hub refresh failed: {e}")
+    
+    def _fetch(self, tickers, num_days):
+        stock_data = self.collector.fetch_multiple_stocks(tickers, period=f'{num_days}d', interval='1h')
+        sentiment_data = self.collector.generate_sentiment_for_multiple_stocks(tickers, num_days=num_days)
+        return stock_data, sentiment_data
+    
+    def _fetch_older(self, ticker, start, end):
+        """
+        Bars and posts for one ticker in (start, end], to extend its history backwards
+        """
+        first_open = None
+        if not self.stock_data.empty:
+            held = self.stock_data[self.stock_data['Ticker'] == ticker]
+            if not held.empty:
+                first_open = held['Open'].iloc[0]
+        stock_data = self.collector.fetch_stock_data_range(ticker, start, end, end_price=first_open)
+        sentiment_data = self.collector.generate_sentiment_since([ticker], start, until=end, posts_per_day=self.posts_per_day)
+        return stock_data, sentiment_data
+    
+    def _publish(self, stock_data, sentiment_data, post_cursor):
+        self.stock_data = stock_data
+        self.sentiment_data = sentiment_data
+        # Swapped as one reference so readers never see bars and posts from different versions
+        self._snapshot = (stock_data, sentiment_data)
+        self.post_cursor = post_cursor
+        self.version += 1
+        self.last_update = datetime.now()
+    
+    def ensure(self, tickers, num_days):
+        """
+        Make sure the hub covers the tickers and history length
+        Only uncovered tickers and missing older days are fetched
+        Returns 'hit', 'partial' or 'miss' for the request
+        """
+        num_days = min(num_days, self.max_days)
+        with self._lock:
+            now = pd.Timestamp(datetime.now())
+            start = now - pd.Timedelta(days=num_days)
+            tickers = set(tickers)
+            missing = sorted(tickers - set(self.coverage))
+            short = sorted(t for t in tickers & set(self.coverage) if self.coverage[t] > start)
+            
+            outcome = 'hit' if not missing and not short else 'miss' if len(missing) == len(tickers) else 'partial'
+            self.request_stats['requests'] += 1
+            self.request_stats[{'hit': 'superset_hits', 'partial': 'partial_hits', 'miss': 'misses'}[outcome]] += 1
+            record_cache('data_hub', outcome == 'hit')
+            if outcome == 'hit':
+                return outcome
+            
+            stock_parts = [self.stock_data]
+            sentiment_parts = [self.sentiment_data]
+            new_bars = []
+            new_posts = []
+            if missing:
+                stock_data, sentiment_data = self._fetch(missing, num_days)
+                if self.post_cursor is not None and not sentiment_data.empty:
+                    # The next refresh generates posts after the shared cursor for these tickers too
+                    sentiment_data = sentiment_data[sentiment_data['timestamp'] <= self.post_cursor]
+                stock_parts.append(stock_data)
+                sentiment_parts.append(sentiment_data)
+                new_bars.append(stock_data)
+                new_posts.append(sentiment_data)
+                for ticker in missing:
+                    self.coverage[ticker] = start
+            for ticker in short:
+                stock_data, sentiment_data = self._fetch_older(ticker, start, self.coverage[ticker])
+                stock_parts.insert(0, stock_data)
+                sentiment_parts.insert(0, sentiment_data)
+                new_bars.insert(0, stock_data)
+                new_posts.insert(0, sentiment_data)
+                self.coverage[ticker] = start
+            
+            self.tickers |= tickers
+            self.days = max(self.days, num_days)
+            post_cursor = self.post_cursor if self.post_cursor is not None else now.to_pydatetime()
+            new_bars = self._combine(new_bars)
+            new_posts = self._combine(new_posts, 'timestamp')
+            self._publish(
+                self._combine(stock_parts),
+                self._retain(new_posts, self._combine(sentiment_parts, 'timestamp')),
+                post_cursor
+            )
+            self._store_posts(new_posts)
+            version = self.version
+        # Only the fetched rows are published as the change, like a refresh
+        self._notify(version, new_bars, new_posts)
+        return outcome
+    
+    def _combine(self, parts, sort_column=None):
+        """
+        Concatenate non-empty frames, optionally in time order
+        Bar frames are already ordered per ticker and may mix timezones, so they are left unsorted
+        """
+        parts = [part for part in parts if part is not None and not part.empty]
+        if not parts:
+            return pd.DataFrame()
+        combined = pd.concat(parts, ignore_index=True)
+        if sort_column is not None and sort_column in combined.columns:
+            combined = combined.sort_values(sort_column, kind='stable').reset_index(drop=True)
+        return combined
+    
+    def cache_stats(self):
+        """
+        Request counters and the fraction of requests served from a cached superset
+        """
+        stats = dict(self.request_stats)
+        stats['superset_hit_rate'] = stats['superset_hits'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
+    
+    def refresh(self):
+        """
+        Pull bars and posts newer than the hub's cursors for every ticker
+        Returns True when anything new was published
+        """
+        with self._lock:
+            if not self.tickers or self.stock_data.empty:
+                return False
+            date_column = 'Datetime' if 'Datetime' in self.stock_data.columns else 'Date'
+            # Bars are ordered within each ticker (see _combine), and tickers may differ in timezone
+            latest_bars = self.stock_data.groupby('Ticker').last()
+            new_bars = self.collector.fetch_new_stock_data(
+                latest_bars[date_column].to_dict(), last_closes=latest_bars['Close'].to_dict()
+            )
+            
+            now = datetime.now()
+            if self.post_feed is None:
+                new_posts = self.collector.generate_sentiment_since(
+                    sorted(self.tickers), self.post_cursor, until=now, posts_per_day=self.posts_per_day
+                )
+            else:
+                new_posts = pd.DataFrame()
+            if new_bars.empty and new_posts.empty:
+                self.post_cursor = now
+                return False
+            version = self._append(new_bars, new_posts, now)
+        # Listeners run outside the lock so slow consumers never block ingestion
+        self._notify(version, new_bars, new_posts)
+        return True
+    
+    def ingest(self, new_bars, new_posts, post_cursor=None):
+        """
+        Publish bars and posts supplied by the caller (e.g. a replay) as if a refresh had fetched them
+        Their tickers are added to the hub, and its history window is widened
+        to keep rows as old as the oldest ingested one. Returns the new version.
+        """
+        new_bars = new_bars if new_bars is not None else pd.DataFrame()
+        new_posts = new_posts if new_posts is not None else pd.DataFrame()
+        with self._lock:
+            now = pd.Timestamp(datetime.now())
+            oldest = now
+            tickers = set()
+            if not new_bars.empty:
+                date_column = 'Datetime' if 'Datetime' in new_bars.columns else 'Date'
+                oldest = min(oldest, self.collector.align_timestamp(pd.Timestamp(pd.to_datetime(new_bars[date_column]).min()), None))
+                tickers.update(new_bars['Ticker'].unique())
+            if not new_posts.empty:
+                oldest = min(oldest, pd.Timestamp(new_posts['timestamp'].min()))
+                tickers.update(new_posts['ticker'].unique())
+            
+            self.tickers |= tickers
+            self.days = min(max(self.days, int(np.ceil((now - oldest) / pd.Timedelta(days=1)))), self.max_days)
+            for ticker in tickers:
+                self.coverage[ticker] = min(self.coverage.get(ticker, now), oldest)
+            version = self._append(new_bars, new_posts, post_cursor if post_cursor is not None else self.post_cursor)
+        self._notify(version, new_bars, new_posts)
+        return version
+    
+    def _append(self, new_bars, new_posts, post_cursor):
+        """
+        Append new rows, drop history past the window and publish; caller holds the lock
+        """
+        stock_data = pd.concat([self.stock_data, new_bars], ignore_index=True) if not new_bars.empty else self.stock_data
+        sentiment_data = pd.concat([self.sentiment_data, new_posts], ignore_index=True) if not new_posts.empty else self.sentiment_data
+        # Drop history that has aged past the longest window any session asked for
+        stock_data, sentiment_data = self.window(stock_data, sentiment_data, self.tickers, self.days)
+        oldest = pd.Timestamp(datetime.now()) - pd.Timedelta(days=self.days)
+        self.coverage = {ticker: max(start, oldest) for ticker, start in self.coverage.items()}
+        self._publish(stock_data, self._retain(new_posts, sentiment_data, oldest), post_cursor)
+        self._store_posts(new_posts, oldest)
+        return self.version
+    
+    def _store_posts(self, new_posts, oldest=None):
+        """
+        Mirror published posts into the post store and drop its days before oldest; caller holds the lock
+        """
+        if self.post_store is None:
+            return
+        if not new_posts.empty:
+            self.post_store.write(new_posts[new_posts['ticker'].isin(list(self.tickers))])
+        if oldest is not None:
+            # Whole days only, so readers of the current window never lose a partition under them
+            self.post_store.drop_before(oldest.floor('D') - pd.Timedelta(days=1))
+    
+    def _retain(self, new_posts, sentiment_data, oldest=None):
+        """
+        Feed new posts to the retention store, demote aged tiers and drop its history before oldest
+        Returns sentiment_data cut to the raw tier; caller holds the lock
+        """
+        if self.retention is None:
+            return sentiment_data
+        if oldest is not None:
+            self.retention.drop_before(oldest)
+        if not new_posts.empty:
+            self.retention.ingest(new_posts[new_posts['ticker'].isin(list(self.tickers))])
+        self.retention.apply_retention()
+        if sentiment_data.empty or self.retention.raw_cutoff is None:
+            return sentiment_data
+        return sentiment_data[sentiment_data['timestamp'] >= self.retention.raw_cutoff].reset_index(drop=True)
+    
+    def window(self, stock_data, sentiment_data, tickers, num_days):
+        """
+        Rows of the given frames for the tickers within the last num_days
+        Bars are compared in their own timezone, so live and simulated bars can be mixed
+        """
+        cutoff = pd.Timestamp(datetime.now()) - pd.Timedelta(days=num_days)
+        tickers = list(tickers)
+        
+        if not stock_data.empty:
+            date_column = 'Datetime' if 'Datetime' in stock_data.columns else 'Date'
+            dates = stock_data[date_column]
+            if dates.dtype == object:
+                # Live tz-aware bars mixed with naive simulated fallback bars: compare everything naive
+                dates = pd.to_datetime(dates.map(lambda ts: self.collector.align_timestamp(pd.Timestamp(ts), None)))
+            dates = pd.to_datetime(dates)
+            stock_cutoff = cutoff.tz_localize(dates.dt.tz) if dates.dt.tz is not None else cutoff
+            stock_data = stock_data[stock_data['Ticker'].isin(tickers) & (dates >= stock_cutoff)]
+        if not sentiment_data.empty:
+            sentiment_data = sentiment_data[
+                sentiment_data['ticker'].isin(tickers) & (sentiment_data['timestamp'] >= cutoff)
+            ]
+        return stock_data.reset_index(drop=True), sentiment_data.reset_index(drop=True)
+    
+    def snapshot(self):
+        """
+        The current (stock_data, sentiment_data) pair, published together
+        The frames are shared with every reader and must not be modified
+        """
+        return self._snapshot
+    
+    def view(self, tickers, num_days):
+        """
+        Read-only slice of the current snapshot for a session
+        Returns (stock_data, sentiment_data) restricted to tickers and the last num_days
+        """
+        stock_data, sentiment_data = self.snapshot()
+        return self.window(stock_data, sentiment_data, tickers, num_days)
+    
+    def subscribe(self, tickers, num_days):
+        """
+        Register interest in tickers/history and return the session's view
+        """
+        self.ensure(tickers, num_days)
+        return self.view(tickers, num_days)
+    
+    def stats(self):
+        """
+        Hub coverage for monitoring
+        """
+        return {
+            'tickers': len(self.tickers),
+            'days': self.days,
+            'bars': len(self.stock_data),
+            'posts': len(self.sentiment_data),
+            'version': self.version,
+            'last_update': self.last_update
+        }
\ No newline at end of file
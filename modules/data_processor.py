@@ -2,19 +2,90 @@
 Data Processing Module
 Handles data aggregation, correlation analysis, and feature engineering
 """
+import os
 import pandas as pd
 import numpy as np
-from scipy import stats
+
+from modules.market_data import align_timestamp
+from modules.significance import SignificanceEngine
+from utils.metrics import instrument
+
+# Stored posts per ticker from which merges and volatility stream from the post store (0 = never)
+CHUNKED_ROWS = int(os.environ.get('SENTIMENT_CHUNKED_ROWS') or 0)
 
 
 class DataProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, post_store=None, chunked_rows=None, tiered_store=None):
+        self.significance_engine = SignificanceEngine()
+        # PartitionedPostStore holding the same posts as the frames passed in (see DataHub)
+        self.post_store = post_store
+        self.chunked_rows = CHUNKED_ROWS if chunked_rows is None else chunked_rows
+        # TieredSentimentStore holding rollups of posts older than the frames passed in
+        self.tiered_store = tiered_store
+    
+    def attach_hub(self, hub):
+        """
+        Read large histories from the hub's post store and older ones from its retention tiers
+        """
+        self.post_store = hub.post_store
+        self.tiered_store = hub.retention
+        return self
+    
+    def _chunked_store(self, sentiment_df, ticker):
+        """
+        The post store when the ticker's stored posts reach chunked_rows, else None
+        """
+        if self.post_store is None or not self.chunked_rows or sentiment_df is None or sentiment_df.empty:
+            return None
+        if self.post_store.count(ticker=ticker) < self.chunked_rows:
+            return None
+        return self.post_store
+    
+    def _tiered_store(self, since):
+        """
+        The tiered store when a window starting at since reaches back past its raw posts, else None
+        """
+        store = self.tiered_store
+        if store is None or store.raw_cutoff is None or since is None or pd.isna(since):
+            return None
+        if align_timestamp(pd.Timestamp(since), store.raw_cutoff.tzinfo) >= store.raw_cutoff:
+            return None
+        return store
     
+    def _first_bar(self, stock_df, ticker):
+        """
+        Wall-clock time of the ticker's first bar (posts are naive), None without bars
+        """
+        if stock_df is None or stock_df.empty:
+            return None
+        date_column = 'Datetime' if 'Datetime' in stock_df.columns else 'Date'
+        dates = stock_df.loc[stock_df['Ticker'] == ticker, date_column]
+        if dates.empty:
+            return None
+        first = pd.Timestamp(pd.to_datetime(dates).min())
+        return first.tz_localize(None) if first.tzinfo is not None else first
+    
+    @instrument('processor.merge_stock_and_sentiment', rows=True)
     def merge_stock_and_sentiment(self, stock_df, sentiment_df, ticker):
         """
         Merge stock price data with aggregated sentiment data
+        Streams from the post store instead once the ticker's history reaches chunked_rows posts,
+        and reads the retention tiers when the bars start before the posts held raw
         """
+        # A window with no market hours yet (e.g. one day on a Monday morning) has no bars at all
+        if stock_df is None or stock_df.empty:
+            return pd.DataFrame()
+        
+        store = self._chunked_store(sentiment_df, ticker)
+        if store is not None:
+            # The frame's time span bounds the stored posts, which may cover a longer window
+            timestamps = sentiment_df['timestamp']
+            return self.merge_stock_and_sentiment_chunked(stock_df, store, ticker, timestamps.min(), timestamps.max())
+        
+        tiered = self._tiered_store(self._first_bar(stock_df, ticker))
+        if tiered is not None:
+            return self.merge_stock_and_sentiment_tiered(stock_df, tiered, ticker)
+        
         # Filter for specific ticker
         stock_ticker = stock_df[stock_df['Ticker'] == ticker].copy()
         
@@ -40,6 +111,11 @@ class DataProcessor:
             return stock_ticker
         
         sentiment_ticker['timestamp'] = pd.to_datetime(sentiment_ticker['timestamp'])
+        if stock_ticker.index.tz is not None and sentiment_ticker['timestamp'].dt.tz is None:
+            # Bars from a live provider are exchange-local and tz-aware; posts are naive
+            sentiment_ticker['timestamp'] = sentiment_ticker['timestamp'].dt.tz_localize(
+                stock_ticker.index.tz, ambiguous='NaT', nonexistent='shift_forward'
+            )
         sentiment_ticker.set_index('timestamp', inplace=True)
         
         # Resample sentiment to hourly
@@ -61,6 +137,158 @@ class DataProcessor:
         merged.reset_index(inplace=True)
         return merged
     
+    def merge_stock_and_sentiment_chunked(self, stock_df, store, ticker, start=None, end=None):
+        """
+        Merge stock prices with hourly sentiment streamed from a PartitionedPostStore
+        Only the ticker's partitions inside the price range (and start/end, if given) are read
+        """
+        stock_ticker = stock_df[stock_df['Ticker'] == ticker].copy()
+        
+        if stock_ticker.empty:
+            return pd.DataFrame()
+        
+        if 'Datetime' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Datetime'])
+        elif 'Date' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Date'])
+        
+        stock_ticker.set_index('timestamp', inplace=True)
+        
+        # Posts are naive; bars from a live provider are exchange-local, so compare in its wall-clock time
+        tz = stock_ticker.index.tz
+        local_index = stock_ticker.index.tz_localize(None) if tz is not None else stock_ticker.index
+        first = local_index.min().floor('1H')
+        last = local_index.max().floor('1H') + pd.Timedelta(hours=1) - pd.Timedelta(1)
+        start = max(first, pd.Timestamp(start)) if start is not None else first
+        end = min(last, pd.Timestamp(end)) if end is not None else last
+        cube = store.build_cube(ticker=ticker, start=start, end=end)
+        hourly = cube.rollup('bucket', ticker=ticker)
+        if hourly.empty:
+            # Same shape as merge_stock_and_sentiment when the ticker has no posts
+            stock_ticker['avg_sentiment'] = 0
+            stock_ticker['mention_count'] = 0
+            stock_ticker.reset_index(inplace=True)
+            return stock_ticker
+        
+        sentiment_hourly = pd.DataFrame({
+            'avg_sentiment': hourly['avg_sentiment'].to_numpy(),
+            'avg_confidence': hourly['avg_confidence'].to_numpy(),
+            'mention_count': hourly['count'].to_numpy()
+        }, index=self._localize_buckets(hourly['bucket'], tz))
+        sentiment_hourly = sentiment_hourly[sentiment_hourly.index.notna()]
+        
+        merged = stock_ticker.join(sentiment_hourly, how='left')
+        merged['avg_sentiment'] = merged['avg_sentiment'].fillna(0)
+        merged['mention_count'] = merged['mention_count'].fillna(0)
+        merged['avg_confidence'] = merged['avg_confidence'].fillna(0)
+        
+        merged.reset_index(inplace=True)
+        return merged
+    
+    def _localize_buckets(self, buckets, tz):
+        """
+        Naive hourly post buckets as a timestamp index in the bars' timezone
+        Hours that do not exist there (DST gaps) move forward; ambiguous ones become NaT
+        """
+        buckets = pd.DatetimeIndex(buckets, name='timestamp')
+        if tz is not None:
+            buckets = buckets.tz_localize(tz, ambiguous='NaT', nonexistent='shift_forward')
+        return buckets
+    
+    def merge_stock_and_sentiment_cube(self, stock_df, cube, ticker, start=None):
+        """
+        Merge stock prices with hourly sentiment rolled up from a SentimentCube
+        The cost follows the number of hours, not the number of posts
+        """
+        if stock_df is None or stock_df.empty:
+            return pd.DataFrame()
+        
+        stock_ticker = stock_df[stock_df['Ticker'] == ticker].copy()
+        
+        if stock_ticker.empty:
+            return pd.DataFrame()
+        
+        if 'Datetime' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Datetime'])
+        elif 'Date' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Date'])
+        
+        stock_ticker.set_index('timestamp', inplace=True)
+        
+        hourly = cube.rollup('bucket', ticker=ticker, start=start)
+        if hourly.empty:
+            stock_ticker['avg_sentiment'] = 0
+            stock_ticker['mention_count'] = 0
+            stock_ticker.reset_index(inplace=True)
+            return stock_ticker
+        
+        buckets = self._localize_buckets(hourly['bucket'], stock_ticker.index.tz)
+        sentiment_hourly = pd.DataFrame({
+            'avg_sentiment': hourly['avg_sentiment'].to_numpy(),
+            'avg_confidence': hourly['avg_confidence'].to_numpy(),
+            'mention_count': hourly['count'].to_numpy()
+        }, index=buckets)
+        sentiment_hourly = sentiment_hourly[sentiment_hourly.index.notna()]
+        
+        merged = stock_ticker.join(sentiment_hourly, how='left')
+        merged['avg_sentiment'] = merged['avg_sentiment'].fillna(0)
+        merged['mention_count'] = merged['mention_count'].fillna(0)
+        merged['avg_confidence'] = merged['avg_confidence'].fillna(0)
+        
+        merged.reset_index(inplace=True)
+        return merged
+    
+    def merge_stock_and_sentiment_from_segments(self, bar_store, post_store, ticker, start=None, end=None, tz=None):
+        """
+        Merge bars and hourly sentiment read from SegmentStores
+        Only segments whose zone maps match are touched, and posts are
+        aggregated straight from the memory-mapped column views.
+        The bar store holds tz-aware bars as UTC; with tz they are returned in
+        that timezone and posts are bucketed in its wall-clock time, as
+        merge_stock_and_sentiment does for bars from a live provider.
+        """
+        # The bar store compares naive UTC timestamps
+        start = align_timestamp(pd.Timestamp(start), None) if start is not None else None
+        end = align_timestamp(pd.Timestamp(end), None) if end is not None else None
+        bars = bar_store.query_frame(ticker, start, end)
+        if bars.empty:
+            return pd.DataFrame()
+        
+        stock_ticker = bars.rename(columns={'ticker': 'Ticker'})
+        if tz is not None:
+            stock_ticker['timestamp'] = stock_ticker['timestamp'].dt.tz_localize('UTC').dt.tz_convert(tz)
+        stock_ticker['Datetime'] = stock_ticker['timestamp']
+        stock_ticker.set_index('timestamp', inplace=True)
+        
+        local_index = stock_ticker.index.tz_localize(None) if tz is not None else stock_ticker.index
+        post_end = local_index.max().floor('1H') + pd.Timedelta(hours=1) - pd.Timedelta(1)
+        views = post_store.query(ticker, local_index.min().floor('1H'), post_end,
+                                 columns=['timestamp', 'sentiment_score', 'confidence'])
+        
+        if views:
+            hours = np.concatenate([view['timestamp'].astype('datetime64[h]') for view in views])
+            scores = np.concatenate([view['sentiment_score'] for view in views])
+            confidence = np.concatenate([view['confidence'] for view in views])
+            buckets, inverse = np.unique(hours, return_inverse=True)
+            counts = np.bincount(inverse)
+            sentiment_hourly = pd.DataFrame({
+                'avg_sentiment': np.bincount(inverse, weights=scores) / counts,
+                'avg_confidence': np.bincount(inverse, weights=confidence) / counts,
+                'mention_count': counts
+            }, index=self._localize_buckets(buckets.astype('datetime64[ns]'), tz))
+            sentiment_hourly = sentiment_hourly[sentiment_hourly.index.notna()]
+            merged = stock_ticker.join(sentiment_hourly, how='left')
+        else:
+            merged = stock_ticker.assign(avg_sentiment=np.nan, avg_confidence=np.nan, mention_count=np.nan)
+        
+        merged['avg_sentiment'] = merged['avg_sentiment'].fillna(0)
+        merged['mention_count'] = merged['mention_count'].fillna(0)
+        merged['avg_confidence'] = merged['avg_confidence'].fillna(0)
+        
+        merged.reset_index(inplace=True)
+        return merged
+    
+    @instrument('processor.calculate_correlation')
     def calculate_correlation(self, merged_df):
         """
         Calculate correlation between sentiment and price movement
@@ -72,11 +300,15 @@ class DataProcessor:
                 'p_value': 1.0
             }
         
-        # Calculate price change
-        merged_df['price_change'] = merged_df['Close'].pct_change()
+        # Calculate price change without writing to merged_df, which may be a cached panel
+        valid_data = pd.DataFrame({
+            'avg_sentiment': merged_df['avg_sentiment'],
+            'price_change': merged_df['Close'].pct_change(),
+            'Volume': merged_df['Volume']
+        })
         
         # Remove NaN values
-        valid_data = merged_df[['avg_sentiment', 'price_change', 'Volume']].dropna()
+        valid_data = valid_data.dropna()
         
         if len(valid_data) < 2:
             return {
@@ -86,10 +318,10 @@ class DataProcessor:
             }
         
         # Calculate Pearson correlation
-        price_corr, price_pval = stats.pearsonr(valid_data['avg_sentiment'], valid_data['price_change'])
+        price_corr, price_pval = self._pearsonr(valid_data['avg_sentiment'], valid_data['price_change'])
         
         # Calculate correlation with volume
-        volume_corr, _ = stats.pearsonr(valid_data['avg_sentiment'], valid_data['Volume'])
+        volume_corr, _ = self._pearsonr(valid_data['avg_sentiment'], valid_data['Volume'])
         
         return {
             'price_sentiment_corr': price_corr,
@@ -97,6 +329,40 @@ class DataProcessor:
             'p_value': price_pval
         }
     
+    def calculate_correlation_significance(self, merged_df, engine=None):
+        """
+        Empirical significance of the sentiment-price correlation
+        Uses circular-shift permutations and block-bootstrap CIs, which stay
+        honest for autocorrelated hourly series unlike the pearsonr p-value
+        """
+        engine = engine or self.significance_engine
+        sentiment, price_change = self._correlation_series(merged_df)
+        return engine.test(sentiment, price_change)
+    
+    @instrument('processor.calculate_significance_for_tickers')
+    def calculate_significance_for_tickers(self, merged_by_ticker, engine=None):
+        """
+        Empirical significance for several tickers, fanned out over a process pool
+        Args:
+            merged_by_ticker: dict mapping ticker -> merged DataFrame
+        """
+        engine = engine or self.significance_engine
+        pairs = {ticker: self._correlation_series(merged) for ticker, merged in merged_by_ticker.items()}
+        return engine.test_many(pairs)
+    
+    def _correlation_series(self, merged_df):
+        """
+        Aligned sentiment and price-change arrays as used by calculate_correlation
+        """
+        if merged_df.empty or len(merged_df) < 2:
+            return np.array([]), np.array([])
+        
+        valid_data = pd.DataFrame({
+            'avg_sentiment': merged_df['avg_sentiment'],
+            'price_change': merged_df['Close'].pct_change()
+        }).dropna()
+        return valid_data['avg_sentiment'].to_numpy(), valid_data['price_change'].to_numpy()
+    
     def calculate_leading_indicators(self, merged_df, lag_hours=1):
         """
         Check if sentiment is a leading indicator for price movement
@@ -115,9 +381,142 @@ class DataProcessor:
         if len(valid_data) < 2:
             return 0
         
-        corr, _ = stats.pearsonr(valid_data['sentiment_lag'], valid_data['price_change'])
+        corr, _ = self._pearsonr(valid_data['sentiment_lag'], valid_data['price_change'])
         return corr
     
+    def _pearsonr(self, x, y):
+        """
+        Pearson correlation and two-sided p-value, as scipy.stats.pearsonr
+        The t-distribution tail comes from scipy.special, which imports far
+        faster than scipy.stats; constant inputs give NaN for both values
+        """
+        from scipy.special import stdtr
+        
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        x = x - x.mean()
+        y = y - y.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = float(np.clip(np.dot(x, y) / np.sqrt(np.dot(x, x) * np.dot(y, y)), -1.0, 1.0))
+            dof = len(x) - 2
+            if dof < 1 or np.isnan(r):
+                return r, np.nan if np.isnan(r) else 1.0
+            t = r * np.sqrt(dof / (1.0 - r * r)) if abs(r) < 1 else np.inf
+        return r, float(2 * stdtr(dof, -abs(t)))
+    
+    @instrument('processor.screen_granger_causality', rows=True)
+    def screen_granger_causality(self, merged_by_ticker, max_lag=24, significance=0.05):
+        """
+        Granger-causality screen (sentiment -> returns) for many tickers and lags
+        Tickers with equal-length series are stacked and every lag is solved
+        as one batched least-squares problem
+        Args:
+            merged_by_ticker: dict mapping ticker -> merged DataFrame
+        Returns:
+            DataFrame with one row per (ticker, lag)
+        """
+        columns = ['ticker', 'lag', 'f_stat', 'p_value', 'n_obs', 'significant']
+        groups = {}
+        for ticker, merged in merged_by_ticker.items():
+            if merged.empty:
+                continue
+            series = pd.DataFrame({
+                'sentiment': merged['avg_sentiment'],
+                'returns': merged['Close'].pct_change()
+            }).dropna()
+            if len(series) < 5:
+                continue
+            groups.setdefault(len(series), []).append(
+                (ticker, series['sentiment'].to_numpy(dtype=float), series['returns'].to_numpy(dtype=float))
+            )
+        
+        frames = []
+        for length, group in groups.items():
+            # Short histories are screened over as many lags as they can support
+            group_max_lag = min(max_lag, (length - 2) // 3)
+            tickers = [item[0] for item in group]
+            sentiment = np.stack([item[1] for item in group])
+            returns = np.stack([item[2] for item in group])
+            f_stat, p_value, n_obs = self._granger_batch(sentiment, returns, group_max_lag)
+            lags = np.arange(1, group_max_lag + 1)
+            frames.append(pd.DataFrame({
+                'ticker': np.repeat(tickers, group_max_lag),
+                'lag': np.tile(lags, len(tickers)),
+                'f_stat': f_stat.ravel(),
+                'p_value': p_value.ravel(),
+                'n_obs': n_obs
+            }))
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        
+        screen = pd.concat(frames, ignore_index=True)
+        screen['significant'] = screen['p_value'] < significance
+        return screen[columns]
+    
+    def summarize_granger_screen(self, screen, significance=0.05):
+        """
+        Best lag per ticker from a Granger screen, with a Bonferroni
+        correction for having searched over every lag
+        """
+        if screen.empty:
+            return pd.DataFrame(columns=['ticker', 'best_lag', 'f_stat', 'p_value', 'p_value_adjusted', 'significant'])
+        
+        lags_tested = screen.groupby('ticker')['lag'].transform('count')
+        best = screen.assign(lags_tested=lags_tested).loc[screen.groupby('ticker')['p_value'].idxmin()]
+        best = best.rename(columns={'lag': 'best_lag'})
+        best['p_value_adjusted'] = np.minimum(best['p_value'] * best['lags_tested'], 1.0)
+        best['significant'] = best['p_value_adjusted'] < significance
+        return best[['ticker', 'best_lag', 'f_stat', 'p_value', 'p_value_adjusted', 'significant']].reset_index(drop=True)
+    
+    def _granger_batch(self, sentiment, returns, max_lag):
+        """
+        F-tests for lags 1..max_lag on stacked (tickers x time) arrays
+        All lags share the sample after the first max_lag rows so they are comparable
+        """
+        from scipy.special import fdtrc
+        
+        num_series, length = returns.shape
+        n_obs = length - max_lag
+        target = returns[:, max_lag:]
+        
+        # Lag tensors: lagged[:, t, k] is the value k+1 steps before target t
+        returns_lags = np.stack([returns[:, max_lag - k - 1:length - k - 1] for k in range(max_lag)], axis=2)
+        sentiment_lags = np.stack([sentiment[:, max_lag - k - 1:length - k - 1] for k in range(max_lag)], axis=2)
+        intercept = np.ones((num_series, n_obs, 1))
+        
+        f_stat = np.full((num_series, max_lag), np.nan)
+        p_value = np.full((num_series, max_lag), np.nan)
+        for lag in range(1, max_lag + 1):
+            restricted = np.concatenate([intercept, returns_lags[:, :, :lag]], axis=2)
+            unrestricted = np.concatenate([restricted, sentiment_lags[:, :, :lag]], axis=2)
+            rss_restricted = self._batched_rss(restricted, target)
+            rss_unrestricted = self._batched_rss(unrestricted, target)
+            
+            df_resid = n_obs - unrestricted.shape[2]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f = ((rss_restricted - rss_unrestricted) / lag) / (rss_unrestricted / df_resid)
+            f = np.where(np.isfinite(f), np.maximum(f, 0), np.nan)
+            f_stat[:, lag - 1] = f
+            p_value[:, lag - 1] = fdtrc(lag, df_resid, f)
+        
+        return f_stat, p_value, n_obs
+    
+    def _batched_rss(self, design, target):
+        """
+        Residual sum of squares of a stack of least-squares fits
+        """
+        design_t = design.transpose(0, 2, 1)
+        gram = design_t @ design
+        moment = design_t @ target[..., None]
+        try:
+            coef = np.linalg.solve(gram, moment)
+        except np.linalg.LinAlgError:
+            coef = np.linalg.pinv(gram) @ moment
+        residuals = target - (design @ coef)[..., 0]
+        return (residuals ** 2).sum(axis=1)
+    
+    @instrument('processor.detect_sentiment_spikes', rows=True)
     def detect_sentiment_spikes(self, sentiment_df, ticker, threshold=2.0):
         """
         Detect unusual sentiment spikes (anomalies)
@@ -139,10 +538,158 @@ class DataProcessor:
         
         return spikes[['timestamp', 'sentiment_score', 'z_score', 'text']].to_dict('records')
     
-    def calculate_sentiment_volatility(self, sentiment_df, ticker, window_hours=24):
+    def detect_new_sentiment_spikes(self, carry, new_posts, threshold=2.0, window=20):
+        """
+        Spikes among new posts for one ticker, given the window-1 posts before them
+        Returns (spikes, carry for the next call); rolling statistics match
+        detect_sentiment_spikes as long as new posts arrive in time order
+        """
+        new_posts = new_posts.sort_values('timestamp')[['timestamp', 'sentiment_score', 'text']]
+        frame = new_posts if carry is None or carry.empty else pd.concat([carry, new_posts], ignore_index=True)
+        carried = len(frame) - len(new_posts)
+        next_carry = frame.iloc[-(window - 1):].reset_index(drop=True) if window > 1 else None
+        if len(frame) < 10:
+            return [], next_carry
+        
+        scores = frame['sentiment_score']
+        rolling_mean = scores.rolling(window=window, min_periods=1).mean()
+        rolling_std = scores.rolling(window=window, min_periods=1).std()
+        frame = frame.assign(z_score=(scores - rolling_mean) / rolling_std).iloc[carried:]
+        found = frame[abs(frame['z_score']) > threshold]
+        return found[['timestamp', 'sentiment_score', 'z_score', 'text']].to_dict('records'), next_carry
+    
+    def detect_sentiment_spikes_chunked(self, store, ticker, threshold=2.0, window=20):
+        """
+        Spike detection streamed over a PartitionedPostStore
+        The last window-1 rows of each chunk are carried into the next so the
+        rolling statistics match the in-memory version exactly
+        """
+        if store.count(ticker=ticker) < 10:
+            return []
+        
+        spikes = []
+        carry = None
+        for chunk in store.iter_chunks(ticker=ticker, columns=('timestamp', 'sentiment_score', 'text')):
+            frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+            carried = 0 if carry is None else len(carry)
+            
+            scores = frame['sentiment_score']
+            rolling_mean = scores.rolling(window=window, min_periods=1).mean()
+            rolling_std = scores.rolling(window=window, min_periods=1).std()
+            z_score = (scores - rolling_mean) / rolling_std
+            
+            frame = frame.assign(z_score=z_score).iloc[carried:]
+            found = frame[abs(frame['z_score']) > threshold]
+            spikes.extend(found[['timestamp', 'sentiment_score', 'z_score', 'text']].to_dict('records'))
+            
+            tail = pd.concat([carry, chunk], ignore_index=True) if carry is not None else chunk
+            carry = tail.iloc[-(window - 1):] if window > 1 else None
+        
+        return spikes
+    
+    def calculate_sentiment_volatility_chunked(self, store, ticker, window_hours=24, start=None, end=None):
+        """
+        Sentiment volatility from hourly partial aggregates of a PartitionedPostStore
+        """
+        cube = store.build_cube(ticker=ticker, start=start, end=end)
+        return self.calculate_sentiment_volatility_cube(cube, ticker, window_hours=window_hours)
+    
+    def calculate_sentiment_volatility_cube(self, cube, ticker, start=None, window_hours=24):
+        """
+        Sentiment volatility from the hourly buckets of a SentimentCube
+        """
+        hourly = cube.rollup('bucket', ticker=ticker, start=start)
+        if hourly.empty or hourly['count'].sum() == 0:
+            return 0
+        
+        occupied = np.flatnonzero(hourly['count'].to_numpy() > 0)
+        hourly_sentiment = hourly['avg_sentiment'].iloc[occupied[0]:occupied[-1] + 1]
+        # Hours no ticker posted in are absent from the cube; resample() would hold them as NaN
+        buckets = pd.DatetimeIndex(hourly['bucket'].iloc[occupied[0]:occupied[-1] + 1])
+        hourly_sentiment = pd.Series(hourly_sentiment.to_numpy(), index=buckets).reindex(
+            pd.date_range(buckets[0], buckets[-1], freq=cube.freq)
+        )
+        volatility = hourly_sentiment.rolling(window=window_hours, min_periods=1).std().mean()
+        
+        return volatility if not np.isnan(volatility) else 0
+    
+    def calculate_sentiment_volatility_tiered(self, tiered_store, ticker, window_hours=24, start=None, end=None):
+        """
+        Sentiment volatility from a TieredSentimentStore's hourly rollups
+        """
+        # Rollup buckets are kept whole, so start on the hour that holds it
+        start = pd.Timestamp(start).floor('1H') if start is not None else None
+        hourly = tiered_store.aggregate(ticker, freq='1H', start=start, end=end)
+        if hourly.empty:
+            return 0
+        
+        volatility = hourly['avg_sentiment'].rolling(window=window_hours, min_periods=1).std().mean()
+        
+        return volatility if not np.isnan(volatility) else 0
+    
+    def merge_stock_and_sentiment_tiered(self, stock_df, tiered_store, ticker, start=None, end=None):
+        """
+        Merge stock prices with hourly sentiment stitched from every retention tier
+        Only buckets inside the price range (and start/end, if given) are read
+        """
+        stock_ticker = stock_df[stock_df['Ticker'] == ticker].copy()
+        
+        if stock_ticker.empty:
+            return pd.DataFrame()
+        
+        if 'Datetime' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Datetime'])
+        elif 'Date' in stock_ticker.columns:
+            stock_ticker['timestamp'] = pd.to_datetime(stock_ticker['Date'])
+        
+        stock_ticker.set_index('timestamp', inplace=True)
+        
+        # Bounds in the bars' wall-clock time, like the chunked merge
+        tz = stock_ticker.index.tz
+        local_index = stock_ticker.index.tz_localize(None) if tz is not None else stock_ticker.index
+        first = local_index.min().floor('1H')
+        last = local_index.max().floor('1H') + pd.Timedelta(hours=1) - pd.Timedelta(1)
+        start = max(first, pd.Timestamp(start)) if start is not None else first
+        end = min(last, pd.Timestamp(end)) if end is not None else last
+        hourly = tiered_store.aggregate(ticker, freq='1H', start=start, end=end)
+        if hourly.empty:
+            stock_ticker['avg_sentiment'] = 0
+            stock_ticker['mention_count'] = 0
+            stock_ticker.reset_index(inplace=True)
+            return stock_ticker
+        
+        buckets = pd.DatetimeIndex(hourly['timestamp'])
+        if buckets.tz is None:
+            buckets = self._localize_buckets(buckets, tz)
+        else:
+            buckets = buckets.tz_convert(tz) if tz is not None else buckets.tz_localize(None)
+        sentiment_hourly = hourly[['avg_sentiment', 'avg_confidence', 'mention_count']].set_index(buckets.rename('timestamp'))
+        sentiment_hourly = sentiment_hourly[sentiment_hourly.index.notna()]
+        merged = stock_ticker.join(sentiment_hourly, how='left')
+        merged['avg_sentiment'] = merged['avg_sentiment'].fillna(0)
+        merged['mention_count'] = merged['mention_count'].fillna(0)
+        merged['avg_confidence'] = merged['avg_confidence'].fillna(0)
+        
+        merged.reset_index(inplace=True)
+        return merged
+    
+    @instrument('processor.calculate_sentiment_volatility')
+    def calculate_sentiment_volatility(self, sentiment_df, ticker, window_hours=24, start=None):
         """
         Calculate sentiment volatility over time
+        Streams from the post store instead once the ticker's history reaches chunked_rows posts;
+        a window start before the posts held raw (see DataHub retention) reads the retention tiers
         """
+        store = self._chunked_store(sentiment_df, ticker)
+        if store is not None:
+            timestamps = sentiment_df['timestamp']
+            return self.calculate_sentiment_volatility_chunked(store, ticker, window_hours, timestamps.min(), timestamps.max())
+        
+        tiered = self._tiered_store(start)
+        if tiered is not None:
+            end = sentiment_df['timestamp'].max() if sentiment_df is not None and not sentiment_df.empty else None
+            return self.calculate_sentiment_volatility_tiered(tiered, ticker, window_hours, start=start, end=end)
+        
         ticker_data = sentiment_df[sentiment_df['ticker'] == ticker].copy()
         
         if ticker_data.empty:
@@ -157,17 +704,20 @@ class DataProcessor:
         
         return volatility if not np.isnan(volatility) else 0
     
-    def get_sentiment_summary(self, sentiment_df, stock_df, ticker):
+    @instrument('processor.get_sentiment_summary')
+    def get_sentiment_summary(self, sentiment_df, stock_df, ticker, merged=None):
         """
         Get comprehensive sentiment summary for a ticker
+        A merge the caller already holds for the same frames (e.g. a cached panel) is reused
         """
         # Merge data
-        merged = self.merge_stock_and_sentiment(stock_df, sentiment_df, ticker)
+        if merged is None:
+            merged = self.merge_stock_and_sentiment(stock_df, sentiment_df, ticker)
         
         # Calculate metrics
         correlation = self.calculate_correlation(merged)
         leading_corr = self.calculate_leading_indicators(merged, lag_hours=1)
-        volatility = self.calculate_sentiment_volatility(sentiment_df, ticker)
+        volatility = self.calculate_sentiment_volatility(sentiment_df, ticker, start=self._first_bar(stock_df, ticker))
         spikes = self.detect_sentiment_spikes(sentiment_df, ticker)
         
         # Get latest sentiment
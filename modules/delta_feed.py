@@ -0,0 +1,76 @@
+"""
+Delta Feed
+Cursor-based change log over the data hub
+"""
+import threading
+from collections import deque
+import pandas as pd
+
+
+class DeltaFeed:
+    """
+    Rows ingested by the hub, kept per version so a consumer holding a
+    cursor (the hub version it last saw) can fetch only what changed since.
+    The log keeps the most recent max_entries publishes. Newly covered
+    tickers and longer history arrive as rows like any other publish, so
+    they can be older than rows already seen. A cursor older than the log,
+    or from before a rebuild of the hub's snapshot, can no longer be served
+    incrementally; those consumers are told to take a compacted snapshot instead.
+    """
+    
+    def __init__(self, hub, max_entries=288):
+        self.hub = hub
+        self.max_entries = max_entries
+        self._log = deque()
+        self._lock = threading.Lock()
+        # Oldest cursor that can still be answered with a delta, and the newest one handed out
+        self.floor = hub.version
+        self.version = hub.version
+        hub.add_listener(self._on_publish)
+    
+    def _on_publish(self, version, new_bars, new_posts):
+        with self._lock:
+            if new_bars is None and new_posts is None:
+                self._log.clear()
+                self.floor = version
+            else:
+                self._log.append((version, new_bars, new_posts))
+                while len(self._log) > self.max_entries:
+                    self.floor = self._log.popleft()[0]
+            self.version = version
+    
+    def rows_since(self, cursor, tickers=None):
+        """
+        (new cursor, new bars, new posts) since cursor, restricted to tickers
+        Returns None when the cursor cannot be served and a snapshot is needed
+        """
+        with self._lock:
+            if cursor is None or not self.floor <= cursor <= self.version:
+                return None
+            entries = [(bars, posts) for version, bars, posts in self._log if version > cursor]
+            version = self.version
+        
+        bars = self._concat([bars for bars, _ in entries], 'Ticker', tickers)
+        posts = self._concat([posts for _, posts in entries], 'ticker', tickers)
+        return version, bars, posts
+    
+    def _concat(self, parts, ticker_column, tickers):
+        parts = [part for part in parts if part is not None and not part.empty]
+        if not parts:
+            return pd.DataFrame()
+        combined = pd.concat(parts, ignore_index=True)
+        if tickers is not None:
+            combined = combined[combined[ticker_column].isin(list(tickers))].reset_index(drop=True)
+        return combined
+    
+    def stats(self):
+        """
+        Log depth for monitoring
+        """
+        with self._lock:
+            return {
+                'entries': len(self._log),
+                'floor': self.floor,
+                'version': self.version,
+                'rows': sum(len(bars) + len(posts) for _, bars, posts in self._log)
+            }
\ No newline at end of file
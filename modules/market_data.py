@@ -0,0 +1,381 @@
+"""
+Market Data Providers
+Pluggable sources of price bars and quotes: yfinance, a seeded simulator, and record/replay of local columnar files
+"""
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from modules.segment_store import SegmentStore
+from modules.yahoo_http import YahooHTTPTicker
+
+BAR_COLUMNS = ['Datetime', 'Open', 'High', 'Low', 'Close', 'Volume', 'Ticker']
+
+BASE_PRICES = {
+    'AAPL': 180.0,
+    'TSLA': 250.0,
+    'MSFT': 380.0,
+    'GOOGL': 140.0,
+    'AMZN': 150.0
+}
+
+COMPANY_NAMES = {
+    'AAPL': 'Apple Inc.',
+    'TSLA': 'Tesla, Inc.',
+    'MSFT': 'Microsoft Corporation',
+    'GOOGL': 'Alphabet Inc.',
+    'AMZN': 'Amazon.com, Inc.'
+}
+
+DEFAULT_REPLAY_DIR = 'data/replay'
+
+
+def period_days(period):
+    """
+    Days covered by a period string such as '7d' or '1mo'
+    """
+    if period.endswith('mo'):
+        return int(period[:-2]) * 31
+    return int(period.rstrip('d'))
+
+
+def empty_bars():
+    return pd.DataFrame({column: pd.Series(dtype='float64') for column in BAR_COLUMNS})
+
+
+def align_timestamp(timestamp, tz):
+    """
+    Localize or strip a timestamp's timezone to compare with an index in tz
+    """
+    if tz is not None and timestamp.tzinfo is None:
+        return timestamp.tz_localize(tz)
+    if tz is None and timestamp.tzinfo is not None:
+        return timestamp.tz_convert(None)
+    return timestamp
+
+
+class MarketDataProvider:
+    """
+    Source of hourly OHLCV bars and latest quotes.
+    history() returns the collector's bar frame (BAR_COLUMNS), empty when
+    the source has nothing for the request; with period it covers the last
+    N days, with start it covers (start, end]. start_price and end_price
+    only guide simulated sources: the price a continuation starts from, or
+    the price that earlier history must close at to meet later bars.
+    quote() returns the collector's stock-info dict, or None when unavailable. Failures may
+    raise; DataCollector retries and falls back to the simulator.
+    """
+    name = 'base'
+    
+    def history(self, ticker, period=None, start=None, end=None, interval='1h', start_price=None, end_price=None):
+        raise NotImplementedError
+    
+    def quote(self, ticker):
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live bars and quotes from Yahoo through yfinance, or through a plain
+    HTTP client when base_url points at a Yahoo-compatible server
+    """
+    name = 'yfinance'
+    
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+    
+    def _ticker(self, ticker):
+        if self.base_url:
+            return YahooHTTPTicker(ticker, self.base_url)
+        # yfinance is imported on first fetch; it is slow to import and unused in simulated runs
+        import yfinance as yf
+        return yf.Ticker(ticker)
+    
+    def history(self, ticker, period=None, start=None, end=None, interval='1h', start_price=None, end_price=None):
+        stock = self._ticker(ticker)
+        if start is not None:
+            start = pd.Timestamp(start)
+            end = pd.Timestamp(end) if end is not None else None
+            query_end = (end + pd.Timedelta(days=1)).strftime('%Y-%m-%d') if end is not None else None
+            df = stock.history(start=(start - pd.Timedelta(days=1)).strftime('%Y-%m-%d'), end=query_end, interval=interval)
+            if df.empty:
+                return empty_bars()
+            mask = df.index > align_timestamp(start, df.index.tz)
+            if end is not None:
+                mask &= df.index <= align_timestamp(end, df.index.tz)
+            df = df[mask]
+        else:
+            # Intraday history is sometimes empty for short periods; try longer ones and trim
+            for p in [period, '5d', '1mo', '3mo']:
+                df = stock.history(period=p, interval=interval)
+                if not df.empty:
+                    break
+            if df.empty:
+                return empty_bars()
+            if p != period:
+                cutoff = pd.Timestamp(datetime.now() - timedelta(days=period_days(period)))
+                df = df[df.index >= align_timestamp(cutoff, df.index.tz)]
+        
+        df = df.copy()
+        df['Ticker'] = ticker
+        df.reset_index(inplace=True)
+        return df
+    
+    def quote(self, ticker):
+        info = self._ticker(ticker).info
+        
+        # Try to get current price from info
+        current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+        if not info or current_price == 0:
+            return None
+        return {
+            'ticker': ticker,
+            'current_price': current_price,
+            'previous_close': info.get('previousClose', 0),
+            'market_cap': info.get('marketCap', 0),
+            'volume': info.get('volume', 0),
+            'company_name': info.get('longName', ticker)
+        }
+
+
+class SimulatedProvider(MarketDataProvider):
+    """
+    Vectorized random-walk bars over market hours, and matching quotes.
+    Unseeded, every call draws fresh prices as the original fallback did.
+    With a seed, each series is drawn from a generator keyed on (seed,
+    ticker, first bar) and timestamps count from a fixed anchor (default:
+    the current hour), so the same requests give bit-for-bit identical
+    frames across runs and processes, whatever order tickers are fetched in.
+    """
+    name = 'simulated'
+    
+    def __init__(self, seed=None, anchor=None):
+        self.seed = seed
+        if anchor is None and seed is not None:
+            anchor = pd.Timestamp(datetime.now()).floor('h')
+        self.anchor = pd.Timestamp(anchor).to_pydatetime() if anchor is not None else None
+    
+    def now(self):
+        return self.anchor if self.anchor is not None else datetime.now()
+    
+    def rng(self, *key):
+        """
+        Generator for one draw: fresh entropy unseeded, else derived from the seed and key
+        """
+        if self.seed is None:
+            return np.random.default_rng()
+        return np.random.default_rng([int(self.seed), *(zlib.crc32(str(part).encode()) for part in key)])
+    
+    def market_hours(self, start, end):
+        """
+        Hourly timestamps in (start, end] that fall in market hours (9 AM - 4 PM, Mon-Fri)
+        """
+        start = align_timestamp(pd.Timestamp(start), None)
+        end = align_timestamp(pd.Timestamp(end), None)
+        stamps = pd.date_range(start + pd.Timedelta(hours=1), end, freq='h')
+        return stamps[(stamps.weekday < 5) & (stamps.hour >= 9) & (stamps.hour <= 16)]
+    
+    def bars(self, ticker, timestamps, start_price):
+        """
+        OHLCV bars for the given timestamps starting from a price
+        """
+        if len(timestamps) == 0:
+            return empty_bars()
+        rng = self.rng('bars', ticker, pd.Timestamp(timestamps[0]).value)
+        n = len(timestamps)
+        # Random walk with slight upward bias, 0.5% intraday volatility
+        close = start_price * np.cumprod(1 + rng.normal(0.001, 0.01, n))
+        volatility = close * 0.005
+        open_ = close + rng.normal(0, 1, n) * volatility
+        high = np.maximum(close, open_) + np.abs(rng.normal(0, 1, n)) * volatility
+        low = np.minimum(close, open_) - np.abs(rng.normal(0, 1, n)) * volatility
+        return pd.DataFrame({
+            'Datetime': pd.DatetimeIndex(timestamps).to_pydatetime(),
+            'Open': open_,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Volume': rng.integers(1_000_000, 10_000_000, n),
+            'Ticker': ticker
+        }, columns=BAR_COLUMNS)
+    
+    def history(self, ticker, period=None, start=None, end=None, interval='1h', start_price=None, end_price=None):
+        if start is None:
+            end = self.now()
+            # The window starts on the current minute so it lines up with earlier unseeded output
+            start = end - timedelta(days=period_days(period or '7d')) - timedelta(hours=1)
+        elif end is None:
+            end = self.now()
+        if end_price is not None:
+            bars = self.bars(ticker, self.market_hours(start, end), end_price)
+            if not bars.empty:
+                # History before a held bar: scale the walk so its last close meets that bar's open
+                bars[['Open', 'High', 'Low', 'Close']] *= end_price / bars['Close'].iloc[-1]
+            return bars
+        if start_price is None:
+            start_price = BASE_PRICES.get(ticker, 100.0) if period is not None else self.quote(ticker)['current_price']
+        return self.bars(ticker, self.market_hours(start, end), start_price)
+    
+    def quote(self, ticker):
+        rng = self.rng('quote', ticker, pd.Timestamp(self.now()).floor('h').value)
+        current_price = BASE_PRICES.get(ticker, 100.0) * (1 + rng.normal(0, 0.02))
+        previous_close = current_price * (1 + rng.normal(-0.01, 0.02))
+        return {
+            'ticker': ticker,
+            'current_price': current_price,
+            'previous_close': previous_close,
+            'market_cap': int(current_price * 1e9),  # Simulated market cap
+            'volume': int(rng.uniform(50000000, 100000000)),
+            'company_name': COMPANY_NAMES.get(ticker, ticker)
+        }
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Bars and quotes captured by RecordingProvider, served from a memory-mapped
+    SegmentStore without network access. Recorded timestamps are moved
+    forward by whole weeks so the newest bar falls within the last week,
+    keeping weekday and session hours intact while the dashboard's rolling
+    windows see current-looking data; shift=False serves them as recorded.
+    """
+    name = 'replay'
+    
+    def __init__(self, root=DEFAULT_REPLAY_DIR, shift=True):
+        self.root = root
+        if not os.path.exists(os.path.join(root, 'bars', 'manifest.json')):
+            raise FileNotFoundError(f"No market data recording in {root}")
+        self.store = SegmentStore.for_bars(os.path.join(root, 'bars'))
+        with open(os.path.join(root, 'meta.json')) as f:
+            meta = json.load(f)
+        self.timezones = meta.get('timezones', {})
+        self.quotes = meta.get('quotes', {})
+        self.offset = pd.Timedelta(0)
+        if shift and self.store.segments:
+            newest = pd.Timestamp(max(segment['max_ts'] for segment in self.store.segments))
+            weeks = (pd.Timestamp(datetime.now()) - newest) // pd.Timedelta(weeks=1)
+            self.offset = pd.Timedelta(weeks=max(int(weeks), 0))
+    
+    def _stored(self, timestamp, tz):
+        """
+        A query bound in the store's clock: naive UTC for tz-aware recordings
+        """
+        timestamp = pd.Timestamp(timestamp)
+        if tz is not None:
+            timestamp = align_timestamp(timestamp, tz).tz_convert(None)
+        else:
+            timestamp = align_timestamp(timestamp, None)
+        return timestamp - self.offset
+    
+    def history(self, ticker, period=None, start=None, end=None, interval='1h', start_price=None, end_price=None):
+        tz = self.timezones.get(ticker)
+        end = end if end is not None else datetime.now()
+        if start is None:
+            start = pd.Timestamp(end) - pd.Timedelta(days=period_days(period or '7d'))
+        frame = self.store.query_frame(ticker, self._stored(start, tz), self._stored(end, tz))
+        if frame.empty:
+            return empty_bars()
+        # query_frame bounds are inclusive; history covers (start, end]
+        frame = frame[frame['timestamp'] > self._stored(start, tz)]
+        
+        timestamps = pd.DatetimeIndex(frame['timestamp']) + self.offset
+        if tz is not None:
+            timestamps = timestamps.tz_localize('UTC').tz_convert(tz)
+        return pd.DataFrame({
+            'Datetime': timestamps,
+            'Open': frame['Open'].to_numpy(),
+            'High': frame['High'].to_numpy(),
+            'Low': frame['Low'].to_numpy(),
+            'Close': frame['Close'].to_numpy(),
+            'Volume': frame['Volume'].to_numpy().astype('int64'),
+            'Ticker': ticker
+        }, columns=BAR_COLUMNS)
+    
+    def quote(self, ticker):
+        quote = self.quotes.get(ticker)
+        return dict(quote) if quote is not None else None
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Passes requests to another provider and captures what it returns for ReplayProvider
+    Only bars outside the range already recorded for a ticker are appended,
+    so overlapping fetches do not duplicate rows.
+    """
+    
+    def __init__(self, inner, root=DEFAULT_REPLAY_DIR):
+        self.inner = inner
+        self.name = f'{inner.name}+record'
+        self.root = root
+        self.store = SegmentStore.for_bars(os.path.join(root, 'bars'), segment_rows=4096)
+        meta_path = os.path.join(root, 'meta.json')
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        self.timezones = meta.get('timezones', {})
+        self.quotes = meta.get('quotes', {})
+        self._recorded = {}
+    
+    def _recorded_range(self, ticker):
+        if ticker not in self._recorded:
+            held = self.store.query_frame(ticker, columns=['timestamp'])['timestamp']
+            self._recorded[ticker] = (held.min(), held.max()) if not held.empty else None
+        return self._recorded[ticker]
+    
+    def history(self, ticker, period=None, start=None, end=None, interval='1h', start_price=None, end_price=None):
+        bars = self.inner.history(ticker, period=period, start=start, end=end, interval=interval,
+                                  start_price=start_price, end_price=end_price)
+        if bars.empty:
+            return bars
+        timestamps = pd.to_datetime(bars['Datetime'])
+        if timestamps.dt.tz is not None:
+            self.timezones[ticker] = str(timestamps.dt.tz)
+            timestamps = timestamps.dt.tz_convert(None)
+        held = self._recorded_range(ticker)
+        new = bars if held is None else bars[((timestamps < held[0]) | (timestamps > held[1])).to_numpy()]
+        if not new.empty:
+            self.store.append(new)
+            self.store.flush()
+            stored = timestamps.loc[new.index]
+            self._recorded[ticker] = (stored.min(), stored.max()) if held is None else (min(held[0], stored.min()), max(held[1], stored.max()))
+            self._write_meta()
+        return bars
+    
+    def quote(self, ticker):
+        quote = self.inner.quote(ticker)
+        if quote is not None:
+            self.quotes[ticker] = {key: value.item() if isinstance(value, np.generic) else value for key, value in quote.items()}
+            self._write_meta()
+        return quote
+    
+    def _write_meta(self):
+        path = os.path.join(self.root, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'timezones': self.timezones, 'quotes': self.quotes}, f)
+        os.replace(path + '.tmp', path)
+
+
+def create_provider(name=None, seed=None):
+    """
+    Provider from MARKET_DATA_PROVIDER ('yfinance', 'simulated' or 'replay'),
+    seeded by MARKET_DATA_SEED, and recorded to MARKET_DATA_RECORD_DIR when set
+    """
+    name = name or os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+    if seed is None and os.environ.get('MARKET_DATA_SEED'):
+        seed = int(os.environ['MARKET_DATA_SEED'])
+    
+    if name == 'yfinance':
+        provider = YFinanceProvider(os.environ.get('MARKET_DATA_URL'))
+    elif name == 'simulated':
+        provider = SimulatedProvider(seed=seed, anchor=os.environ.get('MARKET_DATA_ANCHOR'))
+    elif name == 'replay':
+        provider = ReplayProvider(os.environ.get('MARKET_DATA_REPLAY_DIR', DEFAULT_REPLAY_DIR))
+    else:
+        raise ValueError(f"Unknown market data provider: {name}")
+    
+    if os.environ.get('MARKET_DATA_RECORD_DIR'):
+        provider = RecordingProvider(provider, os.environ['MARKET_DATA_RECORD_DIR'])
+    return provider
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Memory Budget
+Accounting of session and process data, with LRU eviction and downcasting under a budget
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+
+def deep_bytes(value, _seen=None, _depth=0):
+    """
+    Approximate memory held by a value: deep memory_usage for pandas objects,
+    nbytes for arrays, and a bounded walk through containers and object attributes
+    Objects reachable twice are counted once
+    """
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    size = sys.getsizeof(value, 0)
+    if _depth >= 6 or isinstance(value, (str, bytes, int, float, bool)):
+        return size
+    if isinstance(value, dict):
+        return size + sum(deep_bytes(k, _seen, _depth + 1) + deep_bytes(v, _seen, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(deep_bytes(v, _seen, _depth + 1) for v in value)
+    if hasattr(value, '__dict__'):
+        return size + deep_bytes(vars(value), _seen, _depth + 1)
+    return size
+
+
+def downcast_frame(df):
+    """
+    Shrink a DataFrame's numeric columns in place: float64 to float32, int64 to the smallest integer type
+    String columns are left alone, since categories would change groupby results
+    Returns the bytes saved
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    for column in df.columns:
+        series = df[column]
+        if series.dtype == np.float64:
+            df[column] = series.astype(np.float32)
+        elif series.dtype == np.int64:
+            df[column] = pd.to_numeric(series, downcast='integer')
+    return before - int(df.memory_usage(deep=True).sum())
+
+
+def process_rss():
+    """
+    Resident set size of this process in bytes, or None when unavailable
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class SessionMemory:
+    """
+    Ledger of one dashboard session's data, held in its session state.
+    It references the session's frames and panel registry so the process
+    budget can measure and shrink them; the budget keeps only a weak
+    reference, so a closed session's data is freed as usual.
+    """
+    
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.frames = {}
+        self.panel_registry = None
+        self.last_access = time.time()
+        self.downcast = set()
+        self._sizes = {}
+        # The main script run and any fragment reruns in progress; shrinking holds the same lock
+        self._lock = threading.Lock()
+        self._script_running = False
+        self._fragments_running = 0
+    
+    def track(self, frames, panel_registry=None):
+        """
+        Point the ledger at the session's current data
+        """
+        self.frames = {name: value for name, value in frames.items() if value is not None}
+        self.downcast &= {id(value) for value in self.frames.values()}
+        if panel_registry is not None:
+            self.panel_registry = panel_registry
+        self.last_access = time.time()
+    
+    def begin_run(self, frames, panel_registry=None):
+        """
+        Track the session's data at the start of a script run; a running session is never downcast
+        """
+        self.track(frames, panel_registry)
+        with self._lock:
+            self._script_running = True
+    
+    def end_run(self):
+        with self._lock:
+            self._script_running = False
+    
+    @contextmanager
+    def running(self):
+        """
+        Mark the session busy for a fragment rerun, which skips begin_run/end_run
+        Waits for a downcast already in progress, so the fragment never sees one half done
+        """
+        with self._lock:
+            self._fragments_running += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._fragments_running -= 1
+    
+    @property
+    def busy(self):
+        return self._script_running or self._fragments_running > 0
+    
+    def _size(self, value):
+        # Frames are replaced rather than mutated, so (id, length) identifies a measurement
+        key = (id(value), len(value) if hasattr(value, '__len__') else None)
+        if key not in self._sizes:
+            self._sizes = {k: v for k, v in self._sizes.items() if k[0] in {id(f) for f in self.frames.values()}}
+            self._sizes[key] = deep_bytes(value)
+        return self._sizes[key]
+    
+    def account(self):
+        """
+        Bytes per tracked item, cached panels included
+        """
+        usage = {name: self._size(value) for name, value in self.frames.items()}
+        usage['panels'] = self.panel_registry.cache_bytes() if self.panel_registry is not None else 0
+        return usage
+    
+    def shrink_frames(self):
+        """
+        Downcast the session's frames that have not been downcast yet; returns bytes saved
+        """
+        saved = 0
+        with self._lock:
+            # Re-checked under the lock: a run may have started since the budget looked
+            if self.busy:
+                return 0
+            for name, value in self.frames.items():
+                if isinstance(value, pd.DataFrame) and id(value) not in self.downcast:
+                    saved += downcast_frame(value)
+                    self.downcast.add(id(value))
+                    self._sizes.pop((id(value), len(value)), None)
+        return saved
+
+
+class MemoryBudget:
+    """
+    Process-wide memory accounting with a soft limit.
+    Totals cover every live session's frames and cached panels plus the
+    shared hub snapshot. When the total exceeds the budget, sessions are
+    shrunk least recently used first: cached panel results are evicted
+    (they are recomputed on demand), then the numeric columns of idle
+    sessions' frames are downcast. The hub snapshot is shared and never shrunk.
+    """
+    
+    def __init__(self, limit_bytes=None, hub=None):
+        if limit_bytes is None:
+            limit_bytes = int(float(os.environ.get('SENTIMENT_MEMORY_BUDGET_MB', '1024')) * 1024 * 1024)
+        self.limit_bytes = limit_bytes
+        self.hub = hub
+        self._sessions = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._hub_size = (None, 0)
+        self.actions = []
+    
+    def attach(self, ledger):
+        with self._lock:
+            self._sessions[ledger.session_id] = ledger
+    
+    def _hub_bytes(self):
+        if self.hub is None:
+            return 0
+        stock_data, sentiment_data = self.hub.snapshot()
+        key = (id(stock_data), id(sentiment_data))
+        if self._hub_size[0] != key:
+            self._hub_size = (key, deep_bytes(stock_data) + deep_bytes(sentiment_data))
+        return self._hub_size[1]
+    
+    def usage(self):
+        """
+        Per-session rows (least recently used first) and process totals
+        """
+        with self._lock:
+            ledgers = sorted(self._sessions.values(), key=lambda ledger: ledger.last_access)
+        sessions = []
+        for ledger in ledgers:
+            row = {'session': ledger.session_id[:8], 'idle_s': time.time() - ledger.last_access}
+            row.update(ledger.account())
+            row['total'] = sum(v for k, v in row.items() if k not in ('session', 'idle_s'))
+            sessions.append(row)
+        hub_bytes = self._hub_bytes()
+        return sessions, {
+            'sessions': len(sessions),
+            'session_bytes': sum(row['total'] for row in sessions),
+            'hub_bytes': hub_bytes,
+            'total_bytes': sum(row['total'] for row in sessions) + hub_bytes,
+            'limit_bytes': self.limit_bytes,
+            'rss_bytes': process_rss()
+        }
+    
+    def enforce(self):
+        """
+        Shrink least recently used sessions until the accounted total fits the budget
+        Returns the actions taken
+        """
+        sessions, totals = self.usage()
+        excess = totals['total_bytes'] - self.limit_bytes
+        if excess <= 0:
+            return []
+        
+        with self._lock:
+            ledgers = sorted(self._sessions.values(), key=lambda ledger: ledger.last_access)
+        actions = []
+        # Cached analytics go first; frames are only downcast if that was not enough
+        for ledger in ledgers:
+            if excess <= 0:
+                break
+            if ledger.panel_registry is not None:
+                freed = ledger.panel_registry.evict_bytes(excess)
+                if freed:
+                    excess -= freed
+                    actions.append({'session': ledger.session_id[:8], 'action': 'evicted panels', 'bytes': freed})
+        for ledger in ledgers:
+            if excess <= 0:
+                break
+            if ledger.busy:
+                continue
+            saved = ledger.shrink_frames()
+            if saved:
+                excess -= saved
+                actions.append({'session': ledger.session_id[:8], 'action': 'downcast frames', 'bytes': saved})
+        if excess > 0:
+            print(f"Warning: Memory budget exceeded by {excess / 1e6:.1f} MB after evicting cached analytics")
+        self.actions = (self.actions + actions)[-50:]
+        return actions
+    
+    def tracemalloc_snapshot(self, limit=10):
+        """
+        Top allocation sites by size; starts tracing on first call, so earlier allocations are not seen
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ])
+        return [
+            {'site': str(stat.traceback[0]), 'size_mb': stat.size / 1e6, 'blocks': stat.count}
+            for stat in snapshot.statistics('lineno')[:limit]
+        ]
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Top Mentions Index
+Keeps bounded per-ticker heaps of the most positive and most negative posts
+"""
+import heapq
+import itertools
+import pandas as pd
+import numpy as np
+
+
+class TopMentionsIndex:
+    """
+    Streaming top-K index of mentions per ticker.
+    Each ticker has an all-time heap pair plus one heap pair per time bucket,
+    so both full-history and windowed (e.g. last 24h) queries only ever touch
+    K records per bucket, independent of how many posts have been ingested.
+    """
+    RECORD_COLUMNS = ['timestamp', 'text', 'sentiment_score', 'source']
+    
+    def __init__(self, capacity=10, bucket='1H'):
+        self.capacity = capacity
+        self.bucket = bucket
+        self._all_time = {}
+        self._buckets = {}
+        self._sequence = itertools.count()
+    
+    def _new_heaps(self):
+        return {'positive': [], 'negative': []}
+    
+    def _push(self, heaps, record):
+        """
+        Push a record into a bounded heap pair
+        Heaps are min-heaps on the signed key so the root is the weakest entry
+        """
+        score = record['sentiment_score']
+        seq = next(self._sequence)
+        for sentiment_type, key in (('positive', score), ('negative', -score)):
+            heap = heaps[sentiment_type]
+            entry = (key, seq, record)
+            if len(heap) < self.capacity:
+                heapq.heappush(heap, entry)
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+    
+    def add_posts(self, sentiment_df):
+        """
+        Ingest a batch of posts
+        Only the K strongest candidates per (ticker, bucket) reach the heaps
+        """
+        if sentiment_df is None or sentiment_df.empty:
+            return self
+        
+        columns = [c for c in self.RECORD_COLUMNS if c in sentiment_df.columns]
+        posts = sentiment_df[columns + ['ticker']].copy()
+        posts['timestamp'] = pd.to_datetime(posts['timestamp'])
+        posts['_bucket'] = posts['timestamp'].dt.floor(self.bucket)
+        
+        for (ticker, bucket), group in posts.groupby(['ticker', '_bucket'], sort=False):
+            scores = group['sentiment_score'].to_numpy()
+            if len(scores) > 2 * self.capacity:
+                k = self.capacity
+                candidates = np.union1d(np.argpartition(-scores, k - 1)[:k], np.argpartition(scores, k - 1)[:k])
+                group = group.iloc[candidates]
+            
+            bucket_heaps = self._buckets.setdefault(ticker, {}).setdefault(bucket, self._new_heaps())
+            ticker_heaps = self._all_time.setdefault(ticker, self._new_heaps())
+            for record in group[columns].to_dict('records'):
+                self._push(bucket_heaps, record)
+                self._push(ticker_heaps, record)
+        
+        return self
+    
+    def expire(self, before):
+        """
+        Drop windowed buckets older than the given timestamp
+        The all-time heaps are unaffected
+        """
+        cutoff = pd.Timestamp(before).floor(self.bucket)
+        for ticker_buckets in self._buckets.values():
+            for bucket in [b for b in ticker_buckets if b < cutoff]:
+                del ticker_buckets[bucket]
+    
+    def top(self, ticker, top_n=5, sentiment_type='positive', since=None):
+        """
+        Return the top mentions for a ticker, strongest first
+        Returns None when top_n exceeds the index capacity so callers can fall back
+        """
+        if top_n > self.capacity:
+            return None
+        
+        sentiment_type = 'positive' if sentiment_type == 'positive' else 'negative'
+        
+        if since is None:
+            heaps = self._all_time.get(ticker)
+            entries = heaps[sentiment_type] if heaps else []
+        else:
+            # Windows are resolved to bucket boundaries
+            cutoff = pd.Timestamp(since).floor(self.bucket)
+            entries = [
+                entry
+                for bucket, heaps in self._buckets.get(ticker, {}).items() if bucket >= cutoff
+                for entry in heaps[sentiment_type]
+            ]
+        
+        return [entry[2] for entry in heapq.nlargest(top_n, entries)]
+    
+    def tickers(self):
+        return list(self._all_time.keys())
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Sentiment Momentum Tracker
+Maintains windowed running sums so momentum queries avoid rescanning posts
+"""
+import pandas as pd
+import numpy as np
+
+
+class SentimentMomentumTracker:
+    """
+    Incremental sentiment momentum per ticker.
+    Posts are folded into a dense (ticker x time bucket) grid of sums and
+    counts. Prefix sums over that grid turn the recent/previous split used by
+    SentimentAnalyzer.calculate_sentiment_momentum into two O(1) lookups, and
+    buckets older than the retention horizon are folded into a per-ticker base
+    aggregate so the "previous" side still covers the full history.
+    """
+    
+    def __init__(self, bucket='1H', horizon_hours=24 * 30):
+        self.bucket = bucket
+        self.bucket_hours = pd.Timedelta(bucket) / pd.Timedelta(hours=1)
+        self.horizon_hours = horizon_hours
+        self.tickers = pd.Index([], dtype=object)
+        self.origin = None
+        self._sums = np.zeros((0, 0))
+        self._counts = np.zeros((0, 0))
+        self._base_sums = np.zeros(0)
+        self._base_counts = np.zeros(0)
+        self._last_bucket = np.zeros(0, dtype=int)
+        self._prefix = None
+    
+    @classmethod
+    def from_frame(cls, sentiment_df, bucket='1H', horizon_hours=24 * 30):
+        """
+        Build a tracker from a sentiment DataFrame
+        """
+        tracker = cls(bucket=bucket, horizon_hours=horizon_hours)
+        tracker.update(sentiment_df)
+        return tracker
+    
+    @property
+    def num_buckets(self):
+        return self._sums.shape[1]
+    
+    def _bucket_position(self, timestamps):
+        return ((timestamps - self.origin) / pd.Timedelta(self.bucket)).astype(int)
+    
+    def update(self, sentiment_df):
+        """
+        Fold newly ingested posts into the running sums
+        """
+        if sentiment_df is None or sentiment_df.empty:
+            return self
+        
+        buckets = pd.to_datetime(sentiment_df['timestamp']).dt.floor(self.bucket)
+        scores = sentiment_df['sentiment_score'].to_numpy(dtype=float)
+        
+        # Grow the ticker axis
+        new_tickers = pd.Index(pd.unique(sentiment_df['ticker'])).difference(self.tickers)
+        if len(new_tickers):
+            grow = len(new_tickers)
+            self.tickers = self.tickers.append(pd.Index(new_tickers, dtype=object))
+            self._sums = np.vstack([self._sums, np.zeros((grow, self.num_buckets))])
+            self._counts = np.vstack([self._counts, np.zeros((grow, self.num_buckets))])
+            self._base_sums = np.concatenate([self._base_sums, np.zeros(grow)])
+            self._base_counts = np.concatenate([self._base_counts, np.zeros(grow)])
+            self._last_bucket = np.concatenate([self._last_bucket, np.full(grow, -1)])
+        
+        # Grow the time axis on either side
+        first, last = buckets.min(), buckets.max()
+        if self.origin is None:
+            self.origin = first
+        if first < self.origin:
+            pad = int((self.origin - first) / pd.Timedelta(self.bucket))
+            self._sums = np.hstack([np.zeros((len(self.tickers), pad)), self._sums])
+            self._counts = np.hstack([np.zeros((len(self.tickers), pad)), self._counts])
+            self._last_bucket = np.where(self._last_bucket >= 0, self._last_bucket + pad, -1)
+            self.origin = first
+        needed = int((last - self.origin) / pd.Timedelta(self.bucket)) + 1
+        if needed > self.num_buckets:
+            pad = needed - self.num_buckets
+            self._sums = np.hstack([self._sums, np.zeros((len(self.tickers), pad))])
+            self._counts = np.hstack([self._counts, np.zeros((len(self.tickers), pad))])
+        
+        rows = self.tickers.get_indexer(sentiment_df['ticker'])
+        cols = self._bucket_position(buckets).to_numpy()
+        np.add.at(self._sums, (rows, cols), scores)
+        np.add.at(self._counts, (rows, cols), 1)
+        np.maximum.at(self._last_bucket, rows, cols)
+        
+        self.expire()
+        self._prefix = None
+        return self
+    
+    def expire(self, before=None):
+        """
+        Fold buckets older than the horizon (or the given time) into the base aggregates
+        """
+        if self.origin is None or self.num_buckets == 0:
+            return
+        if before is None:
+            drop = self.num_buckets - int(np.ceil(self.horizon_hours / self.bucket_hours))
+        else:
+            drop = int((pd.Timestamp(before).floor(self.bucket) - self.origin) / pd.Timedelta(self.bucket))
+        drop = min(max(drop, 0), self.num_buckets)
+        if drop == 0:
+            return
+        
+        self._base_sums += self._sums[:, :drop].sum(axis=1)
+        self._base_counts += self._counts[:, :drop].sum(axis=1)
+        self._sums = self._sums[:, drop:]
+        self._counts = self._counts[:, drop:]
+        # Tickers whose latest bucket was folded into the base have no recent data left
+        self._last_bucket = np.where(self._last_bucket >= drop, self._last_bucket - drop, -1)
+        self.origin = self.origin + drop * pd.Timedelta(self.bucket)
+        self._prefix = None
+    
+    def _prefix_sums(self):
+        """
+        Cumulative sums per ticker, column k covering the base plus the first k buckets
+        """
+        if self._prefix is None:
+            sums = np.hstack([self._base_sums[:, None], self._sums])
+            counts = np.hstack([self._base_counts[:, None], self._counts])
+            self._prefix = (np.cumsum(sums, axis=1), np.cumsum(counts, axis=1))
+        return self._prefix
+    
+    def _momentum_rows(self, rows, window_hours):
+        """
+        Momentum for the given ticker rows from four prefix-sum lookups each
+        """
+        cum_sums, cum_counts = self._prefix_sums()
+        window = max(int(np.ceil(window_hours / self.bucket_hours)), 1)
+        last = self._last_bucket[rows]
+        end = last + 1
+        split = np.maximum(end - window, 0)
+        
+        recent_sum = cum_sums[rows, end] - cum_sums[rows, split]
+        recent_count = cum_counts[rows, end] - cum_counts[rows, split]
+        previous_sum = cum_sums[rows, split]
+        previous_count = cum_counts[rows, split]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            recent = recent_sum / recent_count
+            previous = previous_sum / previous_count
+            momentum = (recent - previous) / np.abs(previous) * 100
+        
+        valid = (recent_count > 0) & (previous_count > 0) & (previous != 0) & (last >= 0)
+        return np.where(valid, momentum, 0.0)
+    
+    def momentum_vector(self, window_hours=24):
+        """
+        Momentum for every tracked ticker as a Series, same formula as
+        SentimentAnalyzer.calculate_sentiment_momentum
+        """
+        if len(self.tickers) == 0:
+            return pd.Series(dtype=float, name='momentum')
+        rows = np.arange(len(self.tickers))
+        return pd.Series(self._momentum_rows(rows, window_hours), index=self.tickers, name='momentum')
+    
+    def momentum(self, ticker, window_hours=24):
+        """
+        Momentum for a single ticker
+        """
+        row = self.tickers.get_indexer([ticker])
+        if row[0] < 0:
+            return 0
+        return float(self._momentum_rows(row, window_hours)[0])
+    
+    def top_movers(self, n=5, window_hours=24):
+        """
+        Tickers ranked by absolute momentum
+        """
+        vector = self.momentum_vector(window_hours)
+        order = np.argsort(-np.abs(vector.to_numpy()), kind='stable')[:n]
+        return vector.iloc[order]
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Panel Registry
+Lazily computed, cached dashboard panels with per-rerun latency accounting
+"""
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+from modules.memory_budget import deep_bytes
+from utils.metrics import record_cache
+
+
+class PanelRegistry:
+    """
+    Named panel computations for the dashboard.
+    Each panel is registered with the inputs it depends on. A result is
+    computed the first time a visible panel asks for it and then cached per
+    (panel, inputs, data version), so reruns triggered by unrelated widgets
+    reuse it. Every request is timed so a rerun can report which panels
+    were computed, served from cache or skipped because they were hidden.
+    The memory budget may evict least recently used results from another
+    session's thread, so cache bookkeeping is done under a lock.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.panels = {}
+        self._cache = OrderedDict()
+        self._compute_seconds = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+        self._nested = []
+        self.timings = []
+    
+    def register(self, name, compute, inputs=()):
+        """
+        Declare a panel: compute(**inputs) produces its result
+        """
+        self.panels[name] = {'compute': compute, 'inputs': tuple(inputs)}
+        return self
+    
+    def begin_run(self):
+        """
+        Start a new latency breakdown
+        """
+        self.timings = []
+    
+    def get(self, name, data_version, **inputs):
+        """
+        Cached result of a panel for the given inputs and data version
+        """
+        panel = self.panels[name]
+        if set(inputs) != set(panel['inputs']):
+            raise ValueError(f"Panel {name} expects inputs {panel['inputs']}, got {tuple(inputs)}")
+        
+        key = (name, data_version) + tuple(self._freeze(inputs[k]) for k in panel['inputs'])
+        started = time.perf_counter()
+        with self._lock:
+            cached = self._cache.get(key, self)
+            if cached is not self:
+                self._cache.move_to_end(key)
+        record_cache('panel', cached is not self)
+        if cached is not self:
+            self.timings.append({
+                'panel': name,
+                'status': 'cached',
+                'ms': (time.perf_counter() - started) * 1000,
+                'saved_ms': self._compute_seconds.get(key, 0.0) * 1000
+            })
+            return cached
+        
+        # Panels built from other panels report only their own time
+        self._nested.append(0.0)
+        try:
+            result = panel['compute'](**inputs)
+        finally:
+            nested = self._nested.pop()
+        elapsed = time.perf_counter() - started
+        if self._nested:
+            self._nested[-1] += elapsed
+        with self._lock:
+            self._cache[key] = result
+            self._compute_seconds[key] = elapsed
+            while len(self._cache) > self.max_entries:
+                self._drop(next(iter(self._cache)))
+        self.timings.append({'panel': name, 'status': 'computed', 'ms': (elapsed - nested) * 1000, 'saved_ms': 0.0})
+        return result
+    
+    def skip(self, *names):
+        """
+        Record panels that were not rendered this run
+        """
+        for name in names:
+            self.timings.append({'panel': name, 'status': 'skipped', 'ms': 0.0, 'saved_ms': 0.0})
+    
+    def invalidate(self, data_version=None):
+        """
+        Drop cached results, or only those not at data_version
+        """
+        with self._lock:
+            for key in list(self._cache):
+                if data_version is None or key[1] != data_version:
+                    self._drop(key)
+    
+    def _drop(self, key):
+        del self._cache[key]
+        self._compute_seconds.pop(key, None)
+        self._bytes.pop(key, None)
+    
+    def cache_bytes(self):
+        """
+        Approximate memory held by cached results
+        """
+        with self._lock:
+            unmeasured = [(key, result) for key, result in self._cache.items() if key not in self._bytes]
+        # Results are not mutated once cached, so each is measured once, outside the lock
+        sizes = {key: deep_bytes(result) for key, result in unmeasured}
+        with self._lock:
+            self._bytes.update((key, size) for key, size in sizes.items() if key in self._cache)
+            return sum(self._bytes.get(key, 0) for key in self._cache)
+    
+    def evict_bytes(self, target):
+        """
+        Drop least recently used results until about target bytes are freed
+        Returns the bytes freed
+        """
+        self.cache_bytes()
+        freed = 0
+        with self._lock:
+            while self._cache and freed < target:
+                key = next(iter(self._cache))
+                freed += self._bytes.get(key, 0)
+                self._drop(key)
+        return freed
+    
+    def latency_breakdown(self):
+        """
+        Per-panel timings for the current run, one row per panel and status
+        """
+        if not self.timings:
+            return pd.DataFrame(columns=['panel', 'status', 'requests', 'ms', 'saved_ms'])
+        timings = pd.DataFrame(self.timings)
+        breakdown = timings.groupby(['panel', 'status'], sort=False).agg(
+            requests=('ms', 'size'), ms=('ms', 'sum'), saved_ms=('saved_ms', 'sum')
+        ).reset_index()
+        return breakdown
+    
+    def _freeze(self, value):
+        if isinstance(value, (list, tuple)):
+            return tuple(self._freeze(v) for v in value)
+        if isinstance(value, dict):
+            return tuple(sorted((k, self._freeze(v)) for k, v in value.items()))
+        return value
\ No newline at end of file
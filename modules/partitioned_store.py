@@ -0,0 +1,198 @@
+"""
+Partitioned Post Store
+Stores sentiment posts on disk partitioned by ticker and date in columnar files
+"""
+import os
+import glob
+import shutil
+import pandas as pd
+import numpy as np
+
+from modules.sentiment_cube import SentimentCube
+
+
+class PartitionedPostStore:
+    """
+    Out-of-core storage for sentiment posts.
+    Layout: <root>/ticker=<TICKER>/date=<YYYY-MM-DD>/part-<N>.<column>.npy
+    Every column is a plain NumPy array (fixed-width strings for text), so
+    partitions can be memory-mapped and streamed one at a time. The
+    timestamp column is written last and marks a part as complete.
+    """
+    COLUMNS = ('timestamp', 'sentiment_score', 'confidence', 'source', 'text')
+    
+    def __init__(self, root='data/posts', chunk_rows=100000):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _partition_dir(self, ticker, date):
+        return os.path.join(self.root, f'ticker={ticker}', f'date={date}')
+    
+    def write(self, sentiment_df):
+        """
+        Append posts to their (ticker, date) partitions
+        """
+        if sentiment_df is None or sentiment_df.empty:
+            return 0
+        
+        posts = sentiment_df.copy()
+        posts['timestamp'] = pd.to_datetime(posts['timestamp'])
+        if 'confidence' not in posts.columns:
+            posts['confidence'] = posts['sentiment_score'].abs()
+        if 'source' not in posts.columns:
+            posts['source'] = 'Unknown'
+        if 'text' not in posts.columns:
+            posts['text'] = ''
+        
+        written = 0
+        dates = posts['timestamp'].dt.strftime('%Y-%m-%d')
+        for (ticker, date), part in posts.groupby([posts['ticker'], dates], sort=False):
+            part = part.sort_values('timestamp')
+            directory = self._partition_dir(ticker, date)
+            os.makedirs(directory, exist_ok=True)
+            existing = glob.glob(os.path.join(directory, 'part-*.timestamp.npy'))
+            prefix = os.path.join(directory, f'part-{len(existing):05d}')
+            
+            arrays = {
+                'sentiment_score': part['sentiment_score'].to_numpy(dtype=float),
+                'confidence': part['confidence'].to_numpy(dtype=float),
+                'source': part['source'].fillna('Unknown').astype(str).to_numpy(dtype=str),
+                'text': part['text'].fillna('').astype(str).to_numpy(dtype=str),
+                'timestamp': part['timestamp'].to_numpy(dtype='datetime64[ns]')
+            }
+            for column in self.COLUMNS[1:] + ('timestamp',):
+                tmp_path = f'{prefix}.{column}.tmp.npy'
+                np.save(tmp_path, arrays[column], allow_pickle=False)
+                os.replace(tmp_path, f'{prefix}.{column}.npy')
+            written += len(part)
+        
+        return written
+    
+    def drop_before(self, start):
+        """
+        Delete whole date partitions that end before start
+        Returns the number of partitions removed
+        """
+        removed = 0
+        for _, _, directory in self.partitions(end=pd.Timestamp(start) - pd.Timedelta(days=1)):
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+        return removed
+    
+    def clear(self):
+        """
+        Delete every partition
+        """
+        for ticker in self.tickers():
+            shutil.rmtree(os.path.join(self.root, f'ticker={ticker}'), ignore_errors=True)
+    
+    def tickers(self):
+        """
+        Tickers present in the store
+        """
+        return sorted(
+            name.split('=', 1)[1]
+            for name in os.listdir(self.root)
+            if name.startswith('ticker=')
+        )
+    
+    def partitions(self, ticker=None, start=None, end=None):
+        """
+        (ticker, date, directory) for partitions overlapping the filters, in time order
+        """
+        tickers = [ticker] if isinstance(ticker, str) else (ticker or self.tickers())
+        start_date = pd.Timestamp(start).strftime('%Y-%m-%d') if start is not None else None
+        end_date = pd.Timestamp(end).strftime('%Y-%m-%d') if end is not None else None
+        
+        found = []
+        for name in tickers:
+            ticker_dir = os.path.join(self.root, f'ticker={name}')
+            if not os.path.isdir(ticker_dir):
+                continue
+            for entry in sorted(os.listdir(ticker_dir)):
+                if not entry.startswith('date='):
+                    continue
+                date = entry.split('=', 1)[1]
+                if start_date is not None and date < start_date:
+                    continue
+                if end_date is not None and date > end_date:
+                    continue
+                found.append((name, date, os.path.join(ticker_dir, entry)))
+        return found
+    
+    def _part_prefixes(self, directory):
+        return sorted(path[:-len('.timestamp.npy')]
+                      for path in glob.glob(os.path.join(directory, 'part-*.timestamp.npy')))
+    
+    def count(self, ticker=None, start=None, end=None):
+        """
+        Number of stored posts, read from array headers only
+        """
+        total = 0
+        for _, _, directory in self.partitions(ticker, start, end):
+            for prefix in self._part_prefixes(directory):
+                total += np.load(f'{prefix}.timestamp.npy', mmap_mode='r').shape[0]
+        return total
+    
+    def _load_partition(self, ticker, directory, columns):
+        """
+        Load one partition as a DataFrame sorted by timestamp
+        """
+        frames = []
+        for prefix in self._part_prefixes(directory):
+            data = {column: np.load(f'{prefix}.{column}.npy', mmap_mode='r') for column in columns}
+            frames.append(pd.DataFrame({column: np.asarray(values) for column, values in data.items()}))
+        if not frames:
+            return pd.DataFrame(columns=['ticker'] + list(columns))
+        frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        if len(frames) > 1 and 'timestamp' in frame.columns:
+            frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        frame.insert(0, 'ticker', ticker)
+        return frame
+    
+    def iter_chunks(self, ticker=None, start=None, end=None, columns=None):
+        """
+        Stream posts one partition at a time, in time order per ticker
+        Partitions larger than chunk_rows are split into row slices
+        """
+        columns = tuple(columns or self.COLUMNS)
+        if 'timestamp' not in columns:
+            columns = ('timestamp',) + columns
+        
+        for name, _, directory in self.partitions(ticker, start, end):
+            frame = self._load_partition(name, directory, columns)
+            if start is not None:
+                frame = frame[frame['timestamp'] >= pd.Timestamp(start)]
+            if end is not None:
+                frame = frame[frame['timestamp'] <= pd.Timestamp(end)]
+            for offset in range(0, len(frame), self.chunk_rows):
+                yield frame.iloc[offset:offset + self.chunk_rows]
+    
+    def build_cube(self, ticker=None, start=None, end=None, freq='1H'):
+        """
+        Fold every matching partition into a SentimentCube
+        Memory is bounded by one partition plus the cube dimensions
+        """
+        cube = SentimentCube(freq=freq)
+        partitions = self.partitions(ticker, start, end)
+        if not partitions:
+            return cube
+        
+        # Size the cube once up front so each partition is added in place
+        dates = sorted({date for _, date, _ in partitions})
+        buckets = pd.date_range(dates[0], pd.Timestamp(dates[-1]) + pd.Timedelta(days=1), freq=freq, inclusive='left')
+        cube.reserve(tickers=sorted({name for name, _, _ in partitions}), buckets=buckets)
+        
+        for chunk in self.iter_chunks(ticker, start, end, columns=('timestamp', 'sentiment_score', 'confidence', 'source')):
+            cube.update(chunk)
+        return cube
+    
+    def read(self, ticker=None, start=None, end=None, columns=None):
+        """
+        Materialize matching posts in memory (for small slices only)
+        """
+        chunks = list(self.iter_chunks(ticker, start, end, columns))
+        if not chunks:
+            return pd.DataFrame(columns=['ticker'] + list(columns or self.COLUMNS))
+        return pd.concat(chunks, ignore_index=True)
\ No newline at end of file
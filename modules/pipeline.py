@@ -0,0 +1,392 @@
+"""
+Sentiment Pipeline
+Collector, scorer and aggregator worker processes connected by shared-memory ring buffers
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from modules.ring_buffer import RingBuffer, SharedArray
+
+
+# Characters of post text carried between stages; records in shared memory are fixed-width
+TEXT_WIDTH = 140
+
+# One post as it travels between stages; longer text is cut to TEXT_WIDTH and counted as truncated
+POST_RECORD = np.dtype([
+    ('timestamp', 'datetime64[ns]'),
+    ('ticker', 'U8'),
+    ('source', 'U8'),
+    ('sentiment_score', 'float64'),
+    ('confidence', 'float64'),
+    ('text', f'U{TEXT_WIDTH}'),
+    ('created', 'float64')
+])
+
+POST_COLUMNS = ['timestamp', 'ticker', 'sentiment_score', 'text', 'source', 'confidence']
+
+STAGES = ('collector', 'scorer', 'aggregator', 'publisher')
+COUNTER_FIELDS = ('records_in', 'records_out', 'batches', 'busy_s', 'blocked_s', 'idle_s', 'truncated', 'heartbeat')
+
+# Records a scorer takes from its ring at a time
+SCORE_BATCH = 256
+
+# Seconds between collector polls
+COLLECT_INTERVAL = 0.05
+
+
+def to_records(posts, created=None):
+    """
+    Fixed-width records from a post frame
+    Text longer than TEXT_WIDTH characters is cut; see truncated_count
+    """
+    records = np.zeros(len(posts), dtype=POST_RECORD)
+    records['timestamp'] = pd.to_datetime(posts['timestamp']).to_numpy(dtype='datetime64[ns]')
+    for column in ('ticker', 'source', 'text'):
+        records[column] = posts[column].fillna('').astype(str).to_numpy()
+    for column in ('sentiment_score', 'confidence'):
+        records[column] = posts[column].to_numpy(dtype='float64') if column in posts else np.nan
+    records['created'] = created if created is not None else time.time()
+    return records
+
+
+def truncated_count(posts):
+    """
+    Posts whose text does not fit in a record
+    """
+    if posts.empty or 'text' not in posts:
+        return 0
+    return int((posts['text'].fillna('').astype(str).str.len() > TEXT_WIDTH).sum())
+
+
+def from_records(records):
+    """
+    Post frame, in the collector's column order, from records
+    """
+    return pd.DataFrame({column: records[column] for column in POST_COLUMNS})[POST_COLUMNS].astype(
+        {'ticker': object, 'source': object, 'text': object}
+    )
+
+
+class StageCounters:
+    """
+    Per-process counters in shared memory, one row per worker, each written only by its worker
+    """
+    
+    def __init__(self, rows, spec=None):
+        self.table = SharedArray.attach(spec) if spec is not None else SharedArray((rows, len(COUNTER_FIELDS)), 'float64')
+        self.columns = {field: i for i, field in enumerate(COUNTER_FIELDS)}
+    
+    @property
+    def spec(self):
+        return self.table.spec
+    
+    def add(self, row, **values):
+        for field, value in values.items():
+            self.table.array[row, self.columns[field]] += value
+        self.table.array[row, self.columns['heartbeat']] = time.time()
+    
+    def read(self):
+        return self.table.array.copy()
+    
+    def release(self):
+        self.table.release()
+
+
+def run_collector(sinks, counters, row, tickers, rate, seed, stop):
+    """
+    Collector process: simulated posts at rate per second, spread over the scorer rings
+    Each batch goes to the least-loaded ring; when every ring is full the
+    collector blocks, and the posts that arrive meanwhile make the next batch larger.
+    """
+    from modules.data_collector import DataCollector
+    from modules.market_data import SimulatedProvider
+    
+    sinks = [RingBuffer.attach(spec) for spec in sinks]
+    counters = StageCounters(0, counters)
+    collector = DataCollector(provider=SimulatedProvider(seed=seed), seed=seed)
+    last = time.time()
+    tick = 0
+    while not stop.wait(COLLECT_INTERVAL):
+        started = time.perf_counter()
+        now = time.time()
+        elapsed, last = now - last, now
+        tick += 1
+        
+        parts = []
+        for ticker in tickers:
+            rand, np_rand = collector._rngs('pipeline', ticker, tick)
+            count = np_rand.poisson(rate / len(tickers) * elapsed)
+            if count == 0:
+                continue
+            offsets = np.sort(np_rand.uniform(0, elapsed, count))[::-1]
+            timestamps = pd.Timestamp(datetime.fromtimestamp(now)) - pd.to_timedelta(offsets, unit='s')
+            parts.append(collector._simulate_posts(ticker, list(timestamps.to_pydatetime()), (rand, np_rand)))
+        if not parts:
+            counters.add(row, idle_s=time.perf_counter() - started)
+            continue
+        
+        posts = pd.concat(parts, ignore_index=True)
+        records = to_records(posts, created=now)
+        # Scorers overwrite the simulated scores
+        records['sentiment_score'] = np.nan
+        blocked = 0.0
+        for chunk in np.array_split(records, max(1, int(np.ceil(len(records) / SCORE_BATCH)))):
+            blocked += min(sinks, key=lambda sink: sink.depth).put(chunk, stop)
+        counters.add(row, records_out=len(records), batches=1, blocked_s=blocked, truncated=truncated_count(posts),
+                     busy_s=time.perf_counter() - started - blocked)
+    
+    for sink in sinks:
+        sink.close()
+        sink.release()
+    counters.release()
+
+
+def run_scorer(source, sink, counters, row, stop):
+    """
+    Scorer process: VADER compound score and confidence for each post
+    """
+    from modules.sentiment_analyzer import SentimentAnalyzer
+    
+    source = RingBuffer.attach(source)
+    sink = RingBuffer.attach(sink)
+    counters = StageCounters(0, counters)
+    analyzer = SentimentAnalyzer()
+    # Load the lexicon before the first batch is timed
+    analyzer.analyzer
+    while not source.drained:
+        waited = time.perf_counter()
+        records = source.get(SCORE_BATCH, timeout=0.1)
+        started = time.perf_counter()
+        if len(records) == 0:
+            counters.add(row, idle_s=started - waited)
+            continue
+        
+        scores = np.array([analyzer.analyze_sentiment(str(text))['compound'] for text in records['text']])
+        records['sentiment_score'] = scores
+        records['confidence'] = np.abs(scores)
+        scored = time.perf_counter()
+        blocked = sink.put(records, stop)
+        counters.add(row, records_in=len(records), records_out=len(records), batches=1,
+                     idle_s=started - waited, busy_s=scored - started, blocked_s=blocked)
+    
+    sink.close()
+    source.release()
+    sink.release()
+    counters.release()
+
+
+def run_aggregator(sources, sink, counters, row, flush_seconds, stop):
+    """
+    Aggregator process: merges the scorer streams into event-time ordered batches
+    Scored posts are held for flush_seconds and forwarded as one batch, so
+    the hub publishes at a bounded rate however fast posts arrive.
+    """
+    sources = [RingBuffer.attach(spec) for spec in sources]
+    sink = RingBuffer.attach(sink)
+    counters = StageCounters(0, counters)
+    pending = []
+    last_flush = time.perf_counter()
+    while True:
+        active = [source for source in sources if not source.drained]
+        waited = time.perf_counter()
+        arrived = [source.get(sink.capacity) for source in active]
+        arrived = [records for records in arrived if len(records)]
+        started = time.perf_counter()
+        if arrived:
+            pending.extend(arrived)
+            counters.add(row, records_in=sum(len(records) for records in arrived))
+        
+        if pending and (started - last_flush >= flush_seconds or not active):
+            batch = np.concatenate(pending)
+            batch = batch[np.argsort(batch['timestamp'], kind='stable')]
+            pending = []
+            sorted_at = time.perf_counter()
+            blocked = sink.put(batch, stop)
+            counters.add(row, records_out=len(batch), batches=1, busy_s=sorted_at - started, blocked_s=blocked)
+            last_flush = time.perf_counter()
+        if not active:
+            break
+        if not arrived:
+            time.sleep(0.01)
+            counters.add(row, idle_s=time.perf_counter() - waited)
+    
+    sink.close()
+    for source in sources:
+        source.release()
+    sink.release()
+    counters.release()
+
+
+class SentimentPipeline:
+    """
+    Staged ingestion off the UI process: a collector process, N scorer
+    processes and an aggregator process, connected by single-producer
+    ring buffers of fixed-width records in shared memory (one ring per
+    collector-scorer and scorer-aggregator edge). A thread in this process
+    drains the aggregator's ring into DataHub.ingest, so the only work left
+    under the UI's GIL is publishing already-scored batches. Full rings
+    block their producer, so a slow stage throttles the ones before it
+    instead of queueing without bound. Each worker keeps its counters in a
+    shared table; stats() turns them into per-stage throughput.
+    """
+    
+    def __init__(self, hub, tickers=None, scorers=None, rate=1.0, ring_capacity=8192, flush_seconds=1.0, seed=None):
+        self.hub = hub
+        self.tickers = list(tickers or hub.collector.stock_tickers)
+        self.scorers = scorers or int(os.environ.get('SENTIMENT_PIPELINE_WORKERS') or max((os.cpu_count() or 1) - 2, 1))
+        self.rate = rate
+        self.ring_capacity = ring_capacity
+        self.flush_seconds = flush_seconds
+        self.seed = seed
+        self.lags = deque(maxlen=10000)
+        self.started = None
+        
+        self._context = multiprocessing.get_context('spawn')
+        self._stop = self._context.Event()
+        self._processes = []
+        self._rings = []
+        self._counters = None
+        self._output = None
+        self._thread = None
+    
+    @property
+    def rows(self):
+        """
+        Counter row of each worker: collector, scorers, aggregator, then this process's publisher
+        """
+        return {
+            'collector': [0],
+            'scorer': list(range(1, self.scorers + 1)),
+            'aggregator': [self.scorers + 1],
+            'publisher': [self.scorers + 2]
+        }
+    
+    def start(self):
+        """
+        Start the worker processes and the publishing thread
+        """
+        if self._processes:
+            return self
+        self._stop.clear()
+        self._counters = StageCounters(self.scorers + 3)
+        to_scorers = [RingBuffer(POST_RECORD, self.ring_capacity) for _ in range(self.scorers)]
+        to_aggregator = [RingBuffer(POST_RECORD, self.ring_capacity) for _ in range(self.scorers)]
+        self._output = RingBuffer(POST_RECORD, self.ring_capacity)
+        self._rings = to_scorers + to_aggregator + [self._output]
+        counters = self._counters.spec
+        
+        workers = [(run_collector, ([ring.spec for ring in to_scorers], counters, 0, self.tickers, self.rate, self.seed, self._stop))]
+        for i in range(self.scorers):
+            workers.append((run_scorer, (to_scorers[i].spec, to_aggregator[i].spec, counters, i + 1, self._stop)))
+        workers.append((run_aggregator, ([ring.spec for ring in to_aggregator], self._output.spec, counters,
+                                         self.scorers + 1, self.flush_seconds, self._stop)))
+        for target, args in workers:
+            process = self._context.Process(target=target, args=args, name=f'sentiment-{target.__name__[4:]}', daemon=True)
+            process.start()
+            self._processes.append(process)
+        
+        self.started = time.time()
+        self.hub.post_feed = self
+        self._thread = threading.Thread(target=self._publish, name='sentiment-pipeline-publish', daemon=True)
+        self._thread.start()
+        # Runs before multiprocessing's own exit handler terminates the workers
+        atexit.register(self.stop)
+        return self
+    
+    def _publish(self):
+        row = self.rows['publisher'][0]
+        while not self._output.drained:
+            waited = time.perf_counter()
+            records = self._output.get(self.ring_capacity, timeout=0.25)
+            started = time.perf_counter()
+            if len(records) == 0:
+                self._counters.add(row, idle_s=started - waited)
+                continue
+            
+            posts = from_records(records)
+            # Only tickers some session asked for; the rest would mark tickers covered that have no bars
+            posts = posts[posts['ticker'].isin(self.hub.tickers)]
+            try:
+                if not posts.empty:
+                    self.hub.ingest(None, posts)
+            except Exception as e:
+                print(f"Warning: Sentiment pipeline publish failed: {e}")
+            self.lags.extend(time.time() - records['created'])
+            self._counters.add(row, records_in=len(records), records_out=len(posts), batches=1,
+                               idle_s=started - waited, busy_s=time.perf_counter() - started)
+    
+    def stop(self, timeout=10):
+        """
+        Drain and stop the workers, then free the shared memory
+        """
+        if not self._processes:
+            return
+        self._stop.set()
+        deadline = time.perf_counter() + timeout
+        for process in self._processes:
+            process.join(max(deadline - time.perf_counter(), 0.1))
+            if process.is_alive():
+                print(f"Warning: {process.name} did not stop in time, terminating")
+                process.terminate()
+                process.join(1)
+        # A terminated worker cannot close its ring, so the publisher is told directly
+        self._output.close()
+        self._thread.join(max(deadline - time.perf_counter(), 1))
+        if self.hub.post_feed is self:
+            self.hub.post_feed = None
+        for ring in self._rings:
+            ring.release()
+        self._counters.release()
+        self._processes = []
+        self._rings = []
+        atexit.unregister(self.stop)
+    
+    def stats(self):
+        """
+        Per-stage counters and throughput since start, plus ring depths and collection-to-publish lag
+        """
+        if self._counters is None:
+            return [], {}
+        counters = self._counters.read()
+        elapsed = max(time.time() - self.started, 1e-9)
+        rings = {
+            'collector': [ring.depth for ring in self._rings[:self.scorers]],
+            'scorer': [ring.depth for ring in self._rings[self.scorers:2 * self.scorers]],
+            'aggregator': [self._output.depth]
+        }
+        stage_rows = []
+        for stage in STAGES:
+            table = counters[self.rows[stage]]
+            totals = dict(zip(COUNTER_FIELDS, table.sum(axis=0).tolist()))
+            busy = totals['busy_s']
+            stage_rows.append({
+                'stage': stage,
+                'workers': len(table),
+                'records_in': int(totals['records_in']),
+                'records_out': int(totals['records_out']),
+                'per_s': totals['records_out'] / elapsed,
+                # What the stage could sustain if it never waited on its neighbours
+                'capacity_per_s': totals['records_out'] / busy * len(table) if busy else None,
+                'busy_pct': 100 * busy / (elapsed * len(table)),
+                'blocked_s': totals['blocked_s'],
+                'queued': sum(rings.get(stage, [])),
+                # Posts whose text was cut to fit a record
+                'truncated': int(totals['truncated']),
+                'heartbeat_age_s': time.time() - float(table[:, -1].min()) if table[:, -1].min() else None
+            })
+        lags = np.array(self.lags) * 1000
+        summary = {
+            'elapsed_s': elapsed,
+            'scorers': self.scorers,
+            'alive': sum(process.is_alive() for process in self._processes),
+            'lag_p50_ms': float(np.percentile(lags, 50)) if len(lags) else None,
+            'lag_p99_ms': float(np.percentile(lags, 99)) if len(lags) else None
+        }
+        return stage_rows, summary
\ No newline at end of file
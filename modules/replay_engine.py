@@ -0,0 +1,307 @@
+"""
+Replay Engine
+Time-accelerated replay of recorded posts and bars through the data hub, with burst injection and lag measurement
+"""
+import math
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from modules.data_hub import DataHub
+from modules.delta_feed import DeltaFeed
+from modules.market_data import align_timestamp
+from modules.segment_store import SegmentStore
+from modules.sentiment_cube import SentimentCube
+
+
+class Burst:
+    """
+    Extra post volume in an event-time window: multiplier x the recorded rate
+    start is a timestamp, or an offset (Timedelta) from the first replayed event
+    """
+    
+    def __init__(self, start, duration, multiplier, tickers=None):
+        self.start = start
+        self.duration = pd.Timedelta(duration)
+        self.multiplier = multiplier
+        self.tickers = set(tickers) if tickers else None
+    
+    @classmethod
+    def parse(cls, spec):
+        """
+        Burst from 'offset:duration:multiplier[:TICKER,...]', e.g. '2d:1h:50' or '36h:30min:20:TSLA'
+        """
+        parts = spec.split(':')
+        if len(parts) not in (3, 4):
+            raise ValueError(f"Burst must look like offset:duration:multiplier[:tickers], got {spec}")
+        tickers = parts[3].upper().split(',') if len(parts) == 4 else None
+        return cls(pd.Timedelta(parts[0]), parts[1], float(parts[2]), tickers)
+    
+    def window(self, first_event):
+        start = first_event + self.start if isinstance(self.start, pd.Timedelta) else pd.Timestamp(self.start)
+        return start, start + self.duration
+    
+    def apply(self, posts, first_event, rng):
+        """
+        Posts to add: recorded posts from the window resampled to the extra volume
+        Timestamps are spread uniformly over the window
+        """
+        start, end = self.window(first_event)
+        in_window = posts[(posts['timestamp'] >= start) & (posts['timestamp'] < end)]
+        if self.tickers is not None:
+            in_window = in_window[in_window['ticker'].isin(self.tickers)]
+        extra = int(round(len(in_window) * (self.multiplier - 1)))
+        if in_window.empty or extra <= 0:
+            print(f"Warning: Burst at {start} has no recorded posts to amplify")
+            return posts.iloc[:0]
+        added = in_window.iloc[rng.integers(0, len(in_window), extra)].copy()
+        offsets = rng.uniform(0, self.duration / pd.Timedelta(seconds=1), extra)
+        added['timestamp'] = start + pd.to_timedelta(offsets, unit='s')
+        return added
+
+
+class LagProbe:
+    """
+    Stand-in for a dashboard session that follows the hub through a DeltaFeed
+    On each publish it folds the new posts into a SentimentCube and rolls it
+    up per ticker, the aggregate the overview shows, and logs which hub
+    version that view reflects and when it became visible.
+    """
+    
+    def __init__(self, hub, feed=None):
+        self.hub = hub
+        self.feed = feed or DeltaFeed(hub)
+        self.cube = SentimentCube()
+        self.cursor = self.feed.version
+        self.cycles = []
+        self.aggregate = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        hub.add_listener(self._on_publish)
+    
+    def _on_publish(self, version, new_bars, new_posts):
+        self._wake.set()
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='replay-lag-probe', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self, timeout=30):
+        """
+        Catch up with the hub's latest version, then stop
+        """
+        deadline = time.perf_counter() + timeout
+        while self.cursor < self.hub.version and time.perf_counter() < deadline:
+            self._wake.set()
+            time.sleep(0.01)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.hub.remove_listener(self._on_publish)
+        self.hub.remove_listener(self.feed._on_publish)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            rows = self.feed.rows_since(self.cursor)
+            if rows is None:
+                # Fell out of the change log: rebuild from the hub as a reloaded session would
+                version = self.hub.version
+                _, sentiment_data = self.hub.snapshot()
+                self.cube = SentimentCube.from_frame(sentiment_data)
+            else:
+                version, _, new_posts = rows
+                self.cube.update(new_posts)
+            self.aggregate = self.cube.rollup('ticker')
+            self.cursor = version
+            self.cycles.append((version, time.perf_counter()))
+
+
+class ReplayEngine:
+    """
+    Emits recorded bars and posts through DataHub.ingest in event-time order.
+    speed maps event time to wall time (1 = real time, 100 = 100x faster,
+    None = as fast as possible). Rows due since the last emit go out as one
+    batch of at most max_batch rows, so an engine that falls behind catches
+    up in larger batches rather than drifting. With rebase, timestamps are
+    shifted so the last event lands at the moment the replay starts, keeping
+    the data inside the hub's rolling window. Lag is measured per row from
+    the wall time its event was due to the time a LagProbe first showed an
+    aggregate that included it.
+    """
+    
+    def __init__(self, bars, posts, hub=None, speed=1.0, bursts=(), max_batch=5000, rebase=True, seed=0):
+        self.hub = hub or DataHub()
+        self.speed = speed if speed and not math.isinf(speed) else None
+        self.max_batch = max_batch
+        self.rebase = rebase
+        self.rng = np.random.default_rng(seed)
+        
+        self.bars = self._prepare_bars(bars)
+        posts = self._prepare_posts(posts)
+        first_event = self._first_event(self.bars, posts)
+        burst_parts = [burst.apply(posts, first_event, self.rng) for burst in bursts] if first_event is not None else []
+        self.burst_posts = sum(len(part) for part in burst_parts)
+        if burst_parts:
+            posts = pd.concat([posts] + burst_parts, ignore_index=True)
+        self.posts = posts.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        self.batches = []
+    
+    @classmethod
+    def from_stores(cls, posts_root='data/segments/posts', bars_root='data/segments/bars', tickers=None, start=None, end=None, **kwargs):
+        """
+        Engine over posts and bars recorded in SegmentStores
+        """
+        frames = []
+        for root, factory in ((posts_root, SegmentStore.for_posts), (bars_root, SegmentStore.for_bars)):
+            store = factory(root)
+            selected = tickers or store.dictionaries.get('ticker', [])
+            parts = [store.query_frame(ticker, start, end) for ticker in selected]
+            parts = [part for part in parts if not part.empty]
+            frames.append(pd.concat(parts, ignore_index=True) if parts else pd.DataFrame())
+        posts, bars = frames
+        if not bars.empty:
+            bars = bars.rename(columns={'timestamp': 'Datetime', 'ticker': 'Ticker'})
+        return cls(bars, posts, **kwargs)
+    
+    def _prepare_bars(self, bars):
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        bars = bars.copy()
+        dates = bars.pop('Datetime' if 'Datetime' in bars.columns else 'Date')
+        if dates.dtype == object:
+            dates = dates.map(lambda ts: align_timestamp(pd.Timestamp(ts), None))
+        dates = pd.to_datetime(dates)
+        # Event time is naive, like post timestamps
+        bars['Datetime'] = dates.dt.tz_convert(None) if dates.dt.tz is not None else dates
+        return bars.sort_values('Datetime', kind='stable').reset_index(drop=True)
+    
+    def _prepare_posts(self, posts):
+        if posts is None or posts.empty:
+            return pd.DataFrame(columns=['timestamp', 'ticker', 'sentiment_score', 'text', 'source', 'confidence'])
+        posts = posts.copy()
+        posts['timestamp'] = pd.to_datetime(posts['timestamp'])
+        return posts
+    
+    def _first_event(self, bars, posts):
+        firsts = [frame[column].min() for frame, column in ((bars, 'Datetime'), (posts, 'timestamp')) if not frame.empty]
+        return min(firsts) if firsts else None
+    
+    def run(self, probe=True):
+        """
+        Replay everything and return the report
+        """
+        first_event = self._first_event(self.bars, self.posts)
+        if first_event is None:
+            raise ValueError("Nothing to replay")
+        last_event = max(frame[column].max() for frame, column in ((self.bars, 'Datetime'), (self.posts, 'timestamp')) if not frame.empty)
+        offset = pd.Timestamp(datetime.now()) - last_event if self.rebase else pd.Timedelta(0)
+        bar_times = self.bars['Datetime'].to_numpy() if not self.bars.empty else np.array([], dtype='datetime64[ns]')
+        post_times = self.posts['timestamp'].to_numpy()
+        
+        lag_probe = LagProbe(self.hub).start() if probe else None
+        started = time.perf_counter()
+        first_ns = first_event.value
+        next_bar = next_post = 0
+        max_backlog = 0.0
+        while next_bar < len(bar_times) or next_post < len(post_times):
+            if self.speed is None:
+                due = None
+            else:
+                elapsed = time.perf_counter() - started
+                due = np.datetime64(first_ns + int(elapsed * self.speed * 1e9), 'ns')
+                upcoming = min(t for t in (bar_times[next_bar] if next_bar < len(bar_times) else None,
+                                           post_times[next_post] if next_post < len(post_times) else None) if t is not None)
+                if upcoming > due:
+                    # Sleep until the next event is due
+                    time.sleep(min((upcoming - due).astype('int64') / 1e9 / self.speed, 0.25))
+                    continue
+            
+            bar_end = self._batch_end(bar_times, next_bar, due)
+            post_end = self._batch_end(post_times, next_post, due)
+            bars = self.bars.iloc[next_bar:bar_end]
+            posts = self.posts.iloc[next_post:post_end]
+            event_times = np.concatenate([bar_times[next_bar:bar_end], post_times[next_post:post_end]]).astype('int64')
+            next_bar, next_post = bar_end, post_end
+            
+            emitted = time.perf_counter()
+            if self.speed is None:
+                scheduled = np.full(len(event_times), emitted)
+            else:
+                scheduled = started + (event_times - first_ns) / 1e9 / self.speed
+                max_backlog = max(max_backlog, emitted - scheduled.min())
+            version = self.hub.ingest(self._shift(bars, 'Datetime', offset), self._shift(posts, 'timestamp', offset))
+            self.batches.append({
+                'version': version,
+                'rows': len(event_times),
+                'scheduled': scheduled,
+                'ingest_s': time.perf_counter() - emitted
+            })
+        elapsed = time.perf_counter() - started
+        
+        if lag_probe is not None:
+            lag_probe.stop()
+        return self.report(elapsed, last_event - first_event, max_backlog, lag_probe)
+    
+    def _batch_end(self, times, position, due):
+        """
+        Index after the rows from position that are due, at most max_batch of them
+        """
+        end = min(position + self.max_batch, len(times))
+        if due is not None:
+            end = position + int(np.searchsorted(times[position:end], due, side='right'))
+        return end
+    
+    def _shift(self, frame, column, offset):
+        if frame.empty or not offset:
+            return frame
+        frame = frame.copy()
+        frame[column] = frame[column] + offset
+        return frame
+    
+    def report(self, elapsed, span, max_backlog, lag_probe=None):
+        """
+        Throughput, batch and lag statistics of the last run
+        """
+        rows = sum(batch['rows'] for batch in self.batches)
+        ingest_ms = np.array([batch['ingest_s'] for batch in self.batches]) * 1000
+        report = {
+            'speed': self.speed,
+            'bars': len(self.bars),
+            'posts': len(self.posts),
+            'burst_posts': self.burst_posts,
+            'event_span_s': span / pd.Timedelta(seconds=1),
+            'elapsed_s': elapsed,
+            'achieved_speed': (span / pd.Timedelta(seconds=1)) / elapsed if elapsed else None,
+            'rows_per_s': rows / elapsed if elapsed else None,
+            'batches': len(self.batches),
+            'ingest_p50_ms': float(np.percentile(ingest_ms, 50)) if len(ingest_ms) else None,
+            'ingest_p99_ms': float(np.percentile(ingest_ms, 99)) if len(ingest_ms) else None,
+            'max_backlog_s': max_backlog
+        }
+        if lag_probe is not None and lag_probe.cycles:
+            versions = np.array([version for version, _ in lag_probe.cycles])
+            visible_at = np.array([seen for _, seen in lag_probe.cycles])
+            lags = []
+            for batch in self.batches:
+                # First probe cycle whose view included this batch's version
+                cycle = int(np.searchsorted(versions, batch['version'], side='left'))
+                if cycle < len(versions):
+                    lags.append(visible_at[cycle] - batch['scheduled'])
+            lags = np.concatenate(lags) * 1000 if lags else np.array([])
+            report.update({
+                'lag_p50_ms': float(np.percentile(lags, 50)) if len(lags) else None,
+                'lag_p95_ms': float(np.percentile(lags, 95)) if len(lags) else None,
+                'lag_p99_ms': float(np.percentile(lags, 99)) if len(lags) else None,
+                'lag_max_ms': float(lags.max()) if len(lags) else None,
+                'probe_cycles': len(lag_probe.cycles)
+            })
+        return report
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+Tiered Retention
+Keeps recent posts raw and downsamples older ones into 5-minute and hourly rollups
+"""
+from datetime import datetime
+import pandas as pd
+import numpy as np
+
+from modules.market_data import align_timestamp
+
+ROLLUP_MEASURES = ['count', 'sentiment_sum', 'sentiment_sumsq', 'confidence_sum',
+                   'positive_count', 'negative_count']
+RECORD_COLUMNS = ['timestamp', 'text', 'sentiment_score', 'source']
+
+
+class TieredSentimentStore:
+    """
+    In-memory post history with tiered retention.
+        raw     - individual posts, kept for raw_days
+        5min    - rollups of posts older than raw_days, kept for five_minute_days
+        hourly  - rollups of everything older, kept indefinitely
+    Rollups hold additive measures (count, sum, sum of squares, ...) plus the
+    top-K most positive and most negative posts per bucket, so means, standard
+    deviations and top mentions can still be answered after the raw rows are
+    dropped. Queries stitch the tiers together transparently.
+    Timestamps may be naive or tz-aware; cutoffs and query bounds are
+    compared in the timezone of the stored posts.
+    """
+    TIERS = (('5min', '5min'), ('hourly', '1H'))
+    
+    def __init__(self, raw_days=2, five_minute_days=7, top_k=5,
+                 positive_threshold=0.2, negative_threshold=-0.2):
+        self.raw_days = raw_days
+        self.five_minute_days = five_minute_days
+        self.top_k = top_k
+        self.positive_threshold = positive_threshold
+        self.negative_threshold = negative_threshold
+        self.raw = pd.DataFrame()
+        self.rollups = {name: self._empty_rollup() for name, _ in self.TIERS}
+        # Oldest raw post kept by the last apply_retention(); older history is only in rollups
+        self.raw_cutoff = None
+    
+    def _empty_rollup(self):
+        return pd.DataFrame(columns=['ticker', 'bucket'] + ROLLUP_MEASURES + ['top_positive', 'top_negative'])
+    
+    def ingest(self, sentiment_df):
+        """
+        Add new raw posts
+        """
+        if sentiment_df is None or sentiment_df.empty:
+            return
+        posts = sentiment_df.copy()
+        posts['timestamp'] = pd.to_datetime(posts['timestamp'])
+        self.raw = posts if self.raw.empty else pd.concat([self.raw, posts], ignore_index=True)
+    
+    def _rollup_posts(self, posts, freq):
+        """
+        Collapse raw posts into bucket rollups
+        """
+        scores = posts['sentiment_score'].to_numpy(dtype=float)
+        frame = pd.DataFrame({
+            'ticker': posts['ticker'].to_numpy(),
+            'bucket': posts['timestamp'].dt.floor(freq).to_numpy(),
+            'count': 1,
+            'sentiment_sum': scores,
+            'sentiment_sumsq': scores * scores,
+            'confidence_sum': posts['confidence'].to_numpy(dtype=float) if 'confidence' in posts else np.abs(scores),
+            'positive_count': (scores > self.positive_threshold).astype(int),
+            'negative_count': (scores < self.negative_threshold).astype(int)
+        })
+        rolled = frame.groupby(['ticker', 'bucket'], sort=True)[ROLLUP_MEASURES].sum().reset_index()
+        
+        records = posts.assign(_bucket=frame['bucket'].to_numpy())
+        columns = [c for c in RECORD_COLUMNS if c in records.columns]
+        for column, ascending in (('top_positive', False), ('top_negative', True)):
+            top = (records.sort_values('sentiment_score', ascending=ascending, kind='stable')
+                   .groupby(['ticker', '_bucket'], sort=False).head(self.top_k))
+            lists = top.groupby(['ticker', '_bucket'], sort=False)[columns].apply(lambda g: g.to_dict('records'))
+            lists.index = lists.index.set_names(['ticker', 'bucket'])
+            rolled = rolled.merge(lists.rename(column).reset_index(), on=['ticker', 'bucket'], how='left')
+        return rolled
+    
+    def _combine(self, rollups, freq):
+        """
+        Merge rollup rows (possibly at a finer resolution) into buckets of freq
+        """
+        rollups = [r for r in rollups if not r.empty]
+        if not rollups:
+            return self._empty_rollup()
+        combined = pd.concat(rollups, ignore_index=True)
+        combined['bucket'] = pd.to_datetime(combined['bucket']).dt.floor(freq)
+        
+        grouped = combined.groupby(['ticker', 'bucket'], sort=True)
+        result = grouped[ROLLUP_MEASURES].sum().reset_index()
+        for column, positive in (('top_positive', True), ('top_negative', False)):
+            merged = grouped[column].apply(lambda lists: self._merge_top(lists, positive))
+            result[column] = merged.to_numpy()
+        return result
+    
+    def _merge_top(self, lists, positive):
+        records = [record for records in lists if isinstance(records, list) for record in records]
+        records.sort(key=lambda r: r['sentiment_score'], reverse=positive)
+        return records[:self.top_k]
+    
+    def _tz(self):
+        """
+        Timezone of the stored timestamps (None when naive or empty)
+        """
+        if not self.raw.empty:
+            return self.raw['timestamp'].dt.tz
+        for rollup in self.rollups.values():
+            if not rollup.empty:
+                return pd.to_datetime(rollup['bucket']).dt.tz
+        return None
+    
+    def apply_retention(self, now=None):
+        """
+        Demote data that has aged out of each tier
+        Returns the number of rows in each tier afterwards
+        """
+        now = align_timestamp(pd.Timestamp(now if now is not None else datetime.now()), self._tz())
+        raw_cutoff = (now - pd.Timedelta(days=self.raw_days)).floor('5min')
+        five_minute_cutoff = (now - pd.Timedelta(days=self.five_minute_days)).floor('1H')
+        
+        if not self.raw.empty:
+            expired = self.raw['timestamp'] < raw_cutoff
+            if expired.any():
+                rolled = self._rollup_posts(self.raw[expired], '5min')
+                self.rollups['5min'] = self._combine([self.rollups['5min'], rolled], '5min')
+                self.raw = self.raw[~expired].reset_index(drop=True)
+        self.raw_cutoff = raw_cutoff
+        
+        five_minute = self.rollups['5min']
+        if not five_minute.empty:
+            expired = pd.to_datetime(five_minute['bucket']) < five_minute_cutoff
+            if expired.any():
+                self.rollups['hourly'] = self._combine([self.rollups['hourly'], five_minute[expired]], '1H')
+                self.rollups['5min'] = five_minute[~expired].reset_index(drop=True)
+        
+        return self.stats()
+    
+    def drop_before(self, start):
+        """
+        Forget posts and rollup buckets older than start in every tier
+        """
+        start = align_timestamp(pd.Timestamp(start), self._tz())
+        if not self.raw.empty:
+            self.raw = self.raw[self.raw['timestamp'] >= start].reset_index(drop=True)
+        for name, _ in self.TIERS:
+            rollup = self.rollups[name]
+            if not rollup.empty:
+                self.rollups[name] = rollup[pd.to_datetime(rollup['bucket']) >= start].reset_index(drop=True)
+    
+    def stats(self):
+        """
+        Row counts per tier
+        """
+        return {
+            'raw': len(self.raw),
+            '5min': len(self.rollups['5min']),
+            'hourly': len(self.rollups['hourly'])
+        }
+    
+    def _filter(self, frame, column, ticker, start, end):
+        if frame.empty:
+            return frame
+        mask = frame['ticker'] == ticker
+        timestamps = pd.to_datetime(frame[column])
+        if start is not None:
+            mask &= timestamps >= align_timestamp(pd.Timestamp(start), timestamps.dt.tz)
+        if end is not None:
+            mask &= timestamps <= align_timestamp(pd.Timestamp(end), timestamps.dt.tz)
+        return frame[mask]
+    
+    def bucket_rollups(self, ticker, freq='1H', start=None, end=None):
+        """
+        Rollups for one ticker at freq, stitched from every tier
+        Buckets finer than a tier's own resolution come back at that resolution
+        """
+        parts = []
+        raw = self._filter(self.raw, 'timestamp', ticker, start, end)
+        if not raw.empty:
+            parts.append(self._rollup_posts(raw, freq))
+        for name, _ in self.TIERS:
+            parts.append(self._filter(self.rollups[name], 'bucket', ticker, start, end))
+        return self._combine(parts, freq)
+    
+    def aggregate(self, ticker, freq='1H', start=None, end=None):
+        """
+        Time-window aggregation with the same columns as
+        SentimentAnalyzer.aggregate_by_time_window
+        """
+        rolled = self.bucket_rollups(ticker, freq, start, end)
+        if rolled.empty:
+            return pd.DataFrame()
+        
+        count = rolled['count'].to_numpy(dtype=float)
+        mean = rolled['sentiment_sum'].to_numpy(dtype=float) / count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (rolled['sentiment_sumsq'].to_numpy(dtype=float) - count * mean ** 2) / (count - 1)
+        std = np.where(count > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+        
+        aggregated = pd.DataFrame({
+            'timestamp': pd.to_datetime(rolled['bucket']).to_numpy(),
+            'avg_sentiment': mean,
+            'sentiment_std': std,
+            'mention_count': count.astype(int),
+            'avg_confidence': rolled['confidence_sum'].to_numpy(dtype=float) / count
+        })
+        
+        # Reinstate empty buckets so downstream rolling windows see real gaps
+        full_range = pd.date_range(aggregated['timestamp'].min(), aggregated['timestamp'].max(), freq=freq)
+        aggregated = aggregated.set_index('timestamp').reindex(full_range)
+        aggregated['mention_count'] = aggregated['mention_count'].fillna(0).astype(int)
+        aggregated.index.name = 'timestamp'
+        aggregated = aggregated.reset_index()
+        aggregated['ticker'] = ticker
+        return aggregated
+    
+    def top_mentions(self, ticker, top_n=5, sentiment_type='positive', start=None, end=None):
+        """
+        Top mentions across all tiers, exact while top_n <= top_k
+        """
+        column = 'top_positive' if sentiment_type == 'positive' else 'top_negative'
+        candidates = []
+        
+        raw = self._filter(self.raw, 'timestamp', ticker, start, end)
+        if not raw.empty:
+            columns = [c for c in RECORD_COLUMNS if c in raw.columns]
+            ordered = raw.sort_values('sentiment_score', ascending=(sentiment_type != 'positive'), kind='stable')
+            candidates.extend(ordered.head(top_n)[columns].to_dict('records'))
+        
+        for name, _ in self.TIERS:
+            rolled = self._filter(self.rollups[name], 'bucket', ticker, start, end)
+            for records in rolled[column]:
+                candidates.extend(records)
+        
+        candidates.sort(key=lambda r: r['sentiment_score'], reverse=(sentiment_type == 'positive'))
+        return candidates[:top_n]
\ No newline at end of file
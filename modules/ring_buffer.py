@@ -0,0 +1,176 @@
+"""
+Ring Buffer
+Fixed-width record queues and counter tables in shared memory, for passing data between processes
+"""
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+# Header counters, each on its own cache line: records written, records read, producer finished
+HEAD, TAIL, CLOSED = 0, 8, 16
+HEADER_BYTES = 192
+
+# Longest single sleep while waiting on a full or empty ring
+MAX_WAIT_SECONDS = 0.01
+
+
+class SharedArray:
+    """
+    NumPy array in a named shared memory block
+    The creating process owns the block and unlinks it on release; other
+    processes attach by spec and only close their mapping.
+    """
+    
+    def __init__(self, shape, dtype, name=None):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        size = int(np.prod(shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=max(size, 1) if self.owner else 0)
+        self.array = np.ndarray(shape, dtype=self.dtype, buffer=self.shm.buf)
+        if self.owner:
+            self.array[...] = 0
+    
+    @property
+    def spec(self):
+        """
+        Picklable description to attach from another process
+        """
+        return self.shape, self.dtype, self.shm.name
+    
+    @classmethod
+    def attach(cls, spec):
+        shape, dtype, name = spec
+        return cls(shape, dtype, name=name)
+    
+    def release(self):
+        # Views into the buffer must go before the mapping can close
+        del self.array
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingBuffer:
+    """
+    Single-producer, single-consumer queue of fixed-width NumPy records in shared memory.
+    The producer only advances the write counter and the consumer only the
+    read counter, so neither side locks; records are copied in before the
+    write counter moves, so a consumer never sees a partial record. A full
+    ring blocks the producer (backpressure) instead of dropping or growing,
+    and the producer closes the ring to tell the consumer no more will come.
+    """
+    
+    def __init__(self, dtype, capacity, name=None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.owner = name is None
+        size = HEADER_BYTES + self.dtype.itemsize * capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self._header = np.ndarray(HEADER_BYTES // 8, dtype=np.uint64, buffer=self.shm.buf)
+        self._records = np.ndarray(capacity, dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_BYTES)
+        if self.owner:
+            self._header[:] = 0
+    
+    @property
+    def spec(self):
+        """
+        Picklable description to attach from another process
+        """
+        return self.dtype, self.capacity, self.shm.name
+    
+    @classmethod
+    def attach(cls, spec):
+        dtype, capacity, name = spec
+        return cls(dtype, capacity, name=name)
+    
+    @property
+    def depth(self):
+        """
+        Records written but not yet read
+        """
+        return int(self._header[HEAD]) - int(self._header[TAIL])
+    
+    @property
+    def closed(self):
+        return bool(self._header[CLOSED])
+    
+    @property
+    def drained(self):
+        """
+        Closed by the producer and fully read
+        """
+        return self.closed and self.depth == 0
+    
+    def close(self):
+        """
+        Mark the end of the stream (producer side)
+        """
+        self._header[CLOSED] = 1
+    
+    def put(self, records, stop=None):
+        """
+        Append records, waiting while the ring is full
+        Returns the seconds spent blocked; stops waiting once stop (an Event) is set
+        """
+        blocked = 0.0
+        wait = 0.0005
+        written = 0
+        while written < len(records):
+            head = int(self._header[HEAD])
+            free = self.capacity - (head - int(self._header[TAIL]))
+            if free == 0:
+                if stop is not None and stop.is_set():
+                    break
+                started = time.perf_counter()
+                time.sleep(wait)
+                blocked += time.perf_counter() - started
+                wait = min(wait * 2, MAX_WAIT_SECONDS)
+                continue
+            count = min(free, len(records) - written)
+            start = head % self.capacity
+            first = min(count, self.capacity - start)
+            self._records[start:start + first] = records[written:written + first]
+            self._records[:count - first] = records[written + first:written + count]
+            self._header[HEAD] = head + count
+            written += count
+            wait = 0.0005
+        return blocked
+    
+    def get(self, max_records, timeout=0.0):
+        """
+        Copy of up to max_records oldest records, waiting up to timeout seconds for the first
+        Returns an empty array when nothing arrived in time
+        """
+        deadline = time.perf_counter() + timeout
+        wait = 0.0005
+        while True:
+            tail = int(self._header[TAIL])
+            count = min(int(self._header[HEAD]) - tail, max_records)
+            if count > 0:
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or self.closed:
+                return self._records[:0].copy()
+            time.sleep(min(wait, remaining))
+            wait = min(wait * 2, MAX_WAIT_SECONDS)
+        
+        start = tail % self.capacity
+        first = min(count, self.capacity - start)
+        records = np.concatenate([self._records[start:start + first], self._records[:count - first]])
+        self._header[TAIL] = tail + count
+        return records
+    
+    def release(self):
+        # Views into the buffer must go before the mapping can close
+        del self._header, self._records
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
\ No newline at end of file
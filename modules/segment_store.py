@@ -0,0 +1,385 @@
+"""
+Segment Store
+Append-only, memory-mapped columnar segment log for posts and price bars
+"""
+import os
+import json
+import shutil
+import pandas as pd
+import numpy as np
+
+
+POST_SCHEMA = [
+    ('timestamp', 'datetime64[ns]'),
+    ('ticker', 'int32'),
+    ('sentiment_score', 'float64'),
+    ('confidence', 'float64'),
+    ('source', 'int32'),
+    ('text', 'str')
+]
+
+BAR_SCHEMA = [
+    ('timestamp', 'datetime64[ns]'),
+    ('ticker', 'int32'),
+    ('Open', 'float64'),
+    ('High', 'float64'),
+    ('Low', 'float64'),
+    ('Close', 'float64'),
+    ('Volume', 'float64')
+]
+
+# Columns stored as dictionary codes
+ENCODED_COLUMNS = ('ticker', 'source')
+
+# Schema type of variable-length text, stored as UTF-8 bytes plus row offsets
+TEXT_TYPE = 'str'
+
+
+class TextColumn:
+    """
+    Variable-length strings of one segment column: a UTF-8 byte array and
+    n + 1 row offsets into it, both memory-mapped. Slicing decodes only
+    the selected rows, into an object array.
+    """
+    
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+    
+    @classmethod
+    def encode(cls, values):
+        """
+        (bytes, offsets) arrays for a sequence of strings
+        """
+        encoded = [str(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='int64')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), dtype='uint8'), offsets
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                blob = self.data[self.offsets[start]:self.offsets[max(stop, start)]].tobytes()
+                bounds = self.offsets[start:max(stop, start) + 1] - self.offsets[start]
+                return np.array([blob[lo:hi].decode('utf-8') for lo, hi in zip(bounds[:-1], bounds[1:])], dtype=object)
+            index = np.arange(start, stop, step)
+        rows = np.arange(len(self))[index]
+        return np.array([self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8') for row in rows], dtype=object)
+    
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values.astype(dtype) if dtype is not None else values
+
+
+class SegmentStore:
+    """
+    Durable local store answering (ticker, time-range) queries.
+    Rows are buffered in memory and sealed into immutable segments (one .npy
+    file per column; text as UTF-8 bytes plus an offsets file, so it is kept
+    whole) sorted by ticker then timestamp.
+    Each segment carries a zone map (row count, min/max timestamp and a
+    bitmap of ticker codes) in the manifest, so opening the store reads only
+    the manifest and queries memory-map just the segments that can match.
+    Matching rows inside a segment are a contiguous run, returned as
+    zero-copy views of the mapped fixed-width columns; text is decoded for
+    just those rows.
+    """
+    
+    def __init__(self, root, schema, segment_rows=65536):
+        self.root = root
+        self.schema = schema
+        self.columns = [name for name, _ in schema]
+        self.segment_rows = segment_rows
+        self._buffer = []
+        self._mapped = {}
+        os.makedirs(self.root, exist_ok=True)
+        self._load_manifest()
+    
+    @classmethod
+    def for_posts(cls, root='data/segments/posts', segment_rows=65536):
+        return cls(root, POST_SCHEMA, segment_rows)
+    
+    @classmethod
+    def for_bars(cls, root='data/segments/bars', segment_rows=65536):
+        return cls(root, BAR_SCHEMA, segment_rows)
+    
+    def _manifest_path(self):
+        return os.path.join(self.root, 'manifest.json')
+    
+    def _load_manifest(self):
+        path = self._manifest_path()
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+        else:
+            manifest = {'next_segment': 0, 'segments': [], 'dictionaries': {}}
+        self.segments = manifest['segments']
+        self.next_segment = manifest['next_segment']
+        self.dictionaries = {
+            column: list(manifest['dictionaries'].get(column, []))
+            for column in ENCODED_COLUMNS if column in self.columns
+        }
+        self._codes = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.dictionaries.items()
+        }
+        self._remove_orphans()
+    
+    def _remove_orphans(self):
+        """
+        Delete segment directories the manifest does not list
+        A crash between writing a segment and publishing the manifest leaves
+        one behind; its rows were never visible, and its name would be reused.
+        """
+        listed = {segment['name'] for segment in self.segments}
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if entry.startswith('seg-') and entry not in listed and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+    
+    def _write_manifest(self):
+        manifest = {
+            'next_segment': self.next_segment,
+            'segments': self.segments,
+            'dictionaries': self.dictionaries
+        }
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+    
+    def _encode(self, column, values):
+        codes = self._codes[column]
+        dictionary = self.dictionaries[column]
+        for value in pd.unique(values):
+            if value not in codes:
+                codes[value] = len(dictionary)
+                dictionary.append(value)
+        return np.array([codes[v] for v in values], dtype='int32')
+    
+    def code_for(self, column, value):
+        return self._codes.get(column, {}).get(value)
+    
+    def append(self, df):
+        """
+        Buffer rows and seal full segments
+        Accepts the collector's post frames and stock frames (Datetime/Ticker)
+        """
+        if df is None or df.empty:
+            return 0
+        
+        frame = df.rename(columns={'Datetime': 'timestamp', 'Date': 'timestamp', 'Ticker': 'ticker'})
+        arrays = {}
+        for name, dtype in self.schema:
+            if name in ENCODED_COLUMNS:
+                values = frame[name].fillna('Unknown').astype(str).to_numpy() if name in frame else np.full(len(frame), 'Unknown')
+                arrays[name] = self._encode(name, values)
+            elif name == 'timestamp':
+                timestamps = pd.to_datetime(frame['timestamp'])
+                if timestamps.dt.tz is not None:
+                    timestamps = timestamps.dt.tz_convert(None)
+                arrays[name] = timestamps.to_numpy(dtype='datetime64[ns]')
+            elif dtype == TEXT_TYPE:
+                arrays[name] = frame[name].fillna('').astype(str).to_numpy(dtype=object) if name in frame else np.full(len(frame), '', dtype=object)
+            else:
+                arrays[name] = frame[name].to_numpy(dtype=dtype) if name in frame else np.zeros(len(frame), dtype=dtype)
+        
+        self._buffer.append(arrays)
+        if sum(len(part['timestamp']) for part in self._buffer) >= self.segment_rows:
+            self.flush()
+        return len(frame)
+    
+    def flush(self):
+        """
+        Seal buffered rows into segments and publish them in the manifest
+        """
+        if not self._buffer:
+            return
+        rows = {name: np.concatenate([part[name] for part in self._buffer]) for name in self.columns}
+        self._buffer = []
+        for start in range(0, len(rows['timestamp']), self.segment_rows):
+            chunk = {name: values[start:start + self.segment_rows] for name, values in rows.items()}
+            self.segments.append(self._write_segment(chunk))
+        self._write_manifest()
+    
+    def _write_segment(self, rows):
+        """
+        Write one immutable sorted segment and return its zone map
+        """
+        order = np.lexsort((rows['timestamp'], rows['ticker']))
+        segment_id = self.next_segment
+        self.next_segment += 1
+        name = f'seg-{segment_id:06d}'
+        tmp_dir = os.path.join(self.root, name + '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        for column, dtype in self.schema:
+            if dtype == TEXT_TYPE:
+                data, offsets = TextColumn.encode(np.asarray(rows[column])[order])
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), data, allow_pickle=False)
+                np.save(os.path.join(tmp_dir, f'{column}.offsets.npy'), offsets, allow_pickle=False)
+            else:
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), rows[column][order].astype(dtype), allow_pickle=False)
+        os.replace(tmp_dir, os.path.join(self.root, name))
+        
+        tickers = np.unique(rows['ticker'])
+        bitmap = 0
+        for code in tickers:
+            bitmap |= 1 << int(code)
+        return {
+            'name': name,
+            'rows': int(len(order)),
+            'min_ts': int(rows['timestamp'].min().astype('int64')),
+            'max_ts': int(rows['timestamp'].max().astype('int64')),
+            'ticker_bitmap': format(bitmap, 'x')
+        }
+    
+    def _segment_columns(self, segment, columns):
+        """
+        Memory-mapped columns of a segment, opened once and reused
+        """
+        mapped = self._mapped.setdefault(segment['name'], {})
+        for column in columns:
+            if column not in mapped:
+                path = os.path.join(self.root, segment['name'], f'{column}.npy')
+                offsets = os.path.join(self.root, segment['name'], f'{column}.offsets.npy')
+                if os.path.exists(offsets):
+                    mapped[column] = TextColumn(np.load(path, mmap_mode='r'), np.load(offsets, mmap_mode='r'))
+                else:
+                    # Fixed-width columns, including text written by older versions as U140
+                    mapped[column] = np.load(path, mmap_mode='r')
+        return mapped
+    
+    def matching_segments(self, ticker=None, start=None, end=None):
+        """
+        Segments whose zone maps overlap the query
+        """
+        code = None
+        if ticker is not None:
+            code = self.code_for('ticker', ticker)
+            if code is None:
+                return []
+        start_ns = pd.Timestamp(start).value if start is not None else None
+        end_ns = pd.Timestamp(end).value if end is not None else None
+        
+        matches = []
+        for segment in self.segments:
+            if start_ns is not None and segment['max_ts'] < start_ns:
+                continue
+            if end_ns is not None and segment['min_ts'] > end_ns:
+                continue
+            if code is not None and not (int(segment['ticker_bitmap'], 16) >> code) & 1:
+                continue
+            matches.append(segment)
+        return matches
+    
+    def query(self, ticker, start=None, end=None, columns=None):
+        """
+        Zero-copy views of the rows for one ticker in [start, end]
+        Returns a list of dicts (one per matching segment) of column views;
+        text columns come back as decoded object arrays of just those rows
+        """
+        columns = list(columns or self.columns)
+        code = self.code_for('ticker', ticker)
+        views = []
+        for segment in self.matching_segments(ticker, start, end):
+            mapped = self._segment_columns(segment, set(columns) | {'ticker', 'timestamp'})
+            codes = mapped['ticker']
+            lo = int(np.searchsorted(codes, code, side='left'))
+            hi = int(np.searchsorted(codes, code, side='right'))
+            timestamps = mapped['timestamp'][lo:hi]
+            if start is not None:
+                lo += int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(start).value, 'ns'), side='left'))
+            if end is not None:
+                hi = lo + int(np.searchsorted(mapped['timestamp'][lo:hi], np.datetime64(pd.Timestamp(end).value, 'ns'), side='right'))
+            if hi > lo:
+                views.append({column: mapped[column][lo:hi] for column in columns})
+        return views
+    
+    def query_frame(self, ticker, start=None, end=None, columns=None):
+        """
+        Materialize a query as a DataFrame with decoded dictionary columns
+        Includes rows still in the write buffer
+        """
+        columns = list(columns or self.columns)
+        parts = self.query(ticker, start, end, columns)
+        
+        code = self.code_for('ticker', ticker)
+        for buffered in self._buffer:
+            mask = buffered['ticker'] == code
+            if start is not None:
+                mask &= buffered['timestamp'] >= np.datetime64(pd.Timestamp(start).value, 'ns')
+            if end is not None:
+                mask &= buffered['timestamp'] <= np.datetime64(pd.Timestamp(end).value, 'ns')
+            if mask.any():
+                parts.append({column: buffered[column][mask] for column in columns})
+        
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        
+        frame = pd.DataFrame({column: np.concatenate([part[column] for part in parts]) for column in columns})
+        for column in ENCODED_COLUMNS:
+            if column in frame.columns:
+                frame[column] = np.asarray(self.dictionaries[column], dtype=object)[frame[column].to_numpy()]
+        return frame.sort_values('timestamp', kind='stable').reset_index(drop=True) if 'timestamp' in frame else frame
+    
+    def compact(self, min_rows=None):
+        """
+        Merge runs of adjacent small segments into full-size segments
+        Returns the number of segments removed
+        """
+        min_rows = min_rows or self.segment_rows // 4
+        self.flush()
+        
+        new_segments = []
+        retired = []
+        written = []
+        run = []
+        
+        def _merge_run():
+            if len(run) < 2:
+                new_segments.extend(run)
+                return
+            rows = {
+                column: np.concatenate([np.asarray(self._segment_columns(seg, [column])[column]) for seg in run])
+                for column in self.columns
+            }
+            for start in range(0, len(rows['timestamp']), self.segment_rows):
+                chunk = {column: values[start:start + self.segment_rows] for column, values in rows.items()}
+                segment = self._write_segment(chunk)
+                new_segments.append(segment)
+                written.append(segment)
+            retired.extend(run)
+        
+        for segment in self.segments:
+            if segment['rows'] < min_rows:
+                run.append(segment)
+            else:
+                _merge_run()
+                run = []
+                new_segments.append(segment)
+        _merge_run()
+        
+        if not retired:
+            return 0
+        
+        self.segments = new_segments
+        self._write_manifest()
+        for segment in retired:
+            self._mapped.pop(segment['name'], None)
+            shutil.rmtree(os.path.join(self.root, segment['name']), ignore_errors=True)
+        return len(retired) - len(written)
+    
+    def stats(self):
+        """
+        Segment count and row totals for monitoring
+        """
+        return {
+            'segments': len(self.segments),
+            'rows': sum(segment['rows'] for segment in self.segments),
+            'buffered_rows': sum(len(part['timestamp']) for part in self._buffer),
+            'tickers': len(self.dictionaries.get('ticker', []))
+        }
\ No newline at end of file
@@ -2,15 +2,68 @@
 Sentiment Analysis Engine
 Analyzes text sentiment using VADER
 """
+import os
+import pickle
 import pandas as pd
 import numpy as np
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re
 
+from modules.sentiment_cube import SentimentCube
+from modules.mention_index import TopMentionsIndex
+from modules.momentum_tracker import SentimentMomentumTracker
+from utils.metrics import instrument
+
+LEXICON_CACHE_PATH = os.path.join('data', 'cache', 'vader_lexicon.pkl')
+
+
+def load_vader_analyzer(cache_path=LEXICON_CACHE_PATH):
+    """
+    VADER analyzer built from a pickled copy of its parsed lexicons
+    The artifact is keyed by the size and mtime of VADER's lexicon files and
+    rebuilt from them when missing or stale
+    """
+    from vaderSentiment import vaderSentiment
+    
+    source_dir = os.path.dirname(os.path.abspath(vaderSentiment.__file__))
+    sources = [os.path.join(source_dir, name) for name in ('vader_lexicon.txt', 'emoji_utf8_lexicon.txt')]
+    key = [(os.path.basename(path), os.path.getsize(path), os.path.getmtime(path)) for path in sources]
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['key'] == key:
+            analyzer = vaderSentiment.SentimentIntensityAnalyzer.__new__(vaderSentiment.SentimentIntensityAnalyzer)
+            analyzer.lexicon = cached['lexicon']
+            analyzer.emojis = cached['emojis']
+            return analyzer
+    except (OSError, pickle.PickleError, EOFError, KeyError, TypeError):
+        pass
+    
+    analyzer = vaderSentiment.SentimentIntensityAnalyzer()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Written aside and renamed so concurrent workers never read a partial file
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'key': key, 'lexicon': analyzer.lexicon, 'emojis': analyzer.emojis}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not cache VADER lexicon: {e}")
+    return analyzer
+
 
 class SentimentAnalyzer:
     def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+        self._analyzer = None
+    
+    @property
+    def analyzer(self):
+        """
+        VADER analyzer, loaded on first use
+        """
+        if self._analyzer is None:
+            self._analyzer = load_vader_analyzer()
+        return self._analyzer
     
     def preprocess_text(self, text):
         """
@@ -43,6 +96,7 @@ class SentimentAnalyzer:
             'neutral': scores['neu']
         }
     
+    @instrument('analyzer.analyze_batch', rows=True)
     def analyze_batch(self, texts):
         """
         Analyze sentiment for multiple texts
@@ -53,11 +107,25 @@ class SentimentAnalyzer:
             results.append(sentiment)
         return results
     
-    def aggregate_sentiment_by_ticker(self, sentiment_df, ticker):
+    @instrument('analyzer.build_sentiment_cube')
+    def build_sentiment_cube(self, sentiment_df, freq='1H'):
+        """
+        Build a ticker x source x time cube for repeated slicing
+        """
+        return SentimentCube.from_frame(sentiment_df, freq=freq)
+    
+    @instrument('analyzer.aggregate_sentiment_by_ticker')
+    def aggregate_sentiment_by_ticker(self, sentiment_df, ticker, cube=None, source=None):
         """
         Aggregate sentiment scores for a specific ticker
+        Reads from a prebuilt SentimentCube when one is supplied
         """
+        if cube is not None:
+            return cube.ticker_summary(ticker, source=source)
+        
         ticker_data = sentiment_df[sentiment_df['ticker'] == ticker].copy()
+        if source is not None:
+            ticker_data = ticker_data[ticker_data['source'] == source]
         
         if ticker_data.empty:
             return None
@@ -84,10 +152,31 @@ class SentimentAnalyzer:
             'negative_ratio': negative_count / total_mentions if total_mentions > 0 else 0
         }
     
-    def calculate_sentiment_momentum(self, sentiment_df, ticker, window_hours=24):
+    @instrument('analyzer.build_momentum_tracker')
+    def build_momentum_tracker(self, sentiment_df, bucket='1H'):
+        """
+        Build an incremental momentum tracker over hourly running sums
+        """
+        return SentimentMomentumTracker.from_frame(sentiment_df, bucket=bucket)
+    
+    def aggregate_sentiment_by_ticker_chunked(self, store, ticker, source=None, start=None, end=None):
+        """
+        Aggregate sentiment for a ticker by streaming a PartitionedPostStore
+        Peak memory is one partition, not the whole history
+        """
+        cube = store.build_cube(ticker=ticker, start=start, end=end)
+        return cube.ticker_summary(ticker, source=source)
+    
+    @instrument('analyzer.calculate_sentiment_momentum')
+    def calculate_sentiment_momentum(self, sentiment_df, ticker, window_hours=24, tracker=None):
         """
         Calculate sentiment momentum (rate of change)
+        Served in O(1) from a SentimentMomentumTracker when one is supplied,
+        with the recent/previous split resolved to the tracker's buckets
         """
+        if tracker is not None:
+            return tracker.momentum(ticker, window_hours=window_hours)
+        
         ticker_data = sentiment_df[sentiment_df['ticker'] == ticker].copy()
         
         if ticker_data.empty:
@@ -114,23 +203,76 @@ class SentimentAnalyzer:
         
         return momentum
     
-    def get_top_mentions(self, sentiment_df, ticker, top_n=5, sentiment_type='positive'):
+    @instrument('analyzer.build_mention_index')
+    def build_mention_index(self, sentiment_df, capacity=10, bucket='1H'):
+        """
+        Build a streaming top-K mentions index
+        """
+        return TopMentionsIndex(capacity=capacity, bucket=bucket).add_posts(sentiment_df)
+    
+    @instrument('analyzer.get_top_mentions', rows=True)
+    def get_top_mentions(self, sentiment_df, ticker, top_n=5, sentiment_type='positive', index=None, since=None):
         """
         Get top positive or negative mentions for a ticker
+        Served from a TopMentionsIndex when one is supplied and top_n fits its capacity
         """
-        ticker_data = sentiment_df[sentiment_df['ticker'] == ticker].copy()
+        if index is not None:
+            top_mentions = index.top(ticker, top_n=top_n, sentiment_type=sentiment_type, since=since)
+            if top_mentions is not None:
+                return top_mentions
+        
+        ticker_data = sentiment_df[sentiment_df['ticker'] == ticker]
+        if since is not None:
+            ticker_data = ticker_data[pd.to_datetime(ticker_data['timestamp']) >= pd.Timestamp(since).floor('1H')]
         
         if ticker_data.empty:
             return []
         
-        if sentiment_type == 'positive':
-            sorted_data = ticker_data.sort_values('sentiment_score', ascending=False)
+        # Partial selection of the top_n rows, then sort only those
+        scores = ticker_data['sentiment_score'].to_numpy()
+        keys = -scores if sentiment_type == 'positive' else scores
+        if len(keys) > top_n:
+            candidates = np.argpartition(keys, top_n - 1)[:top_n]
         else:
-            sorted_data = ticker_data.sort_values('sentiment_score', ascending=True)
+            candidates = np.arange(len(keys))
+        ordered = candidates[np.argsort(keys[candidates], kind='stable')]
         
-        top_mentions = sorted_data.head(top_n)[['timestamp', 'text', 'sentiment_score', 'source']].to_dict('records')
+        top_mentions = ticker_data.iloc[ordered][['timestamp', 'text', 'sentiment_score', 'source']].to_dict('records')
         return top_mentions
     
+    def get_top_mentions_chunked(self, store, ticker, top_n=5, sentiment_type='positive', start=None, end=None):
+        """
+        Top mentions over a PartitionedPostStore, merging per-partition candidates
+        """
+        index = TopMentionsIndex(capacity=top_n)
+        for chunk in store.iter_chunks(ticker=ticker, start=start, end=end):
+            index.add_posts(chunk)
+        return index.top(ticker, top_n=top_n, sentiment_type=sentiment_type)
+    
+    def aggregate_by_time_window_chunked(self, store, ticker, window='1H', start=None, end=None):
+        """
+        Time-window aggregation over a PartitionedPostStore, same columns as
+        aggregate_by_time_window
+        """
+        cube = store.build_cube(ticker=ticker, start=start, end=end, freq=window)
+        rolled = cube.rollup('bucket', ticker=ticker)
+        if rolled.empty or rolled['count'].sum() == 0:
+            return pd.DataFrame()
+        
+        # Trim to the span the ticker actually covers, like resample does
+        occupied = np.flatnonzero(rolled['count'].to_numpy() > 0)
+        rolled = rolled.iloc[occupied[0]:occupied[-1] + 1]
+        
+        aggregated = pd.DataFrame({
+            'timestamp': rolled['bucket'].to_numpy(),
+            'avg_sentiment': rolled['avg_sentiment'].to_numpy(),
+            'sentiment_std': rolled['sentiment_std'].to_numpy(),
+            'mention_count': rolled['count'].to_numpy().astype(int),
+            'avg_confidence': rolled['avg_confidence'].to_numpy()
+        })
+        aggregated['ticker'] = ticker
+        return aggregated
+    
     def aggregate_by_time_window(self, sentiment_df, ticker, window='1H'):
         """
         Aggregate sentiment by time windows (hourly, daily, etc.)
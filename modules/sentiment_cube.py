@@ -0,0 +1,252 @@
+"""
+Sentiment Aggregation Cube
+Pre-aggregates sentiment by ticker, source and time bucket for fast slicing
+"""
+import pandas as pd
+import numpy as np
+
+
+class SentimentCube:
+    """
+    Dense (ticker, source, time bucket) cube of additive sentiment measures.
+    Dimensions are dictionary-encoded and every measure is filled in a single
+    bincount pass, so slices and roll-ups never rescan the raw posts.
+    """
+    DIMENSIONS = ('ticker', 'source', 'bucket')
+    MEASURES = ('count', 'sentiment_sum', 'sentiment_sumsq', 'confidence_sum',
+                'positive_count', 'negative_count')
+    
+    def __init__(self, freq='1H', positive_threshold=0.2, negative_threshold=-0.2):
+        self.freq = freq
+        self.positive_threshold = positive_threshold
+        self.negative_threshold = negative_threshold
+        self.tickers = pd.Index([], dtype=object)
+        self.sources = pd.Index([], dtype=object)
+        self.buckets = pd.DatetimeIndex([])
+        self.measures = {name: np.zeros((0, 0, 0)) for name in self.MEASURES}
+    
+    @classmethod
+    def from_frame(cls, sentiment_df, freq='1H'):
+        """
+        Build a cube from a sentiment DataFrame in one pass
+        """
+        cube = cls(freq=freq)
+        cube.update(sentiment_df)
+        return cube
+    
+    @property
+    def shape(self):
+        return (len(self.tickers), len(self.sources), len(self.buckets))
+    
+    @property
+    def empty(self):
+        return len(self.tickers) == 0
+    
+    def _encode(self, sentiment_df):
+        """
+        Dictionary-encode the cube dimensions of a sentiment DataFrame
+        """
+        tickers = pd.Categorical(sentiment_df['ticker'])
+        if 'source' in sentiment_df.columns:
+            sources = pd.Categorical(sentiment_df['source'].fillna('Unknown'))
+        else:
+            sources = pd.Categorical(['Unknown'] * len(sentiment_df))
+        buckets = pd.Categorical(pd.to_datetime(sentiment_df['timestamp']).dt.floor(self.freq))
+        return tickers, sources, buckets
+    
+    def _fill(self, sentiment_df):
+        """
+        Aggregate a sentiment DataFrame into fresh measure arrays
+        """
+        tickers, sources, buckets = self._encode(sentiment_df)
+        shape = (len(tickers.categories), len(sources.categories), len(buckets.categories))
+        flat = np.ravel_multi_index((tickers.codes, sources.codes, buckets.codes), shape)
+        size = int(np.prod(shape))
+        
+        scores = sentiment_df['sentiment_score'].to_numpy(dtype=float)
+        if 'confidence' in sentiment_df.columns:
+            confidence = sentiment_df['confidence'].to_numpy(dtype=float)
+        else:
+            confidence = np.abs(scores)
+        
+        weights = {
+            'count': None,
+            'sentiment_sum': scores,
+            'sentiment_sumsq': scores * scores,
+            'confidence_sum': confidence,
+            'positive_count': (scores > self.positive_threshold).astype(float),
+            'negative_count': (scores < self.negative_threshold).astype(float)
+        }
+        measures = {
+            name: np.bincount(flat, weights=w, minlength=size).astype(float).reshape(shape)
+            for name, w in weights.items()
+        }
+        return (
+            pd.Index(tickers.categories, dtype=object),
+            pd.Index(sources.categories, dtype=object),
+            pd.DatetimeIndex(buckets.categories),
+            measures
+        )
+    
+    def update(self, sentiment_df):
+        """
+        Fold new posts into the cube, growing dimensions as needed
+        """
+        if sentiment_df is None or sentiment_df.empty:
+            return self
+        
+        tickers, sources, buckets, measures = self._fill(sentiment_df)
+        
+        if self.empty:
+            self.tickers, self.sources, self.buckets, self.measures = tickers, sources, buckets, measures
+            return self
+        
+        self.reserve(tickers, sources, buckets)
+        
+        # Every dimension now covers the batch, so add in place
+        new_idx = np.ix_(self.tickers.get_indexer(tickers),
+                         self.sources.get_indexer(sources),
+                         self.buckets.get_indexer(buckets))
+        for name in self.MEASURES:
+            self.measures[name][new_idx] += measures[name]
+        return self
+    
+    def reserve(self, tickers=None, sources=None, buckets=None):
+        """
+        Grow the cube dimensions ahead of time
+        Pre-sizing avoids a reallocation per update when streaming many batches
+        """
+        all_tickers = self.tickers.union(pd.Index(tickers if tickers is not None else [], dtype=object))
+        all_sources = self.sources.union(pd.Index(sources if sources is not None else [], dtype=object))
+        all_buckets = self.buckets.union(pd.DatetimeIndex(buckets if buckets is not None else []))
+        shape = (len(all_tickers), len(all_sources), len(all_buckets))
+        if shape == self.shape:
+            return self
+        
+        old_idx = np.ix_(all_tickers.get_indexer(self.tickers),
+                         all_sources.get_indexer(self.sources),
+                         all_buckets.get_indexer(self.buckets))
+        
+        grown = {}
+        for name in self.MEASURES:
+            values = np.zeros(shape)
+            values[old_idx] = self.measures[name]
+            grown[name] = values
+        
+        self.tickers, self.sources, self.buckets, self.measures = all_tickers, all_sources, all_buckets, grown
+        return self
+    
+    def _selector(self, ticker=None, source=None, start=None, end=None):
+        """
+        Translate dimension filters into index arrays along each axis
+        """
+        def _members(index, value):
+            if value is None:
+                return np.arange(len(index))
+            values = [value] if isinstance(value, str) else list(value)
+            positions = index.get_indexer(values)
+            return positions[positions >= 0]
+        
+        bucket_mask = np.ones(len(self.buckets), dtype=bool)
+        if start is not None:
+            bucket_mask &= self.buckets >= pd.Timestamp(start).floor(self.freq)
+        if end is not None:
+            bucket_mask &= self.buckets <= pd.Timestamp(end)
+        
+        return np.ix_(_members(self.tickers, ticker),
+                      _members(self.sources, source),
+                      np.flatnonzero(bucket_mask))
+    
+    def totals(self, ticker=None, source=None, start=None, end=None):
+        """
+        Sum every measure over the selected slice of the cube
+        """
+        if self.empty:
+            return {name: 0.0 for name in self.MEASURES}
+        idx = self._selector(ticker, source, start, end)
+        return {name: float(values[idx].sum()) for name, values in self.measures.items()}
+    
+    def rollup(self, by='source', ticker=None, source=None, start=None, end=None):
+        """
+        Roll the selected slice up to the given dimensions
+        Returns a DataFrame with one row per combination of the kept dimensions
+        """
+        keep = [by] if isinstance(by, str) else list(by)
+        for dim in keep:
+            if dim not in self.DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension: {dim}")
+        
+        if self.empty:
+            empty = pd.DataFrame({dim: pd.Series(dtype=object) for dim in keep})
+            for name in self.MEASURES:
+                empty[name] = pd.Series(dtype='float64')
+            return self._with_statistics(empty)
+        
+        idx = self._selector(ticker, source, start, end)
+        axes = tuple(i for i, dim in enumerate(self.DIMENSIONS) if dim not in keep)
+        labels = {
+            'ticker': self.tickers[idx[0].ravel()],
+            'source': self.sources[idx[1].ravel()],
+            'bucket': self.buckets[idx[2].ravel()]
+        }
+        
+        kept_dims = [dim for dim in self.DIMENSIONS if dim in keep]
+        if kept_dims:
+            index = pd.MultiIndex.from_product([labels[dim] for dim in kept_dims], names=kept_dims)
+        else:
+            index = pd.RangeIndex(1)
+        
+        columns = {
+            name: values[idx].sum(axis=axes).ravel()
+            for name, values in self.measures.items()
+        }
+        result = pd.DataFrame(columns, index=index).reset_index(drop=not kept_dims)
+        return self._with_statistics(result)
+    
+    def _with_statistics(self, rolled):
+        """
+        Derive mean/std/ratios from the additive measures
+        """
+        count = rolled['count'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = rolled['sentiment_sum'].to_numpy() / count
+            variance = (rolled['sentiment_sumsq'].to_numpy() - count * mean ** 2) / (count - 1)
+        rolled['avg_sentiment'] = mean
+        rolled['sentiment_std'] = np.sqrt(np.clip(variance, 0, None))
+        rolled.loc[count < 2, 'sentiment_std'] = np.nan
+        rolled['avg_confidence'] = np.where(count > 0, rolled['confidence_sum'].to_numpy() / np.where(count > 0, count, 1), np.nan)
+        rolled['neutral_count'] = count - rolled['positive_count'] - rolled['negative_count']
+        return rolled
+    
+    def ticker_summary(self, ticker, source=None, start=None, end=None):
+        """
+        Aggregate metrics for one ticker in the shape of
+        SentimentAnalyzer.aggregate_sentiment_by_ticker
+        """
+        totals = self.totals(ticker=ticker, source=source, start=start, end=end)
+        total_mentions = int(totals['count'])
+        
+        if total_mentions == 0:
+            return None
+        
+        avg_sentiment = totals['sentiment_sum'] / total_mentions
+        if total_mentions > 1:
+            variance = (totals['sentiment_sumsq'] - total_mentions * avg_sentiment ** 2) / (total_mentions - 1)
+            sentiment_std = float(np.sqrt(max(variance, 0.0)))
+        else:
+            sentiment_std = np.nan
+        
+        positive_count = int(totals['positive_count'])
+        negative_count = int(totals['negative_count'])
+        
+        return {
+            'ticker': ticker,
+            'avg_sentiment': avg_sentiment,
+            'sentiment_std': sentiment_std,
+            'total_mentions': total_mentions,
+            'positive_count': positive_count,
+            'negative_count': negative_count,
+            'neutral_count': total_mentions - positive_count - negative_count,
+            'positive_ratio': positive_count / total_mentions,
+            'negative_ratio': negative_count / total_mentions
+        }
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Significance Engine
+Empirical p-values and confidence intervals for sentiment-price correlations
+"""
+import time
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def _standardize_rows(matrix):
+    """
+    Center and scale each row so a dot product divided by n is a Pearson r
+    """
+    centered = matrix - matrix.mean(axis=-1, keepdims=True)
+    scale = np.sqrt((centered ** 2).mean(axis=-1, keepdims=True))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(scale > 0, centered / scale, 0.0)
+
+
+def _block_indices(rng, n, block_size, rows):
+    """
+    Index matrix of moving blocks, one resampled series per row
+    """
+    num_blocks = int(np.ceil(n / block_size))
+    starts = rng.integers(0, n - block_size + 1, size=(rows, num_blocks))
+    offsets = np.arange(block_size)
+    return (starts[:, :, None] + offsets).reshape(rows, -1)[:, :n]
+
+
+def _run_test(x, y, n_permutations, method, block_size, time_budget, confidence, batch_size, seed):
+    """
+    Batched permutation test plus block-bootstrap CI for one series pair
+    Kept at module level so it can be shipped to worker processes
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    rng = np.random.default_rng(seed)
+    deadline = time.perf_counter() + time_budget
+    
+    x_std = _standardize_rows(x)
+    y_std = _standardize_rows(y)
+    observed = float(x_std @ y_std / n)
+    
+    if block_size is None:
+        block_size = max(2, int(round(n ** (1 / 3))))
+    block_size = min(block_size, n)
+    
+    # Null distribution: shuffle y in a way that keeps its autocorrelation
+    exceed = 0
+    done = 0
+    base = np.arange(n)
+    while done < n_permutations and time.perf_counter() < deadline:
+        rows = min(batch_size, n_permutations - done)
+        if method == 'circular_shift':
+            min_shift = max(1, block_size)
+            shifts = rng.integers(min_shift, max(min_shift + 1, n - min_shift + 1), size=rows)
+            idx = (base[None, :] + shifts[:, None]) % n
+        else:
+            idx = _block_indices(rng, n, block_size, rows)
+        null = _standardize_rows(y[idx]) @ x_std / n
+        exceed += int(np.count_nonzero(np.abs(null) >= abs(observed) - 1e-12))
+        done += rows
+    
+    # Confidence interval: moving-block bootstrap of (x, y) pairs
+    draws = []
+    drawn = 0
+    while drawn < n_permutations and time.perf_counter() < deadline:
+        rows = min(batch_size, n_permutations - drawn)
+        idx = _block_indices(rng, n, block_size, rows)
+        boot = (_standardize_rows(x[idx]) * _standardize_rows(y[idx])).mean(axis=1)
+        draws.append(boot)
+        drawn += rows
+    
+    if draws:
+        alpha = (1 - confidence) / 2
+        ci_low, ci_high = np.quantile(np.concatenate(draws), [alpha, 1 - alpha])
+    else:
+        ci_low, ci_high = np.nan, np.nan
+    
+    return {
+        'correlation': observed,
+        'empirical_p_value': (exceed + 1) / (done + 1),
+        'ci_low': float(ci_low),
+        'ci_high': float(ci_high),
+        'n_permutations': done,
+        'n_bootstrap': drawn,
+        'method': method,
+        'block_size': block_size
+    }
+
+
+class SignificanceEngine:
+    """
+    Resampling-based significance for correlations between autocorrelated
+    hourly series. Permutations are evaluated as one matrix product per
+    batch; many tickers are spread over a process pool. Every test stops at
+    its time budget and reports how many resamples it actually completed.
+    """
+    METHODS = ('circular_shift', 'block_permutation')
+    
+    def __init__(self, n_permutations=2000, method='circular_shift', block_size=None,
+                 time_budget=2.0, confidence=0.95, batch_size=500, max_workers=None,
+                 parallel_threshold=8, seed=None):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown resampling method: {method}")
+        self.n_permutations = n_permutations
+        self.method = method
+        self.block_size = block_size
+        self.time_budget = time_budget
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+        self.seed = seed
+    
+    def _args(self, x, y, seed):
+        return (x, y, self.n_permutations, self.method, self.block_size,
+                self.time_budget, self.confidence, self.batch_size, seed)
+    
+    def _empty_result(self):
+        return {
+            'correlation': 0,
+            'empirical_p_value': 1.0,
+            'ci_low': np.nan,
+            'ci_high': np.nan,
+            'n_permutations': 0,
+            'n_bootstrap': 0,
+            'method': self.method,
+            'block_size': self.block_size
+        }
+    
+    def test(self, x, y):
+        """
+        Empirical significance for a single pair of series
+        """
+        if len(x) < 4 or np.std(x) == 0 or np.std(y) == 0:
+            return self._empty_result()
+        return _run_test(*self._args(x, y, self.seed))
+    
+    def test_many(self, pairs):
+        """
+        Empirical significance for many named series pairs
+        Args:
+            pairs: dict mapping ticker -> (x, y)
+        Returns:
+            dict mapping ticker -> result dict
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(len(pairs))
+        results = {}
+        jobs = {}
+        for (ticker, (x, y)), seed in zip(pairs.items(), seeds):
+            if len(x) < 4 or np.std(x) == 0 or np.std(y) == 0:
+                results[ticker] = self._empty_result()
+            else:
+                jobs[ticker] = self._args(x, y, seed)
+        
+        workers = self.max_workers or os.cpu_count() or 1
+        if len(jobs) >= self.parallel_threshold and workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    futures = {ticker: pool.submit(_run_test, *args) for ticker, args in jobs.items()}
+                    for ticker, future in futures.items():
+                        results[ticker] = future.result()
+                return results
+            except Exception as e:
+                print(f"Warning: Parallel significance testing failed, running serially: {e}")
+        
+        for ticker, args in jobs.items():
+            if ticker not in results:
+                results[ticker] = _run_test(*args)
+        return results
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Update Stream
+Per-ticker deltas pushed to connected clients as the data hub ingests new data
+"""
+import json
+import queue
+import threading
+
+from modules.analytics_service import to_json_safe
+
+
+class StreamClient:
+    """
+    One connected consumer with its ticker filter and a bounded outbox
+    """
+    
+    def __init__(self, tickers, days, max_pending=100):
+        self.tickers = set(tickers)
+        self.days = days
+        self.events = queue.Queue(maxsize=max_pending)
+        self.dropped = False
+    
+    def push(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # A client this far behind resynchronizes from a reset instead of a backlog
+            self.dropped = True
+    
+    def next_event(self, timeout=15):
+        """
+        Next event to send, or None on timeout (time for a keep-alive)
+        """
+        if self.dropped:
+            self.dropped = False
+            with self.events.mutex:
+                self.events.queue.clear()
+            return {'type': 'reset'}
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class UpdateStream:
+    """
+    Turns hub publishes into per-ticker delta events.
+    For every ticker touched by an ingest it sends the hourly buckets from
+    the first affected hour onwards, the recomputed summary metrics and any
+    sentiment spikes among the new posts. Deltas are built once per
+    (ticker, days) and shared by every client that asked for them, so the
+    bytes on the wire follow the volume of change rather than history size.
+    """
+    
+    def __init__(self, service):
+        self.service = service
+        self.hub = service.hub
+        self._clients = []
+        self._lock = threading.Lock()
+        self.hub.add_listener(self._on_publish)
+    
+    def subscribe(self, tickers, days):
+        client = StreamClient(tickers, days)
+        with self._lock:
+            self._clients.append(client)
+        return client
+    
+    def unsubscribe(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+    
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+    
+    def _on_publish(self, version, new_bars, new_posts):
+        with self._lock:
+            clients = list(self._clients)
+        if not clients:
+            return
+        
+        if new_bars is None and new_posts is None:
+            for client in clients:
+                client.push({'type': 'reset', 'version': version})
+            return
+        
+        touched = set()
+        if new_bars is not None and not new_bars.empty:
+            touched.update(new_bars['Ticker'].unique())
+        if new_posts is not None and not new_posts.empty:
+            touched.update(new_posts['ticker'].unique())
+        
+        deltas = {}
+        for client in clients:
+            for ticker in sorted(touched & client.tickers):
+                key = (ticker, client.days)
+                if key not in deltas:
+                    deltas[key] = self.ticker_delta(ticker, client.days, version, new_bars, new_posts)
+                client.push(deltas[key])
+    
+    def ticker_delta(self, ticker, days, version, new_bars, new_posts):
+        """
+        Delta event for one ticker
+        """
+        event = {'type': 'delta', 'version': version, 'ticker': ticker}
+        event.update(self.service.ticker_changes(ticker, days, new_bars, new_posts))
+        return event
+    
+    def format_event(self, event):
+        """
+        Encode an event in text/event-stream framing
+        """
+        data = json.dumps(to_json_safe(event), separators=(',', ':'))
+        return f"event: {event['type']}\nid: {event.get('version', '')}\ndata: {data}\n\n".encode('utf-8')
\ No newline at end of file
@@ -3,11 +3,11 @@ Visualization Components
 Creates interactive charts using Plotly
 """
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from utils.metrics import instrument
+
 
 class Visualizations:
     def __init__(self):
@@ -15,6 +15,7 @@ class Visualizations:
         self.color_negative = '#D32F2F'
         self.color_neutral = '#FFA726'
     
+    @instrument('visualizations.create_sentiment_gauge')
     def create_sentiment_gauge(self, sentiment_score, ticker):
         """
         Create a gauge chart for sentiment score
@@ -62,6 +63,7 @@ class Visualizations:
         
         return fig
     
+    @instrument('visualizations.create_sentiment_vs_price_chart')
     def create_sentiment_vs_price_chart(self, merged_df, ticker):
         """
         Create dual-axis chart comparing sentiment and stock price
@@ -69,6 +71,7 @@ class Visualizations:
         if merged_df.empty:
             return go.Figure()
         
+        from plotly.subplots import make_subplots
         fig = make_subplots(
             rows=2, cols=1,
             shared_xaxes=True,
@@ -119,6 +122,7 @@ class Visualizations:
         
         return fig
     
+    @instrument('visualizations.create_mention_volume_chart')
     def create_mention_volume_chart(self, sentiment_df, ticker):
         """
         Create bar chart showing volume of mentions over time
@@ -155,19 +159,29 @@ class Visualizations:
         
         return fig
     
-    def create_sentiment_distribution_pie(self, sentiment_df, ticker):
+    @instrument('visualizations.create_sentiment_distribution_pie')
+    def create_sentiment_distribution_pie(self, sentiment_df, ticker, cube=None):
         """
         Create pie chart showing sentiment distribution
+        Uses category counts from a SentimentCube when one is supplied
         """
-        ticker_data = sentiment_df[sentiment_df['ticker'] == ticker].copy()
+        if cube is not None:
+            totals = cube.totals(ticker=ticker)
+            if totals['count'] == 0:
+                return go.Figure()
+            positive = int(totals['positive_count'])
+            negative = int(totals['negative_count'])
+            neutral = int(totals['count']) - positive - negative
+        else:
+            ticker_data = sentiment_df[sentiment_df['ticker'] == ticker]
         
-        if ticker_data.empty:
-            return go.Figure()
+            if ticker_data.empty:
+                return go.Figure()
         
-        # Categorize sentiment
-        positive = len(ticker_data[ticker_data['sentiment_score'] > 0.2])
-        negative = len(ticker_data[ticker_data['sentiment_score'] < -0.2])
-        neutral = len(ticker_data) - positive - negative
+            # Categorize sentiment
+            positive = len(ticker_data[ticker_data['sentiment_score'] > 0.2])
+            negative = len(ticker_data[ticker_data['sentiment_score'] < -0.2])
+            neutral = len(ticker_data) - positive - negative
         
         fig = go.Figure(data=[go.Pie(
             labels=['Positive', 'Neutral', 'Negative'],
@@ -187,6 +201,7 @@ class Visualizations:
         
         return fig
     
+    @instrument('visualizations.create_correlation_heatmap')
     def create_correlation_heatmap(self, correlation_data):
         """
         Create heatmap showing correlation between sentiment and price for multiple stocks
@@ -220,6 +235,7 @@ class Visualizations:
         
         return fig
     
+    @instrument('visualizations.create_candlestick_chart')
     def create_candlestick_chart(self, stock_df, ticker):
         """
         Create candlestick chart for stock price
@@ -249,6 +265,7 @@ class Visualizations:
         
         return fig
     
+    @instrument('visualizations.create_multi_stock_comparison')
     def create_multi_stock_comparison(self, sentiment_summaries):
         """
         Create comparison chart for multiple stocks
@@ -260,6 +277,7 @@ class Visualizations:
         avg_sentiments = [sentiment_summaries[t]['avg_sentiment'] for t in tickers]
         correlations = [sentiment_summaries[t]['price_correlation'] for t in tickers]
         
+        from plotly.subplots import make_subplots
         fig = make_subplots(
             rows=1, cols=2,
             subplot_titles=('Average Sentiment', 'Price Correlation'),
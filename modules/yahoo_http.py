@@ -0,0 +1,71 @@
+"""
+Yahoo HTTP Client
+Minimal client for Yahoo-compatible chart and quote endpoints, used in place of yfinance when MARKET_DATA_URL is set
+"""
+import json
+from urllib.parse import urlencode, quote
+from urllib.request import urlopen
+import pandas as pd
+
+
+class YahooHTTPTicker:
+    """
+    Stand-in for yfinance.Ticker against a Yahoo-compatible base URL.
+    Only what DataCollector uses is implemented: history() returns hourly
+    or daily bars indexed by an exchange-local 'Datetime'/'Date' index, and
+    info maps the quote endpoint onto yfinance's info keys. Used to point
+    the app at the load-test stub server; HTTP errors propagate to the
+    collector, which retries and falls back to simulation as with yfinance.
+    """
+    
+    def __init__(self, ticker, base_url, timeout=10):
+        self.ticker = ticker
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+    
+    def _get(self, path, params):
+        with urlopen(f"{self.base_url}{path}?{urlencode(params)}", timeout=self.timeout) as response:
+            return json.loads(response.read())
+    
+    def history(self, period=None, interval='1h', start=None, end=None):
+        params = {'interval': interval}
+        if start is not None:
+            params['period1'] = int(pd.Timestamp(start).timestamp())
+            params['period2'] = int(pd.Timestamp(end).timestamp()) if end is not None else int(pd.Timestamp.now().timestamp())
+        else:
+            params['range'] = period or '1mo'
+        chart = self._get(f"/v8/finance/chart/{quote(self.ticker)}", params)['chart']
+        if chart.get('error') or not chart.get('result'):
+            return pd.DataFrame()
+        
+        result = chart['result'][0]
+        timestamps = result.get('timestamp') or []
+        if not timestamps:
+            return pd.DataFrame()
+        bars = result['indicators']['quote'][0]
+        tz = result['meta'].get('exchangeTimezoneName', 'America/New_York')
+        index_name = 'Date' if interval.endswith(('d', 'wk', 'mo')) else 'Datetime'
+        index = pd.to_datetime(timestamps, unit='s', utc=True).tz_convert(tz).rename(index_name)
+        df = pd.DataFrame({
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Volume': bars['volume']
+        }, index=index, dtype=float)
+        df['Volume'] = df['Volume'].fillna(0).astype('int64')
+        return df.dropna(subset=['Close'])
+    
+    @property
+    def info(self):
+        results = self._get('/v7/finance/quote', {'symbols': self.ticker})['quoteResponse']['result']
+        if not results:
+            return {}
+        quote_row = results[0]
+        return {
+            'currentPrice': quote_row.get('regularMarketPrice', 0),
+            'previousClose': quote_row.get('regularMarketPreviousClose', 0),
+            'marketCap': quote_row.get('marketCap', 0),
+            'volume': quote_row.get('regularMarketVolume', 0),
+            'longName': quote_row.get('longName', self.ticker)
+        }
\ No newline at end of file
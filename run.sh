@@ -24,21 +24,11 @@ if [ "$choice" = "1" ]; then
     streamlit run app.py
 elif [ "$choice" = "2" ]; then
     echo ""
-    echo "Opening Modern Web Interface..."
-    echo "Opening web_interface.html in your default browser..."
+    echo "Starting the analytics API and Modern Web Interface..."
+    echo "Open http://localhost:8000/web_interface.html in your browser"
+    echo "(opening web_interface.html directly from disk falls back to mock data)"
     echo ""
-    if [[ "$OSTYPE" == "darwin"* ]]; then
-        # macOS
-        open web_interface.html
-    elif [[ "$OSTYPE" == "linux-gnu"* ]]; then
-        # Linux
-        xdg-open web_interface.html
-    elif [[ "$OSTYPE" == "msys" ]] || [[ "$OSTYPE" == "cygwin" ]]; then
-        # Windows
-        start web_interface.html
-    else
-        echo "Please manually open web_interface.html in your browser"
-    fi
+    python api_server.py --port 8000
 else
     echo "Invalid choice. Please run the script again and choose 1 or 2."
 fi
\ No newline at end of file
@@ -1,3 +1,7 @@
+// Analytics API served by api_server.py; mock data is used when it is unreachable
+const API_BASE = window.SENTIMENT_API_BASE || '';
+let apiAvailable = window.location.protocol !== 'file:';
+
 // Mock data for demonstration
 const mockStockData = {
     AAPL: { name: 'Apple Inc.', price: 182.45, change: 2.34, sentiment: 0.65, correlation: 0.72 },
@@ -7,17 +11,103 @@ const mockStockData = {
     AMZN: { name: 'Amazon.com, Inc.', price: 151.34, change: -0.67, sentiment: 0.48, correlation: 0.55 }
 };
 
+let stockData = Object.assign({}, mockStockData);
 let selectedStocks = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN'];
+let timeRangeDays = 7;
+let timeRangeTimer = null;
 let autoRefreshEnabled = false;
 let autoRefreshInterval = null;
+let updateStream = null;
+let overviewRenderPending = false;
+
+// Hourly series last drawn per ticker, extended in place by streamed deltas
+let seriesCache = {};
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
     updateStockGrid();
     updateLastUpdate();
     initializeCharts();
+    
+    loadSummaries().then(loaded => {
+        if (loaded) {
+            updateStockGrid();
+            updateCharts();
+            updateLastUpdate();
+        }
+    });
 });
 
+// Fetch JSON from the analytics API, or null when it is unavailable
+// The browser revalidates with If-None-Match, so unchanged data costs a 304
+async function fetchJSON(endpoint, params) {
+    if (!apiAvailable) {
+        return null;
+    }
+    
+    const query = new URLSearchParams(params || {}).toString();
+    try {
+        const response = await fetch(`${API_BASE}/api/${endpoint}?${query}`, { cache: 'no-cache' });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return await response.json();
+    } catch (error) {
+        console.warn(`Analytics API unavailable for ${endpoint}, using mock data`, error);
+        if (error instanceof TypeError) {
+            apiAvailable = false;
+        }
+        return null;
+    }
+}
+
+// Load summaries for every ticker so toggling stocks needs no new request
+async function loadSummaries() {
+    const data = await fetchJSON('summary', { tickers: Object.keys(mockStockData).join(','), days: timeRangeDays });
+    if (!data) {
+        return false;
+    }
+    
+    data.summaries.forEach(applySummary);
+    return true;
+}
+
+// Store one ticker's summary from the API
+function applySummary(summary) {
+    const previous = stockData[summary.ticker] || {};
+    stockData[summary.ticker] = {
+        name: summary.name,
+        price: summary.price ?? 0,
+        change: summary.change ?? 0,
+        sentiment: summary.sentiment ?? 0,
+        correlation: summary.correlation ?? 0,
+        leadingCorrelation: summary.leading_correlation ?? 0,
+        volatility: summary.sentiment_volatility ?? 0,
+        significant: summary.significant,
+        spikeCount: summary.spike_count ?? 0,
+        newSpikes: previous.newSpikes ?? 0
+    };
+}
+
+// Escape text from the API before inserting it as HTML
+function escapeHTML(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// Human-readable age of an ISO timestamp
+function formatRelativeTime(timestamp) {
+    const hours = Math.round((Date.now() - new Date(timestamp).getTime()) / 3600000);
+    if (hours < 1) {
+        return 'just now';
+    }
+    if (hours < 48) {
+        return hours + (hours === 1 ? ' hour ago' : ' hours ago');
+    }
+    return Math.round(hours / 24) + ' days ago';
+}
+
 // Toggle stock selection
 function toggleStock(element) {
     const ticker = element.getAttribute('data-ticker');
@@ -36,45 +126,173 @@ function toggleStock(element) {
 // Update time range
 function updateTimeRange(value) {
     document.getElementById('timeRangeValue').textContent = value + ' days';
+    timeRangeDays = parseInt(value, 10);
+    
+    // Wait for the slider to settle before asking the API for the new range
+    clearTimeout(timeRangeTimer);
+    timeRangeTimer = setTimeout(() => {
+        seriesCache = {};
+        if (updateStream) {
+            openUpdateStream();
+        }
+        loadSummaries().then(loaded => {
+            if (loaded) {
+                updateStockGrid();
+                updateCharts();
+                updateLastUpdate();
+            }
+        });
+    }, 400);
 }
 
 // Refresh data
 function refreshData() {
-    const btn = event.target.closest('.btn');
-    btn.innerHTML = '<span class="loading"></span> Refreshing...';
-    btn.disabled = true;
+    const btn = window.event ? window.event.target.closest('.btn') : null;
+    if (btn) {
+        btn.innerHTML = '<span class="loading"></span> Refreshing...';
+        btn.disabled = true;
+    }
     
-    setTimeout(() => {
+    loadSummaries().then(() => {
         updateStockGrid();
         updateCharts();
         updateLastUpdate();
-        btn.innerHTML = '<span class="icon">🔄</span> Refresh Data';
-        btn.disabled = false;
-    }, 1500);
+        if (btn) {
+            btn.innerHTML = '<span class="icon">🔄</span> Refresh Data';
+            btn.disabled = false;
+        }
+    });
 }
 
 // Toggle auto-refresh
+// With the API available the server pushes changes as they are ingested;
+// otherwise the page falls back to polling every 5 minutes
 function toggleAutoRefresh() {
     autoRefreshEnabled = document.getElementById('autoRefresh').checked;
     
-    if (autoRefreshEnabled) {
-        autoRefreshInterval = setInterval(() => {
-            refreshData();
-        }, 300000); // 5 minutes
+    if (autoRefreshEnabled && apiAvailable && window.EventSource) {
+        openUpdateStream();
+    } else if (autoRefreshEnabled) {
+        startPolling();
     } else {
+        closeUpdateStream();
         if (autoRefreshInterval) {
             clearInterval(autoRefreshInterval);
+            autoRefreshInterval = null;
         }
     }
 }
 
+function startPolling() {
+    if (!autoRefreshInterval) {
+        autoRefreshInterval = setInterval(() => {
+            refreshData();
+        }, 300000); // 5 minutes
+    }
+}
+
+// Subscribe to server-sent deltas for every ticker over the current range
+function openUpdateStream() {
+    closeUpdateStream();
+    const query = new URLSearchParams({ tickers: Object.keys(mockStockData).join(','), days: timeRangeDays });
+    updateStream = new EventSource(`${API_BASE}/api/stream?${query}`);
+    
+    updateStream.addEventListener('delta', event => applyDelta(JSON.parse(event.data)));
+    updateStream.addEventListener('reset', () => {
+        // The server rebuilt its data or dropped us for falling behind: resynchronize once
+        seriesCache = {};
+        refreshData();
+    });
+    updateStream.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (updateStream && updateStream.readyState === EventSource.CLOSED) {
+            console.warn('Update stream closed, falling back to polling');
+            closeUpdateStream();
+            if (autoRefreshEnabled) {
+                startPolling();
+            }
+        }
+    };
+}
+
+function closeUpdateStream() {
+    if (updateStream) {
+        updateStream.close();
+        updateStream = null;
+    }
+}
+
+// Apply one ticker's delta: summary metrics, new hourly buckets and spike events
+function applyDelta(delta) {
+    applySummary(delta.summary);
+    stockData[delta.ticker].newSpikes += delta.spikes.length;
+    mergeSeries(delta.ticker, delta.buckets);
+    
+    if (selectedStocks.includes(delta.ticker)) {
+        scheduleOverviewRender();
+    }
+    updateLastUpdate();
+}
+
+// Deltas for several tickers usually arrive together; redraw the overview once per frame
+function scheduleOverviewRender() {
+    if (overviewRenderPending) {
+        return;
+    }
+    overviewRenderPending = true;
+    requestAnimationFrame(() => {
+        overviewRenderPending = false;
+        updateStockGrid();
+        updateOverviewCharts();
+    });
+}
+
+// Merge streamed buckets into the cached series and the chart showing it
+function mergeSeries(ticker, buckets) {
+    const cached = seriesCache[ticker];
+    if (!cached || buckets.timestamp.length === 0) {
+        return;
+    }
+    
+    // Buckets at or after the first streamed one are replaced, older ones kept
+    const firstChanged = new Date(buckets.timestamp[0]).getTime();
+    let keep = cached.timestamp.length;
+    while (keep > 0 && new Date(cached.timestamp[keep - 1]).getTime() >= firstChanged) {
+        keep--;
+    }
+    const appendOnly = keep === cached.timestamp.length;
+    
+    // Drop buckets that have aged out of the selected range
+    const cutoff = Date.now() - timeRangeDays * 86400000;
+    let expired = 0;
+    while (expired < keep && new Date(cached.timestamp[expired]).getTime() < cutoff) {
+        expired++;
+    }
+    ['timestamp', 'close', 'avg_sentiment'].forEach(field => {
+        cached[field] = cached[field].slice(expired, keep).concat(buckets[field]);
+    });
+    
+    if (document.getElementById('stockSelector').value !== ticker) {
+        return;
+    }
+    if (appendOnly) {
+        // Only new hours: append to both traces instead of redrawing the chart
+        Plotly.extendTraces('sentimentPriceChart', {
+            x: [buckets.timestamp, buckets.timestamp],
+            y: [buckets.close, buckets.avg_sentiment]
+        }, [0, 1], cached.timestamp.length);
+    } else {
+        drawSentimentPriceChart(ticker, cached.timestamp, cached.close, cached.avg_sentiment);
+    }
+}
+
 // Update stock grid
 function updateStockGrid() {
     const grid = document.getElementById('stockGrid');
     grid.innerHTML = '';
     
     selectedStocks.forEach(ticker => {
-        const stock = mockStockData[ticker];
+        const stock = stockData[ticker];
         const changeClass = stock.change >= 0 ? 'positive' : 'negative';
         const changeSymbol = stock.change >= 0 ? '▲' : '▼';
         const sentimentClass = stock.sentiment > 0.2 ? 'positive' : stock.sentiment < -0.2 ? 'negative' : 'neutral';
@@ -102,6 +320,14 @@ function updateStockGrid() {
                 <span class="metric-label">Correlation</span>
                 <span class="metric-value">${stock.correlation.toFixed(3)}</span>
             </div>
+            ${stock.spikeCount !== undefined ? `
+            <div class="metric">
+                <span class="metric-label">Sentiment Spikes</span>
+                <div>
+                    <span class="metric-value">${stock.spikeCount}</span>
+                    ${stock.newSpikes ? `<span class="metric-delta">(+${stock.newSpikes} live)</span>` : ''}
+                </div>
+            </div>` : ''}
         `;
         grid.appendChild(card);
     });
@@ -137,8 +363,8 @@ function initializeCharts() {
 // Update overview charts
 function updateOverviewCharts() {
     // Multi-stock comparison
-    const sentiments = selectedStocks.map(t => mockStockData[t].sentiment);
-    const correlations = selectedStocks.map(t => mockStockData[t].correlation);
+    const sentiments = selectedStocks.map(t => stockData[t].sentiment);
+    const correlations = selectedStocks.map(t => stockData[t].correlation);
     
     const comparisonData = [
         {
@@ -159,7 +385,7 @@ function updateOverviewCharts() {
         yaxis: { gridcolor: '#333333', title: 'Sentiment Score' }
     };
     
-    Plotly.newPlot('comparisonChart', comparisonData, comparisonLayout, {responsive: true});
+    Plotly.react('comparisonChart', comparisonData, comparisonLayout, {responsive: true});
     
     // Correlation heatmap
     const heatmapData = [{
@@ -178,17 +404,17 @@ function updateOverviewCharts() {
         font: { color: '#FFFFFF' }
     };
     
-    Plotly.newPlot('heatmapChart', heatmapData, heatmapLayout, {responsive: true});
+    Plotly.react('heatmapChart', heatmapData, heatmapLayout, {responsive: true});
 }
 
 // Update detailed analysis
-function updateDetailedAnalysis() {
+async function updateDetailedAnalysis() {
     const ticker = document.getElementById('stockSelector').value;
-    const stock = mockStockData[ticker];
+    const stock = stockData[ticker];
     
     // Update metrics
     document.getElementById('avgSentiment').textContent = stock.sentiment.toFixed(3);
-    document.getElementById('sentimentVol').textContent = (Math.random() * 0.3).toFixed(3);
+    document.getElementById('sentimentVol').textContent = (stock.volatility ?? Math.random() * 0.3).toFixed(3);
     document.getElementById('priceCorr').textContent = stock.correlation.toFixed(3);
     
     // Sentiment gauge
@@ -213,21 +439,33 @@ function updateDetailedAnalysis() {
         height: 300
     };
     
-    Plotly.newPlot('sentimentGauge', gaugeData, gaugeLayout, {responsive: true});
+    Plotly.react('sentimentGauge', gaugeData, gaugeLayout, {responsive: true});
     
-    // Generate mock time series data
-    const timestamps = [];
-    const prices = [];
-    const sentiments = [];
-    const now = new Date();
+    // Hourly series from the API, or mock time series data
+    let timestamps = [];
+    let prices = [];
+    let sentiments = [];
+    const series = await fetchJSON('series', { ticker: ticker, days: timeRangeDays });
     
-    for (let i = 168; i >= 0; i--) {
-        timestamps.push(new Date(now.getTime() - i * 3600000));
-        prices.push(stock.price * (1 + (Math.random() - 0.5) * 0.05));
-        sentiments.push(stock.sentiment + (Math.random() - 0.5) * 0.4);
+    if (series && series.timestamp.length > 0) {
+        timestamps = series.timestamp;
+        prices = series.close;
+        sentiments = series.avg_sentiment;
+        seriesCache[ticker] = { timestamp: timestamps, close: prices, avg_sentiment: sentiments };
+    } else {
+        const now = new Date();
+        for (let i = 168; i >= 0; i--) {
+            timestamps.push(new Date(now.getTime() - i * 3600000));
+            prices.push(stock.price * (1 + (Math.random() - 0.5) * 0.05));
+            sentiments.push(stock.sentiment + (Math.random() - 0.5) * 0.4);
+        }
     }
     
-    // Sentiment vs Price chart
+    drawSentimentPriceChart(ticker, timestamps, prices, sentiments);
+}
+
+// Sentiment vs Price chart
+function drawSentimentPriceChart(ticker, timestamps, prices, sentiments) {
     const sentimentPriceData = [
         {
             x: timestamps,
@@ -258,7 +496,7 @@ function updateDetailedAnalysis() {
         height: 400
     };
     
-    Plotly.newPlot('sentimentPriceChart', sentimentPriceData, sentimentPriceLayout, {responsive: true});
+    Plotly.react('sentimentPriceChart', sentimentPriceData, sentimentPriceLayout, {responsive: true});
 }
 
 // Update correlation table
@@ -280,15 +518,15 @@ function updateCorrelationTable() {
     `;
     
     selectedStocks.forEach(ticker => {
-        const stock = mockStockData[ticker];
-        const significant = Math.random() > 0.3;
+        const stock = stockData[ticker];
+        const significant = stock.significant ?? Math.random() > 0.3;
         html += `
             <tr>
                 <td><strong>${ticker}</strong></td>
                 <td>${stock.sentiment.toFixed(3)}</td>
                 <td>${stock.correlation.toFixed(3)}</td>
-                <td>${(stock.correlation * 0.9).toFixed(3)}</td>
-                <td>${(Math.random() * 0.3).toFixed(3)}</td>
+                <td>${(stock.leadingCorrelation ?? stock.correlation * 0.9).toFixed(3)}</td>
+                <td>${(stock.volatility ?? Math.random() * 0.3).toFixed(3)}</td>
                 <td>${significant ? '✅' : '❌'}</td>
             </tr>
         `;
@@ -299,9 +537,21 @@ function updateCorrelationTable() {
 }
 
 // Update mentions
-function updateMentions() {
+async function updateMentions() {
     const ticker = document.getElementById('mentionStockSelector').value;
     
+    const mentions = await fetchJSON('mentions', { ticker: ticker, days: timeRangeDays, n: 5 });
+    if (mentions) {
+        const toCard = mention => ({
+            source: mention.source,
+            time: formatRelativeTime(mention.timestamp),
+            score: mention.sentiment_score,
+            text: escapeHTML(mention.text)
+        });
+        renderMentions(mentions.positive.map(toCard), mentions.negative.map(toCard));
+        return;
+    }
+    
     const positiveMentions = [
         { source: 'Twitter', time: '2 hours ago', score: 0.856, text: `$${ticker} looking strong! 🚀 Great earnings report.` },
         { source: 'Reddit', time: '3 hours ago', score: 0.782, text: `Bullish on $${ticker}. This is my top pick for 2024.` },
@@ -314,6 +564,11 @@ function updateMentions() {
         { source: 'News', time: '6 hours ago', score: -0.523, text: `Analysts express concerns about ${mockStockData[ticker].name}.` }
     ];
     
+    renderMentions(positiveMentions, negativeMentions);
+}
+
+// Render mention cards
+function renderMentions(positiveMentions, negativeMentions) {
     let positiveHTML = '';
     positiveMentions.forEach(mention => {
         positiveHTML += `
@@ -0,0 +1,102 @@
+"""
+HTTP API: static file whitelist, error responses and profile gating
+"""
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_server
+import utils.profiling
+from api_server import create_server
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server, path):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    try:
+        # http.client sends the path as given, without normalising '..'
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def get_status(server, path):
+    return fetch(server, path)[0]
+
+
+@pytest.mark.parametrize('path', ['/web_interface.html', '/scripts/app.js', '/styles/modern_styles.css'])
+def test_serves_web_interface_and_assets(server, path):
+    assert get_status(server, path) == 200
+
+
+@pytest.mark.parametrize('path', [
+    '/scripts/../app.py',
+    '/scripts/%2e%2e/app.py',
+    '/styles/%2e%2e/.git/config',
+    '/styles/%2E%2E/%2E%2E/etc/passwd',
+    '/web_interface.html/../app.py',
+    '/app.py',
+    '/scripts',
+])
+def test_rejects_paths_outside_static_files(server, path):
+    assert get_status(server, path) == 404
+
+
+def test_unknown_endpoint_is_404(server):
+    assert get_status(server, '/api/nope') == 404
+
+
+def test_bad_parameters_are_400(server):
+    assert get_status(server, '/api/tickers?bogus=1') == 400
+
+
+@pytest.mark.parametrize('error', [KeyError('Close'), TypeError('unsupported operand')])
+def test_errors_inside_handlers_are_500(server, error):
+    service = server.RequestHandlerClass.service
+    
+    def broken(tickers=None):
+        raise error
+    
+    service.endpoints['broken'] = broken
+    try:
+        assert get_status(server, '/api/broken') == 500
+    finally:
+        del service.endpoints['broken']
+
+
+def test_error_body_is_valid_json(server):
+    status, _, body = fetch(server, '/api/say"hi"')
+    assert status == 404
+    assert json.loads(body) == {'error': 'Unknown endpoint: say"hi"'}
+
+
+def test_profile_parameter_needs_the_allow_setting(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(utils.profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(api_server, 'ALLOW_PROFILE_REQUESTS', False)
+    status, headers, _ = fetch(server, '/api/tickers?profile=1')
+    assert status == 200
+    assert 'X-Profile' not in headers
+    assert not list(tmp_path.iterdir())
+    
+    monkeypatch.setattr(api_server, 'ALLOW_PROFILE_REQUESTS', True)
+    status, headers, _ = fetch(server, '/api/tickers?profile=1')
+    assert status == 200
+    assert 'X-Profile' in headers
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == ['.collapsed', '.pstats']
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Backtest PnL on hand-computed series, and no use of sentiment that is not yet observed
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.backtester import SentimentBacktester, STRATEGIES
+
+
+def merged(close, sentiment):
+    return pd.DataFrame({'Close': close, 'avg_sentiment': sentiment})
+
+
+HAND = merged([100.0, 101.0, 99.0, 99.0, 102.0, 100.0], [0.8, 0.0, -0.9, 0.0, 0.0, 0.7])
+
+
+def test_threshold_pnl_by_hand():
+    backtester = SentimentBacktester(cost_per_trade=0.001)
+    results = backtester.run({'AAPL': HAND}, grid={
+        'strategy': ['threshold'], 'threshold': [0.5], 'holding_period': [1, 3], 'lag': [1]
+    }).set_index('holding_period')
+    
+    # Sentiment seen one bar late: long at bar 1, short at bar 3, and each position earns the next bar's return
+    # holding 1: positions 0, 1, 0, -1, 0, 0 -> PnL r2 - r4, four position changes
+    one = results.loc[1]
+    assert one['total_pnl'] == pytest.approx((99 / 101 - 1) - (102 / 99 - 1) - 4 * 0.001)
+    assert one['n_trades'] == 4
+    assert one['turnover'] == pytest.approx(4 / 6)
+    assert one['exposure'] == pytest.approx(2 / 6)
+    
+    # holding 3: signals are summed over three bars, positions 0, 1, 1, 0, -1, -1 -> PnL r2 + r3 - r5
+    three = results.loc[3]
+    assert three['total_pnl'] == pytest.approx((99 / 101 - 1) + 0.0 - (100 / 102 - 1) - 3 * 0.001)
+    assert three['n_trades'] == 3
+    assert three['exposure'] == pytest.approx(4 / 6)
+
+
+def test_momentum_pnl_by_hand():
+    results = SentimentBacktester(cost_per_trade=0.0).run({'AAPL': HAND}, grid={
+        'strategy': ['momentum'], 'threshold': [0.5], 'holding_period': [1], 'lag': [2]
+    })
+    # Changes 0.8 -> 0 -> -0.9 -> 0 -> 0 -> 0.7 seen two bars late: short at bars 3 and 4, long at bar 5
+    # Bar 4 earns bar 3's short, bar 5 earns bar 4's short
+    assert results['total_pnl'].iloc[0] == pytest.approx(-(102 / 99 - 1) - (100 / 102 - 1))
+    assert results['n_trades'].iloc[0] == 2
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+@pytest.mark.parametrize('lag', [1, 3])
+def test_no_lookahead(strategy, lag):
+    rng = np.random.default_rng(lag)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 200))
+    sentiment = rng.normal(0, 0.5, 200)
+    # The last lag bars of sentiment can only drive positions after the final bar
+    altered = sentiment.copy()
+    altered[-lag:] = -10 * np.sign(sentiment[-lag:])
+    grid = {'strategy': [strategy], 'threshold': [0.1, 0.5, 1.0], 'holding_period': [1, 6], 'lag': [lag]}
+    
+    backtester = SentimentBacktester()
+    original = backtester.run({'AAPL': merged(close, sentiment)}, grid=grid)
+    changed = backtester.run({'AAPL': merged(close, altered)}, grid=grid)
+    pd.testing.assert_frame_equal(original, changed)
+    # Future sentiment that does reach a position does change the result
+    altered[-lag - 5:] = -10 * np.sign(sentiment[-lag - 5:])
+    assert not np.allclose(backtester.run({'AAPL': merged(close, altered)}, grid=grid)['total_pnl'], original['total_pnl'])
+
+
+def test_parallel_matches_serial():
+    rng = np.random.default_rng(7)
+    frames = {
+        ticker: merged(100 * np.cumprod(1 + rng.normal(0, 0.01, 120)), rng.normal(0, 0.5, 120))
+        for ticker in ['AAPL', 'TSLA', 'NVDA']
+    }
+    serial = SentimentBacktester(block_size=7).run(frames)
+    parallel = SentimentBacktester(max_workers=2, parallel_threshold=2).run(frames)
+    pd.testing.assert_frame_equal(serial, parallel)
+    best = SentimentBacktester().best_by_ticker(serial)
+    assert best.set_index('ticker')['sharpe'].to_dict() == serial.groupby('ticker')['sharpe'].max().to_dict()
\ No newline at end of file
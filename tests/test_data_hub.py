@@ -0,0 +1,76 @@
+"""
+DataHub: publishes from ensure and refresh
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics_service import AnalyticsService
+from modules.data_hub import DataHub
+
+
+@pytest.fixture
+def hub():
+    hub = DataHub()
+    published = []
+    hub.add_listener(lambda version, new_bars, new_posts: published.append((version, new_bars, new_posts)))
+    hub.published = published
+    return hub
+
+
+def test_ensure_publishes_the_fetched_rows(hub):
+    hub.ensure(['AAPL'], 3)
+    hub.ensure(['AAPL', 'TSLA'], 3)
+    version, new_bars, new_posts = hub.published[-1]
+    assert version == hub.version
+    assert set(new_bars['Ticker']) == {'TSLA'}
+    assert set(new_posts['ticker']) == {'TSLA'}
+    stock_data, sentiment_data = hub.snapshot()
+    assert len(new_bars) == (stock_data['Ticker'] == 'TSLA').sum()
+    assert len(new_posts) == (sentiment_data['ticker'] == 'TSLA').sum()
+
+
+def test_new_tickers_stop_at_the_post_cursor(hub):
+    hub.ensure(['AAPL'], 3)
+    # As if the last refresh ran two days ago
+    cursor = hub.post_cursor - pd.Timedelta(days=2)
+    hub.post_cursor = cursor
+    hub.ensure(['AAPL', 'TSLA'], 3)
+    _, sentiment_data = hub.snapshot()
+    assert (sentiment_data.loc[sentiment_data['ticker'] == 'TSLA', 'timestamp'] <= cursor).all()
+    
+    hub.refresh()
+    _, _, new_posts = hub.published[-1]
+    _, sentiment_data = hub.snapshot()
+    tsla = sentiment_data[sentiment_data['ticker'] == 'TSLA']
+    assert (tsla['timestamp'] > cursor).sum() == (new_posts['ticker'] == 'TSLA').sum()
+
+
+def test_longer_history_is_published_as_older_rows(hub):
+    service = AnalyticsService(hub=hub)
+    hub.ensure(['AAPL'], 3)
+    held_from = hub.coverage['AAPL']
+    hub.ensure(['AAPL'], 7)
+    _, new_bars, new_posts = hub.published[-1]
+    assert not new_posts.empty
+    assert (new_posts['timestamp'] <= held_from).all()
+    assert pd.to_datetime(new_bars['Datetime']).max() <= held_from
+    
+    # The spike state folded from the backfill matches one rebuilt from the snapshot
+    spikes = dict(service._spikes)
+    service._rebuild_state()
+    assert spikes == service._spikes
+
+
+def test_longer_history_meets_the_held_bars(hub):
+    hub.ensure(['AAPL'], 3)
+    first_open = hub.snapshot()[0]['Open'].iloc[0]
+    hub.ensure(['AAPL'], 7)
+    _, new_bars, _ = hub.published[-1]
+    assert new_bars['Close'].iloc[-1] == pytest.approx(first_open)
+    assert (new_bars['High'] >= new_bars[['Open', 'Close']].max(axis=1)).all()
+    assert (new_bars['Low'] <= new_bars[['Open', 'Close']].min(axis=1)).all()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Batched Granger-causality screen against one least-squares fit per ticker and lag
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_processor import DataProcessor
+
+
+def make_merged(length, lead=None, seed=0):
+    """
+    Merged frame whose returns follow sentiment `lead` hours later (or are independent of it)
+    """
+    rng = np.random.default_rng(seed)
+    sentiment = rng.normal(0, 1, length)
+    returns = rng.normal(0, 0.01, length)
+    if lead is not None:
+        returns[lead:] += 0.01 * sentiment[:-lead]
+    close = 100 * np.cumprod(1 + returns)
+    return pd.DataFrame({'avg_sentiment': sentiment, 'Close': close})
+
+
+def reference_test(merged, lag, max_lag):
+    """
+    F-test of lag sentiment terms on the sample after the first max_lag returns, one fit at a time
+    """
+    series = pd.DataFrame({'sentiment': merged['avg_sentiment'], 'returns': merged['Close'].pct_change()}).dropna()
+    sentiment = series['sentiment'].to_numpy()
+    returns = series['returns'].to_numpy()
+    rows = range(max_lag, len(returns))
+    target = returns[max_lag:]
+    restricted = np.array([[1.0] + [returns[t - k] for k in range(1, lag + 1)] for t in rows])
+    unrestricted = np.hstack([restricted, np.array([[sentiment[t - k] for k in range(1, lag + 1)] for t in rows])])
+    
+    def rss(design):
+        coef = np.linalg.lstsq(design, target, rcond=None)[0]
+        return ((target - design @ coef) ** 2).sum()
+    
+    df_resid = len(target) - unrestricted.shape[1]
+    f = ((rss(restricted) - rss(unrestricted)) / lag) / (rss(unrestricted) / df_resid)
+    return f, stats.f.sf(f, lag, df_resid), len(target)
+
+
+def test_screen_matches_one_fit_per_ticker_and_lag():
+    # Two tickers share a length and are solved as one batch; the third is screened on its own
+    merged = {
+        'AAPL': make_merged(200, lead=3, seed=1),
+        'TSLA': make_merged(200, seed=2),
+        'NVDA': make_merged(120, lead=1, seed=3)
+    }
+    screen = DataProcessor().screen_granger_causality(merged, max_lag=6)
+    assert len(screen) == 3 * 6
+    for row in screen.itertuples():
+        f, p, n_obs = reference_test(merged[row.ticker], row.lag, 6)
+        assert row.f_stat == pytest.approx(f, rel=1e-6)
+        assert row.p_value == pytest.approx(p, rel=1e-6, abs=1e-12)
+        assert row.n_obs == n_obs
+
+
+def test_screen_finds_the_lead_and_corrects_for_the_search():
+    processor = DataProcessor()
+    merged = {'AAPL': make_merged(300, lead=3, seed=4), 'TSLA': make_merged(300, seed=5)}
+    screen = processor.screen_granger_causality(merged, max_lag=12)
+    
+    aapl = screen[screen['ticker'] == 'AAPL'].set_index('lag')
+    assert aapl.loc[3, 'p_value'] < 1e-6
+    assert not aapl.loc[[1, 2], 'significant'].any()
+    
+    best = processor.summarize_granger_screen(screen).set_index('ticker')
+    assert best.loc['AAPL', 'best_lag'] >= 3 and best.loc['AAPL', 'significant']
+    tsla = screen[screen['ticker'] == 'TSLA']
+    assert best.loc['TSLA', 'p_value'] == tsla['p_value'].min()
+    assert best.loc['TSLA', 'p_value_adjusted'] == pytest.approx(min(tsla['p_value'].min() * 12, 1.0))
+
+
+def test_short_and_empty_histories_are_skipped():
+    processor = DataProcessor()
+    screen = processor.screen_granger_causality({'AAPL': make_merged(5), 'TSLA': pd.DataFrame(), 'NVDA': make_merged(11)}, max_lag=24)
+    # Five bars leave four returns; eleven support lags up to (10 - 2) // 3
+    assert set(screen['ticker']) == {'NVDA'}
+    assert screen['lag'].tolist() == [1, 2]
+    assert processor.summarize_granger_screen(processor.screen_granger_causality({})).empty
+
+
+def test_last_lag_matches_statsmodels():
+    grangercausalitytests = pytest.importorskip('statsmodels.tsa.stattools').grangercausalitytests
+    merged = make_merged(150, lead=2, seed=6)
+    screen = DataProcessor().screen_granger_causality({'AAPL': merged}, max_lag=4)
+    series = pd.DataFrame({'returns': merged['Close'].pct_change(), 'sentiment': merged['avg_sentiment']}).dropna()
+    # statsmodels fits each lag on its own sample, which equals the screen's shared one at max_lag
+    f, p, _, _ = grangercausalitytests(series[['returns', 'sentiment']], maxlag=[4], verbose=False)[4][0]['ssr_ftest']
+    last = screen[screen['lag'] == 4].iloc[0]
+    assert last['f_stat'] == pytest.approx(f) and last['p_value'] == pytest.approx(p)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Memory budget shrinking: busy sessions are never downcast, idle ones are, least recently used first
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.memory_budget import MemoryBudget, SessionMemory
+
+
+def make_frames(rows=5000):
+    return {
+        'stock_data': pd.DataFrame({'Close': np.linspace(100, 110, rows), 'Volume': np.arange(rows, dtype=np.int64)}),
+        'sentiment_data': pd.DataFrame({'sentiment_score': np.zeros(rows), 'ticker': 'AAPL'})
+    }
+
+
+def session(session_id, budget, frames=None):
+    ledger = SessionMemory(session_id)
+    ledger.track(frames or make_frames())
+    budget.attach(ledger)
+    return ledger
+
+
+def dtypes(ledger):
+    return {name: frame.dtypes.astype(str).to_dict() for name, frame in ledger.frames.items()}
+
+
+def test_running_script_is_not_downcast_until_it_ends():
+    budget = MemoryBudget(limit_bytes=0)
+    ledger = session('a' * 32, budget)
+    before = dtypes(ledger)
+    
+    ledger.begin_run(ledger.frames)
+    assert ledger.busy
+    assert budget.enforce() == []
+    assert ledger.shrink_frames() == 0
+    assert dtypes(ledger) == before
+    
+    ledger.end_run()
+    actions = budget.enforce()
+    assert [action['action'] for action in actions] == ['downcast frames']
+    assert ledger.frames['stock_data']['Close'].dtype == np.float32
+    assert ledger.frames['sentiment_data']['ticker'].dtype == object
+    # Already downcast frames are not shrunk again
+    assert budget.enforce() == []
+
+
+def test_fragment_rerun_marks_the_session_busy():
+    budget = MemoryBudget(limit_bytes=0)
+    ledger = session('b' * 32, budget)
+    with ledger.running():
+        assert ledger.busy
+        assert budget.enforce() == []
+        assert ledger.frames['stock_data']['Close'].dtype == np.float64
+    assert not ledger.busy
+    assert budget.enforce()
+
+
+def test_fragment_waits_for_a_downcast_in_progress():
+    ledger = SessionMemory('c' * 32)
+    ledger.track(make_frames())
+    entered = threading.Event()
+    
+    def fragment():
+        with ledger.running():
+            entered.set()
+    
+    # The ledger lock is what shrink_frames holds while it downcasts
+    with ledger._lock:
+        thread = threading.Thread(target=fragment)
+        thread.start()
+        time.sleep(0.1)
+        assert not entered.is_set()
+    thread.join(timeout=5)
+    assert entered.is_set()
+
+
+def test_idle_sessions_shrink_least_recently_used_first():
+    budget = MemoryBudget(limit_bytes=None)
+    older = session('d' * 32, budget)
+    newer = session('e' * 32, budget)
+    busy = session('f' * 32, budget)
+    busy.begin_run(busy.frames)
+    # The busy session is the least recently used of all
+    older.last_access, newer.last_access, busy.last_access = 1.0, 2.0, 0.5
+    
+    _, totals = budget.usage()
+    # Just over budget: downcasting the least recently used idle session is enough
+    budget.limit_bytes = totals['total_bytes'] - 1
+    actions = budget.enforce()
+    assert [action['session'] for action in actions] == ['d' * 8]
+    assert older.frames['stock_data']['Close'].dtype == np.float32
+    assert newer.frames['stock_data']['Close'].dtype == np.float64
+    assert busy.frames['stock_data']['Close'].dtype == np.float64
+    assert budget.usage()[1]['total_bytes'] < totals['total_bytes']
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+TopMentionsIndex: windowed queries against a full sort, and bucket expiry
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.mention_index import TopMentionsIndex
+
+
+def hourly_batches(hours, posts_per_hour=30, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-03-01')
+    for hour in range(hours):
+        n = posts_per_hour
+        yield pd.DataFrame({
+            'timestamp': start + pd.Timedelta(hours=hour) + pd.to_timedelta(rng.integers(0, 3600, n), unit='s'),
+            'ticker': rng.choice(['AAPL', 'TSLA'], n),
+            'text': [f'post {hour}-{i}' for i in range(n)],
+            'sentiment_score': rng.uniform(-1, 1, n),
+            'source': 'Twitter'
+        })
+
+
+def test_expiry_keeps_the_bucket_count_bounded():
+    index = TopMentionsIndex(capacity=10)
+    window = pd.Timedelta(days=2)
+    seen = []
+    for batch in hourly_batches(24 * 10):
+        seen.append(batch)
+        index.add_posts(batch)
+        index.expire(batch['timestamp'].max() - window)
+        assert all(len(buckets) <= 2 * 24 + 1 for buckets in index._buckets.values())
+    
+    posts = pd.concat(seen, ignore_index=True)
+    since = posts['timestamp'].max() - pd.Timedelta(hours=24)
+    for ticker in ['AAPL', 'TSLA']:
+        recent = posts[(posts['ticker'] == ticker) & (posts['timestamp'] >= since.floor('1H'))]
+        expected = recent.nlargest(5, 'sentiment_score')['text'].tolist()
+        assert [record['text'] for record in index.top(ticker, 5, since=since)] == expected
+        # The all-time heaps still cover the expired history
+        expected = posts[posts['ticker'] == ticker].nsmallest(5, 'sentiment_score')['text'].tolist()
+        assert [record['text'] for record in index.top(ticker, 5, sentiment_type='negative')] == expected
\ No newline at end of file
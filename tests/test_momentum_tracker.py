@@ -0,0 +1,50 @@
+"""
+SentimentMomentumTracker: agreement with the per-ticker scan and expiry
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.momentum_tracker import SentimentMomentumTracker
+from modules.sentiment_analyzer import SentimentAnalyzer
+
+
+def make_posts(tickers, hours, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-03-01')
+    frames = []
+    for ticker in tickers:
+        offsets = np.sort(rng.integers(0, hours, 200))
+        frames.append(pd.DataFrame({
+            'timestamp': start + pd.to_timedelta(offsets, unit='h'),
+            'ticker': ticker,
+            'sentiment_score': rng.uniform(-1, 1, len(offsets))
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_matches_the_scan_on_hour_aligned_posts():
+    posts = make_posts(['AAPL', 'TSLA', 'MSFT'], hours=96)
+    tracker = SentimentMomentumTracker.from_frame(posts)
+    analyzer = SentimentAnalyzer()
+    for ticker in ['AAPL', 'TSLA', 'MSFT']:
+        expected = analyzer.calculate_sentiment_momentum(posts, ticker, window_hours=24)
+        assert np.isclose(tracker.momentum(ticker, window_hours=24), expected)
+
+
+def test_tickers_folded_into_the_base_report_no_data():
+    posts = make_posts(['AAPL', 'TSLA'], hours=48)
+    tracker = SentimentMomentumTracker.from_frame(posts)
+    # TSLA goes quiet; AAPL keeps posting until its old buckets expire
+    later = make_posts(['AAPL'], hours=48, seed=1)
+    later['timestamp'] += pd.Timedelta(days=40)
+    tracker.update(later)
+    
+    assert tracker._last_bucket[tracker.tickers.get_loc('TSLA')] == -1
+    assert tracker.momentum('TSLA') == 0
+    assert tracker.momentum('AAPL') != 0
+    assert tracker.num_buckets <= tracker.horizon_hours
\ No newline at end of file
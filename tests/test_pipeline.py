@@ -0,0 +1,78 @@
+"""
+Sentiment pipeline: record conversion between stages, and a full run through the worker processes
+"""
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_collector import DataCollector
+from modules.data_hub import DataHub
+from modules.market_data import SimulatedProvider
+from modules.pipeline import POST_COLUMNS, TEXT_WIDTH, SentimentPipeline, from_records, to_records, truncated_count
+
+
+def make_posts():
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-03-01 09:00', periods=4, freq='min'),
+        'ticker': ['AAPL', 'TSLA', 'AAPL', 'MSFT'],
+        'sentiment_score': [0.5, -0.25, 0.0, 0.75],
+        'text': ['short', 'é' * TEXT_WIDTH, 'x' * (TEXT_WIDTH + 1), 'y' * 500],
+        'source': ['Twitter', 'Reddit', 'Twitter', 'News'],
+        'confidence': [0.5, 0.25, 0.0, 0.75]
+    })
+
+
+def test_records_round_trip():
+    posts = make_posts()
+    records = to_records(posts, created=123.0)
+    assert (records['created'] == 123.0).all()
+    restored = from_records(records)
+    expected = posts[POST_COLUMNS].assign(text=posts['text'].str[:TEXT_WIDTH])
+    pd.testing.assert_frame_equal(restored, expected, check_dtype=False)
+
+
+def test_truncated_posts_are_counted():
+    assert truncated_count(make_posts()) == 2
+    assert truncated_count(make_posts().iloc[:2]) == 0
+    assert truncated_count(pd.DataFrame()) == 0
+
+
+def test_pipeline_publishes_scored_posts_and_stops_cleanly():
+    hub = DataHub(DataCollector(provider=SimulatedProvider(seed=1)))
+    hub.ensure(['AAPL', 'TSLA'], 1)
+    batches = []
+    original = hub.ingest
+    hub.ingest = lambda bars, posts, post_cursor=None: batches.append(posts) or original(bars, posts, post_cursor)
+    
+    # Small rings so the collector runs into backpressure
+    pipeline = SentimentPipeline(hub, tickers=['AAPL', 'TSLA', 'MSFT'], scorers=2, rate=3000, ring_capacity=64,
+                                 flush_seconds=0.25, seed=2).start()
+    try:
+        deadline = time.time() + 60
+        while sum(len(posts) for posts in batches) < 500 and time.time() < deadline:
+            time.sleep(0.2)
+        rows, summary = pipeline.stats()
+        names = [ring.shm.name for ring in pipeline._rings] + [pipeline._counters.table.shm.name]
+    finally:
+        pipeline.stop()
+    
+    stages = {row['stage']: row for row in rows}
+    assert summary['alive'] == 4
+    assert stages['collector']['records_out'] > 0 and stages['scorer']['records_out'] > 0
+    assert stages['collector']['blocked_s'] > 0
+    assert batches and all(posts['ticker'].isin(['AAPL', 'TSLA']).all() for posts in batches)
+    for posts in batches:
+        assert posts['timestamp'].is_monotonic_increasing
+        assert posts['sentiment_score'].notna().all()
+    assert hub.post_feed is None and pipeline._rings == []
+    # Every shared memory block was unlinked
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Tiered retention against the raw-post aggregations it replaces
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_hub import DataHub
+from modules.data_processor import DataProcessor
+from modules.retention import TieredSentimentStore
+from modules.sentiment_analyzer import SentimentAnalyzer
+
+# Clear of daylight saving changes, so every naive hour exists in New York
+NOW = pd.Timestamp('2024-04-15 12:00')
+
+
+def make_posts(tz=None, days=10, n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    start = NOW - pd.Timedelta(days=days)
+    scores = np.round(rng.uniform(-1, 1, n), 4)
+    posts = pd.DataFrame({
+        'timestamp': start + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, n)), unit='s'),
+        'ticker': rng.choice(['AAPL', 'TSLA'], n),
+        'sentiment_score': scores,
+        'confidence': np.abs(scores),
+        'source': 'Twitter',
+        'text': [f'post {i}' for i in range(n)]
+    })
+    if tz is not None:
+        posts['timestamp'] = posts['timestamp'].dt.tz_localize(tz)
+    return posts
+
+
+def retained(posts, now=NOW):
+    store = TieredSentimentStore(raw_days=2, five_minute_days=5)
+    store.ingest(posts)
+    store.apply_retention(now=now)
+    return store
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_rollups_match_aggregate_by_time_window(tz):
+    posts = make_posts(tz)
+    store = retained(posts)
+    assert all(rows > 0 for rows in store.stats().values())
+    
+    expected = SentimentAnalyzer().aggregate_by_time_window(posts, 'AAPL', '1H')
+    aggregated = store.aggregate('AAPL', freq='1H')
+    assert aggregated['timestamp'].tolist() == expected['timestamp'].tolist()
+    assert aggregated['mention_count'].tolist() == expected['mention_count'].tolist()
+    for column in ['avg_sentiment', 'sentiment_std', 'avg_confidence']:
+        np.testing.assert_allclose(aggregated[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   atol=1e-9, err_msg=column)
+
+
+def test_expiry_demotes_rows_through_the_tiers():
+    posts = make_posts()
+    store = TieredSentimentStore(raw_days=2, five_minute_days=5)
+    store.ingest(posts)
+    
+    def total():
+        return len(store.raw) + sum(int(rollup['count'].sum()) for rollup in store.rollups.values())
+    
+    store.apply_retention(now=NOW - pd.Timedelta(days=8))
+    assert store.stats()['5min'] == 0 and store.stats()['hourly'] == 0
+    store.apply_retention(now=NOW - pd.Timedelta(days=5))
+    assert store.stats()['5min'] > 0 and store.stats()['hourly'] == 0
+    store.apply_retention(now=NOW)
+    stats = store.stats()
+    assert stats['hourly'] > 0
+    assert store.raw['timestamp'].min() >= store.raw_cutoff
+    assert pd.to_datetime(store.rollups['5min']['bucket']).min() >= NOW - pd.Timedelta(days=5) - pd.Timedelta(hours=1)
+    assert total() == len(posts)
+    
+    # Applying again at the same time moves nothing
+    assert store.apply_retention(now=NOW) == stats
+    
+    store.drop_before(NOW - pd.Timedelta(days=3))
+    assert store.stats()['hourly'] == 0
+    assert total() == (posts['timestamp'] >= NOW - pd.Timedelta(days=3)).sum()
+
+
+def test_tz_aware_posts_with_a_naive_clock():
+    posts = make_posts('America/New_York')
+    store = TieredSentimentStore(raw_days=2)
+    store.ingest(posts)
+    # The default clock is naive local time; it must not be compared with aware timestamps directly
+    store.apply_retention()
+    store.apply_retention(now=NOW)
+    assert str(store.raw_cutoff.tz) == 'America/New_York'
+    assert len(store.aggregate('AAPL', start=NOW - pd.Timedelta(days=1), end=NOW)) == 24
+    store.drop_before(NOW - pd.Timedelta(days=4))
+    hourly = store.rollups['hourly']
+    assert pd.to_datetime(hourly['bucket']).min() >= NOW.tz_localize('America/New_York') - pd.Timedelta(days=4)
+    assert hourly['count'].sum() == (posts['timestamp'] >= NOW.tz_localize('America/New_York') - pd.Timedelta(days=4)).sum()
+
+
+def test_top_mentions_survive_the_rollup():
+    posts = make_posts()
+    store = retained(posts)
+    aapl = posts[posts['ticker'] == 'AAPL']
+    for sentiment_type, ascending in (('positive', False), ('negative', True)):
+        expected = aapl.sort_values('sentiment_score', ascending=ascending, kind='stable').head(5)
+        top = store.top_mentions('AAPL', top_n=5, sentiment_type=sentiment_type)
+        assert [record['sentiment_score'] for record in top] == expected['sentiment_score'].tolist()
+        assert {record['text'] for record in top} <= set(aapl['text'])
+
+
+def make_bars(tz=None):
+    hours = pd.date_range(NOW - pd.Timedelta(days=6), NOW, freq='h')
+    if tz is not None:
+        hours = hours.tz_localize(tz)
+    return pd.DataFrame({'Datetime': hours, 'Open': 100.0, 'High': 101.0, 'Low': 99.0,
+                         'Close': 100.0 + np.arange(len(hours)), 'Volume': 1000, 'Ticker': 'AAPL'})
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_processor_reads_the_tiers_past_the_raw_posts(tz):
+    posts = make_posts()
+    store = retained(posts)
+    raw_posts = posts[posts['timestamp'] >= store.raw_cutoff]
+    bars = make_bars(tz)
+    in_memory = DataProcessor()
+    tiered = DataProcessor(tiered_store=store)
+    
+    expected = in_memory.merge_stock_and_sentiment(bars, posts, 'AAPL')
+    merged = tiered.merge_stock_and_sentiment(bars, raw_posts, 'AAPL')
+    columns = ['timestamp', 'Close', 'avg_sentiment', 'avg_confidence', 'mention_count']
+    pd.testing.assert_frame_equal(merged[columns], expected[columns], check_dtype=False)
+    
+    start = posts['timestamp'].min()
+    assert tiered.calculate_sentiment_volatility(raw_posts, 'AAPL', start=start) == pytest.approx(
+        in_memory.calculate_sentiment_volatility(posts, 'AAPL'))
+    # Windows inside the raw tier stay on the in-memory frames
+    assert tiered.calculate_sentiment_volatility(raw_posts, 'AAPL', start=store.raw_cutoff) == pytest.approx(
+        in_memory.calculate_sentiment_volatility(raw_posts, 'AAPL'))
+
+
+def test_hub_keeps_only_the_raw_tier_in_memory():
+    store = TieredSentimentStore(raw_days=1)
+    hub = DataHub(retention=store)
+    hub.ensure(['AAPL', 'TSLA'], 3)
+    _, sentiment_data = hub.snapshot()
+    assert not sentiment_data.empty
+    assert sentiment_data['timestamp'].min() >= store.raw_cutoff
+    assert store.stats()['5min'] > 0
+    
+    hub.post_cursor -= pd.Timedelta(hours=6)
+    hub.refresh()
+    _, refreshed = hub.snapshot()
+    assert refreshed['timestamp'].min() >= store.raw_cutoff
+    assert store.raw['timestamp'].max() == refreshed['timestamp'].max()
+    assert DataProcessor().attach_hub(hub).tiered_store is store
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Shared-memory ring buffer: wraparound, backpressure, close/drain and a producer in another process
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ring_buffer import RingBuffer
+
+RECORD = np.dtype([('seq', 'i8'), ('value', 'f8')])
+
+
+def records(start, count):
+    batch = np.zeros(count, dtype=RECORD)
+    batch['seq'] = np.arange(start, start + count)
+    batch['value'] = batch['seq'] * 0.5
+    return batch
+
+
+@pytest.fixture
+def ring():
+    ring = RingBuffer(RECORD, 8)
+    yield ring
+    ring.release()
+
+
+def test_records_wrap_around_in_order(ring):
+    assert ring.put(records(0, 5)) == 0
+    assert ring.get(3)['seq'].tolist() == [0, 1, 2]
+    # Six more fill the ring past its end and back to the start
+    ring.put(records(5, 6))
+    assert ring.depth == 8
+    batch = ring.get(100)
+    assert batch['seq'].tolist() == list(range(3, 11))
+    assert batch['value'].tolist() == [seq * 0.5 for seq in range(3, 11)]
+    # Returned records are copies, not views that the next put overwrites
+    ring.put(records(11, 8))
+    assert batch['seq'].tolist() == list(range(3, 11))
+    assert ring.get(8)['seq'].tolist() == list(range(11, 19))
+    assert ring.depth == 0
+
+
+def test_full_ring_blocks_the_producer(ring):
+    result = {}
+    
+    def produce():
+        result['blocked'] = ring.put(records(0, 20))
+    
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.1)
+    # Nothing is dropped or grown: the producer waits with a full ring
+    assert producer.is_alive()
+    assert ring.depth == 8
+    
+    received = []
+    while len(received) < 20:
+        received.extend(ring.get(3, timeout=1)['seq'].tolist())
+    producer.join(timeout=5)
+    assert received == list(range(20))
+    assert result['blocked'] > 0.05
+
+
+def test_stop_ends_a_blocked_put(ring):
+    stop = threading.Event()
+    stop.set()
+    ring.put(records(0, 8))
+    started = time.perf_counter()
+    ring.put(records(8, 4), stop=stop)
+    assert time.perf_counter() - started < 1
+    assert ring.get(100)['seq'].tolist() == list(range(8))
+
+
+def test_close_then_drain(ring):
+    assert ring.get(4, timeout=0.05).size == 0
+    ring.put(records(0, 5))
+    ring.close()
+    assert ring.closed and not ring.drained
+    # Records written before close are still delivered
+    assert ring.get(3, timeout=5)['seq'].tolist() == [0, 1, 2]
+    assert ring.get(3, timeout=5)['seq'].tolist() == [3, 4]
+    assert ring.drained
+    # A closed, empty ring returns at once instead of waiting out the timeout
+    started = time.perf_counter()
+    assert ring.get(3, timeout=5).size == 0
+    assert time.perf_counter() - started < 1
+
+
+def produce(spec, total, batch):
+    ring = RingBuffer.attach(spec)
+    for start in range(0, total, batch):
+        ring.put(records(start, min(batch, total - start)))
+    ring.close()
+    ring.release()
+
+
+def test_producer_in_another_process():
+    ring = RingBuffer(RECORD, 64)
+    try:
+        process = multiprocessing.get_context('spawn').Process(target=produce, args=(ring.spec, 5000, 37))
+        process.start()
+        received = []
+        deadline = time.perf_counter() + 30
+        while not ring.drained and time.perf_counter() < deadline:
+            received.append(ring.get(50, timeout=0.25)['seq'])
+        process.join(timeout=10)
+        assert process.exitcode == 0
+        assert np.concatenate(received).tolist() == list(range(5000))
+    finally:
+        ring.release()
\ No newline at end of file
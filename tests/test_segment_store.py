@@ -0,0 +1,100 @@
+"""
+SegmentStore: write, publish and read round trips, and crash leftovers
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.segment_store import SegmentStore
+
+
+def make_posts(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-03-01') + pd.to_timedelta(np.sort(rng.integers(0, 7 * 24 * 3600, n)), unit='s'),
+        'ticker': rng.choice(['AAPL', 'TSLA', 'MSFT'], n),
+        'sentiment_score': rng.uniform(-1, 1, n),
+        'confidence': rng.uniform(0, 1, n),
+        'source': rng.choice(['Twitter', 'Reddit'], n),
+        # Long posts and non-ASCII text must come back whole
+        'text': [f'post {i} ' + 'é🚀' * (i % 7) + 'x' * (i % 400) for i in range(n)]
+    })
+
+
+def expected_rows(posts, ticker):
+    rows = posts[posts['ticker'] == ticker].sort_values('timestamp', kind='stable').reset_index(drop=True)
+    return rows[['timestamp', 'ticker', 'sentiment_score', 'confidence', 'source', 'text']]
+
+
+def test_round_trip_keeps_full_text(tmp_path):
+    posts = make_posts()
+    store = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    store.append(posts.iloc[:300])
+    store.append(posts.iloc[300:])
+    # Rows still in the write buffer are visible too
+    pd.testing.assert_frame_equal(store.query_frame('AAPL'), expected_rows(posts, 'AAPL'), check_dtype=False)
+    store.flush()
+    
+    reopened = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    assert reopened.stats()['rows'] == len(posts)
+    for ticker in ['AAPL', 'TSLA', 'MSFT']:
+        pd.testing.assert_frame_equal(reopened.query_frame(ticker), expected_rows(posts, ticker), check_dtype=False)
+    
+    start, end = pd.Timestamp('2024-03-03'), pd.Timestamp('2024-03-05')
+    views = reopened.query('TSLA', start, end, columns=['timestamp', 'text'])
+    texts = np.concatenate([view['text'] for view in views]).tolist()
+    rows = expected_rows(posts, 'TSLA')
+    assert texts == rows.loc[rows['timestamp'].between(start, end), 'text'].tolist()
+
+
+def test_compact_keeps_full_text(tmp_path):
+    posts = make_posts()
+    store = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    for part in np.array_split(posts, 10):
+        store.append(part)
+        store.flush()
+    assert store.compact(min_rows=100) > 0
+    reopened = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    pd.testing.assert_frame_equal(reopened.query_frame('MSFT'), expected_rows(posts, 'MSFT'), check_dtype=False)
+
+
+def test_reads_fixed_width_text_segments(tmp_path):
+    posts = make_posts(100)
+    store = SegmentStore.for_posts(str(tmp_path))
+    store.append(posts)
+    store.flush()
+    # Segments from before variable-length text hold a plain U140 column
+    segment = store.segments[0]
+    texts = np.asarray(store._segment_columns(segment, ['text'])['text'])
+    path = os.path.join(str(tmp_path), segment['name'])
+    os.remove(os.path.join(path, 'text.offsets.npy'))
+    np.save(os.path.join(path, 'text.npy'), texts.astype('U140'))
+    
+    frame = SegmentStore.for_posts(str(tmp_path)).query_frame('AAPL')
+    assert frame['text'].tolist() == [text[:140] for text in expected_rows(posts, 'AAPL')['text']]
+
+
+def test_unlisted_segments_are_removed_on_open(tmp_path):
+    posts = make_posts()
+    store = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    store.append(posts)
+    store.flush()
+    listed = sorted(segment['name'] for segment in store.segments)
+    # A crash after writing a segment but before publishing the manifest
+    orphan = os.path.join(str(tmp_path), f"seg-{store.next_segment:06d}")
+    os.makedirs(orphan)
+    np.save(os.path.join(orphan, 'timestamp.npy'), np.zeros(3, dtype='datetime64[ns]'))
+    os.makedirs(os.path.join(str(tmp_path), f"seg-{store.next_segment + 1:06d}.tmp"))
+    
+    reopened = SegmentStore.for_posts(str(tmp_path), segment_rows=128)
+    assert sorted(entry for entry in os.listdir(str(tmp_path)) if entry.startswith('seg-')) == listed
+    # The orphan's name is reused by the next segment without mixing in its files
+    reopened.append(posts.iloc[:10])
+    reopened.flush()
+    assert reopened.segments[-1]['name'] == os.path.basename(orphan)
+    assert reopened.stats()['rows'] == len(posts) + 10
+    assert len(reopened.query_frame('AAPL')) == (posts['ticker'] == 'AAPL').sum() + (posts.iloc[:10]['ticker'] == 'AAPL').sum()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+SentimentCube totals and roll-ups against a plain pandas groupby of the posts
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.sentiment_analyzer import SentimentAnalyzer
+from modules.sentiment_cube import SentimentCube
+
+
+def make_posts(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-1, 1, n)
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-04-01') + pd.to_timedelta(rng.integers(0, 3 * 86400, n), unit='s'),
+        'ticker': rng.choice(['AAPL', 'TSLA', 'NVDA'], n),
+        'source': rng.choice(['Twitter', 'Reddit', 'News'], n),
+        'sentiment_score': scores,
+        'confidence': rng.uniform(0, 1, n)
+    })
+
+
+def expected_measures(posts):
+    """
+    The cube's additive measures, computed row by row with pandas
+    """
+    scores = posts['sentiment_score']
+    return pd.DataFrame({
+        'count': 1.0,
+        'sentiment_sum': scores,
+        'sentiment_sumsq': scores * scores,
+        'confidence_sum': posts['confidence'],
+        'positive_count': (scores > 0.2).astype(float),
+        'negative_count': (scores < -0.2).astype(float)
+    })
+
+
+def check_totals(totals, posts):
+    expected = expected_measures(posts).sum()
+    for name in SentimentCube.MEASURES:
+        assert totals[name] == pytest.approx(expected[name]), name
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'ticker': 'AAPL'},
+    {'source': 'Reddit'},
+    {'ticker': ['AAPL', 'NVDA'], 'source': 'News'},
+    {'start': '2024-04-02 05:30', 'end': '2024-04-03 00:00'}
+])
+def test_totals_match_a_groupby(filters):
+    posts = make_posts()
+    cube = SentimentCube.from_frame(posts)
+    
+    mask = pd.Series(True, index=posts.index)
+    for column in ('ticker', 'source'):
+        if column in filters:
+            values = filters[column]
+            mask &= posts[column].isin([values] if isinstance(values, str) else values)
+    if 'start' in filters:
+        # Buckets are whole hours: start selects from its hour on, end keeps buckets starting by then
+        mask &= posts['timestamp'] >= pd.Timestamp(filters['start']).floor('1H')
+        mask &= posts['timestamp'].dt.floor('1H') <= pd.Timestamp(filters['end'])
+    check_totals(cube.totals(**filters), posts[mask])
+
+
+@pytest.mark.parametrize('by', ['ticker', 'source', ['ticker', 'bucket']])
+def test_rollup_matches_a_groupby(by):
+    posts = make_posts()
+    cube = SentimentCube.from_frame(posts)
+    keys = [by] if isinstance(by, str) else by
+    
+    labelled = expected_measures(posts).assign(
+        ticker=posts['ticker'], source=posts['source'], bucket=posts['timestamp'].dt.floor('1H'),
+        sentiment_score=posts['sentiment_score']
+    )
+    grouped = labelled.groupby(keys)[list(SentimentCube.MEASURES)].sum().reset_index()
+    rolled = cube.rollup(by)
+    # The cube is dense; combinations without posts come back as zero rows
+    rolled = rolled[rolled['count'] > 0].sort_values(keys).reset_index(drop=True)
+    
+    pd.testing.assert_frame_equal(rolled[keys + list(SentimentCube.MEASURES)], grouped[keys + list(SentimentCube.MEASURES)],
+                                  check_dtype=False)
+    stats = labelled.groupby(keys)['sentiment_score'].agg(['mean', 'std']).reset_index()
+    np.testing.assert_allclose(rolled['avg_sentiment'], stats['mean'])
+    np.testing.assert_allclose(rolled['sentiment_std'], stats['std'], equal_nan=True)
+
+
+def test_incremental_updates_match_one_pass():
+    posts = make_posts()
+    later = make_posts(n=500, seed=1)
+    # The second batch brings a new ticker, source and hours past the first
+    later['ticker'] = later['ticker'].where(later.index % 5 > 0, 'MSFT')
+    later['source'] = later['source'].where(later.index % 7 > 0, 'StockTwits')
+    later['timestamp'] = later['timestamp'] + pd.Timedelta(days=2)
+    
+    cube = SentimentCube.from_frame(posts).update(later)
+    combined = pd.concat([posts, later], ignore_index=True)
+    reference = SentimentCube.from_frame(combined)
+    
+    assert cube.shape == reference.shape
+    for ticker in ['AAPL', 'MSFT']:
+        check_totals(cube.totals(ticker=ticker), combined[combined['ticker'] == ticker])
+    pd.testing.assert_frame_equal(cube.rollup(['ticker', 'source']), reference.rollup(['ticker', 'source']))
+
+
+def test_ticker_summary_matches_the_analyzer():
+    posts = make_posts()
+    cube = SentimentCube.from_frame(posts)
+    analyzer = SentimentAnalyzer()
+    for ticker, source in [('AAPL', None), ('TSLA', 'Twitter')]:
+        expected = analyzer.aggregate_sentiment_by_ticker(posts, ticker, source=source)
+        summary = analyzer.aggregate_sentiment_by_ticker(posts, ticker, cube=cube, source=source)
+        assert summary.keys() == expected.keys()
+        for key, value in expected.items():
+            assert summary[key] == (value if isinstance(value, str) else pytest.approx(value)), key
+    assert cube.ticker_summary('MSFT') is None
\ No newline at end of file
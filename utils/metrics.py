@@ -0,0 +1,227 @@
+"""
+Hot-path metrics for the Stock Market Sentiment Analyzer
+Call counts, latency histograms, row counts and cache hits, exported in Prometheus text format
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram upper bounds in seconds (an implicit +Inf bucket follows)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get('SENTIMENT_METRICS', '1') != '0'
+_lock = threading.Lock()
+_stages = {}
+_caches = {}
+
+
+def enable(flag=True):
+    """
+    Turn recording on or off for the whole process
+    """
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Drop everything recorded so far
+    """
+    with _lock:
+        _stages.clear()
+        _caches.clear()
+
+
+def observe(stage, seconds, rows=None, error=False):
+    """
+    Record one call of a stage
+    """
+    with _lock:
+        entry = _stages.get(stage)
+        if entry is None:
+            entry = _stages[stage] = {
+                'calls': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0,
+                'buckets': [0] * (len(LATENCY_BUCKETS) + 1)
+            }
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['buckets'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if error:
+            entry['errors'] += 1
+        if rows is not None:
+            entry['rows'] += rows
+
+
+def record_cache(cache, hit):
+    """
+    Count a hit or miss for a named cache
+    """
+    if not _enabled:
+        return
+    with _lock:
+        entry = _caches.setdefault(cache, {'hits': 0, 'misses': 0})
+        entry['hits' if hit else 'misses'] += 1
+
+
+def _count_rows(result):
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def instrument(stage, rows=False):
+    """
+    Decorator timing every call of a function as stage
+    With rows=True the length of the result is added to the stage's row count
+    When recording is off the wrapper only checks a flag before calling through
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                observe(stage, time.perf_counter() - started, error=True)
+                raise
+            observe(stage, time.perf_counter() - started, _count_rows(result) if rows else None)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timed(stage):
+    """
+    Context manager timing a block as stage; set 'rows' on the yielded dict to count rows
+    """
+    if not _enabled:
+        yield {}
+        return
+    info = {}
+    started = time.perf_counter()
+    try:
+        yield info
+    except Exception:
+        observe(stage, time.perf_counter() - started, error=True)
+        raise
+    observe(stage, time.perf_counter() - started, info.get('rows'))
+
+
+def _quantile(buckets, q):
+    """
+    Quantile estimated from histogram buckets, interpolating inside the bucket as Prometheus does
+    """
+    count = sum(buckets)
+    if count == 0:
+        return None
+    rank = q * count
+    seen = 0
+    for i, in_bucket in enumerate(buckets):
+        if seen + in_bucket >= rank and in_bucket > 0:
+            if i == len(LATENCY_BUCKETS):
+                return LATENCY_BUCKETS[-1]
+            lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+            return lower + (LATENCY_BUCKETS[i] - lower) * (rank - seen) / in_bucket
+        seen += in_bucket
+    return LATENCY_BUCKETS[-1]
+
+
+def snapshot():
+    """
+    Per-stage summary rows and per-cache counters for display
+    """
+    with _lock:
+        stages = {stage: dict(entry, buckets=list(entry['buckets'])) for stage, entry in _stages.items()}
+        caches = {cache: dict(entry) for cache, entry in _caches.items()}
+    
+    rows = []
+    for stage, entry in sorted(stages.items()):
+        p50 = _quantile(entry['buckets'], 0.5)
+        p95 = _quantile(entry['buckets'], 0.95)
+        rows.append({
+            'stage': stage,
+            'calls': entry['calls'],
+            'errors': entry['errors'],
+            'total_ms': entry['seconds'] * 1000,
+            'mean_ms': entry['seconds'] / entry['calls'] * 1000,
+            'p50_ms': p50 * 1000 if p50 is not None else None,
+            'p95_ms': p95 * 1000 if p95 is not None else None,
+            'rows': entry['rows']
+        })
+    for entry in caches.values():
+        total = entry['hits'] + entry['misses']
+        entry['hit_rate'] = entry['hits'] / total if total else 0.0
+    return rows, caches
+
+
+def render_prometheus():
+    """
+    All metrics in the Prometheus text exposition format
+    """
+    with _lock:
+        stages = {stage: dict(entry, buckets=list(entry['buckets'])) for stage, entry in sorted(_stages.items())}
+        caches = {cache: dict(entry) for cache, entry in sorted(_caches.items())}
+    
+    lines = [
+        '# HELP sentiment_stage_latency_seconds Latency of instrumented calls.',
+        '# TYPE sentiment_stage_latency_seconds histogram'
+    ]
+    for stage, entry in stages.items():
+        cumulative = 0
+        for bound, in_bucket in zip(LATENCY_BUCKETS + ('+Inf',), entry['buckets']):
+            cumulative += in_bucket
+            lines.append(f'sentiment_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'sentiment_stage_latency_seconds_sum{{stage="{stage}"}} {entry["seconds"]:.6f}')
+        lines.append(f'sentiment_stage_latency_seconds_count{{stage="{stage}"}} {entry["calls"]}')
+    
+    lines += ['# HELP sentiment_stage_errors_total Instrumented calls that raised.',
+              '# TYPE sentiment_stage_errors_total counter']
+    lines += [f'sentiment_stage_errors_total{{stage="{stage}"}} {entry["errors"]}' for stage, entry in stages.items()]
+    lines += ['# HELP sentiment_stage_rows_total Rows returned by instrumented calls.',
+              '# TYPE sentiment_stage_rows_total counter']
+    lines += [f'sentiment_stage_rows_total{{stage="{stage}"}} {entry["rows"]}' for stage, entry in stages.items()]
+    
+    lines += ['# HELP sentiment_cache_requests_total Cache lookups by outcome.',
+              '# TYPE sentiment_cache_requests_total counter']
+    for cache, entry in caches.items():
+        lines.append(f'sentiment_cache_requests_total{{cache="{cache}",result="hit"}} {entry["hits"]}')
+        lines.append(f'sentiment_cache_requests_total{{cache="{cache}",result="miss"}} {entry["misses"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serve render_prometheus() at /metrics from a daemon thread
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
\ No newline at end of file
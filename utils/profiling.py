@@ -0,0 +1,112 @@
+"""
+On-demand profiling for the Stock Market Sentiment Analyzer
+Captures one script run or API request as a pstats file and a collapsed-stack file for flame graphs
+"""
+import cProfile
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get('SENTIMENT_PROFILE_DIR', os.path.join('data', 'profiles'))
+PROFILE_KEEP = int(os.environ.get('SENTIMENT_PROFILE_KEEP', '20'))
+SAMPLE_INTERVAL = 0.005
+
+
+def profiling_requested(flag=None):
+    """
+    True when the SENTIMENT_PROFILE environment flag or a profile query parameter asks for a capture
+    """
+    values = [os.environ.get('SENTIMENT_PROFILE', ''), flag if isinstance(flag, str) else '1' if flag else '']
+    return any(value.strip().lower() in ('1', 'true', 'yes', 'on') for value in values)
+
+
+class ProfileCapture:
+    """
+    Deterministic (cProfile) and sampled profile of the calling thread.
+    cProfile gives exact call counts and times as a .pstats file; a sampler
+    thread records the thread's stack every few milliseconds and writes it in
+    collapsed-stack format (one "frame;frame;frame count" line per stack),
+    ready for flamegraph.pl or speedscope. Only the newest files are kept.
+    """
+    
+    def __init__(self, label, directory=None, keep=None, interval=SAMPLE_INTERVAL):
+        self.label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_') or 'profile'
+        self.directory = directory or PROFILE_DIR
+        self.keep = PROFILE_KEEP if keep is None else keep
+        self.interval = interval
+        self.paths = []
+        self.samples = Counter()
+        self._profiler = None
+        self._sampler = None
+        self._stop = threading.Event()
+        self._thread_id = None
+        self._started = None
+        self.elapsed = None
+    
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+        self._sampler.start()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        return self
+    
+    def stop(self):
+        """
+        Stop profiling and write the artifacts; returns their paths
+        """
+        if self._profiler is None:
+            return self.paths
+        self._profiler.disable()
+        self._stop.set()
+        self._sampler.join(timeout=1)
+        elapsed = time.perf_counter() - self._started
+        
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{self.label}")
+        self._profiler.dump_stats(f'{stem}.pstats')
+        with open(f'{stem}.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+        self.paths = [f'{stem}.pstats', f'{stem}.collapsed']
+        self.elapsed = elapsed
+        self._profiler = None
+        self._prune()
+        return self.paths
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+    
+    def _prune(self):
+        """
+        Delete all but the newest keep captures
+        """
+        captures = sorted(glob.glob(os.path.join(self.directory, '*.pstats')))
+        for path in captures[:max(len(captures) - self.keep, 0)]:
+            for stale in (path, path[:-len('.pstats')] + '.collapsed'):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
\ No newline at end of file